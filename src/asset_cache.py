@@ -0,0 +1,107 @@
+﻿"""
+资源磁盘缓存：把解码后的音效 PCM 与缩放好的背景像素保存为 .npy，
+下次启动直接内存映射读取，跳过 OGG 解码与 smoothscale。
+
+缓存文件名包含源文件内容哈希与目标尺寸（或混音器格式），任一变化都会自动失效；
+源文件改动后留下的旧缓存由 cache_prune 清理。
+本模块只产出 NumPy 数组，不依赖显示窗口，可以在后台线程中调用。
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import pygame
+
+import config as cfg
+
+
+def file_digest(path: Path) -> str:
+    """返回文件内容的 SHA-1 摘要（前 16 位十六进制）。"""
+    return hashlib.sha1(path.read_bytes()).hexdigest()[:16]
+
+
+def cache_file(kind: str, path: Path, *extra: object) -> Path:
+    """根据资源类型、源文件哈希与附加参数得到缓存文件路径。"""
+    suffix = "-".join(str(item) for item in extra)
+    return cfg.CACHE_DIR / f"{kind}-{path.stem}-{file_digest(path)}-{suffix}.npy"
+
+
+def cache_load(file: Path) -> np.ndarray | None:
+    """以只读内存映射方式打开缓存数组，不存在或损坏时返回 None。"""
+    try:
+        return np.load(file, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+
+def cache_store(file: Path, array: np.ndarray) -> None:
+    """先写临时文件再原子替换，写入失败时静默跳过（只是少了缓存）。"""
+    tmp = file.with_name(file.name + f".{os.getpid()}.tmp")
+    try:
+        file.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as fh:
+            np.save(fh, array)
+        os.replace(tmp, file)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def cache_prune(sources: list[Path]) -> int:
+    """删除不属于任何现有源文件（按内容哈希）的缓存文件，返回删除的数量。"""
+    digests = {file_digest(path) for path in sources if path.is_file()}
+    removed = 0
+    for file in cfg.CACHE_DIR.glob("*.npy"):
+        # 文件名为 类型-名字-哈希-参数.npy，名字本身可能含有 "-"
+        if any(f"-{digest}-" in file.name for digest in digests):
+            continue
+        try:
+            file.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def load_background_pixels(path: Path, size: tuple[int, int]) -> np.ndarray | None:
+    """返回缩放到 size 的背景 RGB 像素（形状 (h, w, 3)），失败时返回 None。"""
+    if not path.is_file():
+        return None
+    width, height = size
+    file = cache_file("bg", path, f"{width}x{height}") if cfg.ASSET_CACHE_ENABLED else None
+    if file is not None:
+        pixels = cache_load(file)
+        if pixels is not None and pixels.shape == (height, width, 3):
+            return pixels
+    try:
+        image = pygame.image.load(str(path))
+    except pygame.error:
+        return None
+    # 统一转成 24 位 RGB 再缩放，调色板图片也能 smoothscale
+    rgb = pygame.image.frombuffer(pygame.image.tobytes(image, "RGB"), image.get_size(), "RGB")
+    scaled = pygame.transform.smoothscale(rgb, size)
+    pixels = np.frombuffer(pygame.image.tobytes(scaled, "RGB"), dtype=np.uint8).reshape(height, width, 3)
+    if file is not None:
+        cache_store(file, pixels)
+    return pixels
+
+
+def load_sound_samples(path: Path) -> np.ndarray | None:
+    """返回按当前混音器格式解码的 PCM 采样数组，混音器未初始化或失败时返回 None。"""
+    mixer = pygame.mixer.get_init()
+    if mixer is None or not path.is_file():
+        return None
+    frequency, size, channels = mixer
+    file = cache_file("pcm", path, f"{frequency}hz", f"fmt{size}", f"{channels}ch") if cfg.ASSET_CACHE_ENABLED else None
+    if file is not None:
+        samples = cache_load(file)
+        if samples is not None:
+            return samples
+    try:
+        samples = pygame.sndarray.array(pygame.mixer.Sound(str(path)))
+    except pygame.error:
+        return None
+    if file is not None:
+        cache_store(file, samples)
+    return samples
@@ -0,0 +1,288 @@
+﻿"""
+弹球存储：用 NumPy 连续数组保存全部弹球（结构数组，SoA）。
+
+数组按容量预先分配，有效弹球始终紧排在前 count 个槽位，之后的部分就是空闲槽位：
+生成弹球直接写入尾部，减少弹球时截掉尾部（最后生成的先移除），都不会重新分配内存。
+
+每个字段是一条数组，只有前 count 个元素有效：
+- x, y, vx, vy, r: 浮点数组
+- color: 颜色下标，对应 cfg.BALL_COLORS
+"""
+
+from typing import Any
+
+import numpy as np
+
+import config as cfg
+from collision import Rect, circles_rect_sweep
+
+BallStore = dict[str, Any]
+
+FLOAT_FIELDS = ("x", "y", "vx", "vy", "r")
+ALL_FIELDS = FLOAT_FIELDS + ("color",)
+
+# 扫掠推进时一步内最多处理的撞墙次数（正常步长下每个球至多一两次）
+SWEEP_MAX_BOUNCES = 16
+
+
+def ball_store_create(capacity: int = 0) -> BallStore:
+    """创建一个空的弹球存储字典。"""
+    capacity = max(int(capacity), 8)
+    store: BallStore = {"count": 0}
+    for name in FLOAT_FIELDS:
+        store[name] = np.zeros(capacity, dtype=np.float64)
+    store["color"] = np.zeros(capacity, dtype=np.int16)
+    return store
+
+
+def ball_store_capacity(store: BallStore) -> int:
+    """返回当前已分配的数组长度。"""
+    return len(store["x"])
+
+
+def ball_store_reserve(store: BallStore, capacity: int) -> None:
+    """确保数组至少能容纳 capacity 个弹球，不足时按倍数扩容。"""
+    old = ball_store_capacity(store)
+    if capacity <= old:
+        return
+    new = max(capacity, old * 2)
+    count = store["count"]
+    for name in ALL_FIELDS:
+        grown = np.zeros(new, dtype=store[name].dtype)
+        grown[:count] = store[name][:count]
+        store[name] = grown
+
+
+def ball_store_clear(store: BallStore) -> None:
+    """清空全部弹球（保留已分配的数组）。"""
+    store["count"] = 0
+
+
+def ball_store_copy(dst: BallStore, src: BallStore, fields: tuple[str, ...] = ALL_FIELDS) -> None:
+    """把 src 的有效弹球复制到 dst（覆盖 dst 原有内容，只复制 fields 中的字段）。"""
+    count = src["count"]
+    ball_store_reserve(dst, count)
+    for name in fields:
+        dst[name][:count] = src[name][:count]
+    dst["count"] = count
+
+
+def _sample_outside(
+    u: np.ndarray, lo: np.ndarray, hi: np.ndarray, gap_lo: np.ndarray, gap_hi: np.ndarray, center: float
+) -> np.ndarray:
+    """把 [0, 1) 的均匀数 u 映射到 [lo, hi] 去掉 (gap_lo, gap_hi) 后剩余的部分。
+
+    剩余部分为空（或只剩舍入误差）时取离 center 较远的端点。
+    """
+    gap_lo = np.clip(gap_lo, lo, hi)
+    gap_hi = np.clip(gap_hi, lo, hi)
+    below = gap_lo - lo
+    total = below + (hi - gap_hi)
+    offset = u * total
+    value = np.where(offset < below, lo + offset, gap_hi + (offset - below))
+    return np.where(total > 0, value, np.where(center - lo >= hi - center, lo, hi))
+
+
+def ball_store_spawn(
+    store: BallStore,
+    count: int,
+    rng: np.random.Generator,
+    avoid: tuple[float, float] | None = None,
+    clearance: float = 0.0,
+) -> None:
+    """用一次向量化随机抽样在末尾生成 count 个弹球，半径、位置、方向与速度均匀分布。
+
+    给出 avoid=(x, y) 且 clearance > 0 时，新球表面与该点至少相距 clearance：
+    先在还有空位的列里均匀抽 x，再在这一列去掉禁区后剩余的 y 区间里均匀抽 y，不需要反复重抽。
+    禁区盖住整个场地时无法满足，改放在离该点最远的角落。
+    """
+    if count <= 0:
+        return
+    start = store["count"]
+    end = start + count
+    ball_store_reserve(store, end)
+
+    r = rng.integers(cfg.R_MIN, cfg.R_MAX + 1, count).astype(np.float64)
+    ux = rng.uniform(0.0, 1.0, count)
+    u = rng.uniform(0.0, 1.0, count)
+    angle = rng.uniform(0.0, 2 * np.pi, count)
+    speed = rng.uniform(cfg.SPEED_MIN, cfg.SPEED_MAX, count)
+    color = rng.integers(0, len(cfg.BALL_COLORS), count)
+
+    left = r
+    right = cfg.WIDTH - r
+    lo = r
+    hi = cfg.HEIGHT - r
+    if avoid is None or clearance <= 0:
+        x = left + ux * (right - left)
+        y = lo + u * (hi - lo)
+    else:
+        ax, ay = avoid
+        reach = clearance + r
+        reach2 = reach * reach
+        # 禁区盖住整列 ⇔ 这一列离 avoid 较远的一端也在禁区内，这些列连成 [ax - cover, ax + cover]
+        far = np.maximum(ay - lo, hi - ay)
+        cover = np.sqrt(np.maximum(reach2 - far * far, 0.0))
+        x = _sample_outside(ux, left, right, ax - cover, ax + cover, ax)
+        half = np.sqrt(np.maximum(reach2 - (x - ax) ** 2, 0.0))
+        y = _sample_outside(u, lo, hi, ay - half, ay + half, ay)
+
+    store["x"][start:end] = x
+    store["y"][start:end] = y
+    store["vx"][start:end] = np.cos(angle) * speed
+    store["vy"][start:end] = np.sin(angle) * speed
+    store["r"][start:end] = r
+    store["color"][start:end] = color
+    store["count"] = end
+
+
+def ball_store_truncate(store: BallStore, count: int) -> None:
+    """只保留前 count 个弹球（最后生成的先移除）。"""
+    store["count"] = min(store["count"], max(int(count), 0))
+
+
+def ball_store_update(store: BallStore) -> None:
+    """一次性推进全部弹球，并处理四面墙的反弹。"""
+    n = store["count"]
+    if n == 0:
+        return
+    x = store["x"][:n]
+    y = store["y"][:n]
+    vx = store["vx"][:n]
+    vy = store["vy"][:n]
+    r = store["r"][:n]
+
+    x += vx
+    y += vy
+
+    # 越过左右边界的球：速度取反，位置夹回边界内
+    # （用 maximum/minimum 代替 np.clip，小数组时调用开销低得多；大多数步没有球碰墙，直接跳过）
+    right = cfg.WIDTH - r
+    flip = (x <= r) | (x >= right)
+    if flip.any():
+        np.negative(vx, out=vx, where=flip)
+        np.maximum(x, r, out=x)
+        np.minimum(x, right, out=x)
+
+    bottom = cfg.HEIGHT - r
+    flip = (y <= r) | (y >= bottom)
+    if flip.any():
+        np.negative(vy, out=vy, where=flip)
+        np.maximum(y, r, out=y)
+        np.minimum(y, bottom, out=y)
+
+
+def _wall_time(p: np.ndarray, d: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """沿位移 d 移动时到达 [lo, hi] 边界所需的时间（步长比例），不动时为 inf。"""
+    t = np.full_like(p, np.inf)
+    np.divide(hi - p, d, out=t, where=d > 0)
+    np.divide(lo - p, d, out=t, where=d < 0)
+    return np.maximum(t, 0.0, out=t)
+
+
+def _fold(p: np.ndarray, d: np.ndarray, lo: np.ndarray, hi: np.ndarray, v: np.ndarray) -> None:
+    """p 沿位移 d 在 [lo, hi] 之间往返反弹后的终点（原地写回），反弹奇数次的速度 v 取反。"""
+    p += d
+    out = (p < lo) | (p > hi)
+    if not out.any():
+        return
+    # 只有越界的球需要折返：展开后的坐标按 2 倍区间取模，落在后半段的镜像回来
+    base = lo[out]
+    span = hi[out] - base
+    q = p[out] - base
+    m = np.mod(q, 2 * span)
+    p[out] = base + np.where(m <= span, m, 2 * span - m)
+    flip = out.copy()
+    flip[out] = np.floor(q / span) % 2 != 0
+    np.negative(v, out=v, where=flip)
+
+
+def _sweep_rect(
+    x: np.ndarray,
+    y: np.ndarray,
+    mx: np.ndarray,
+    my: np.ndarray,
+    r: np.ndarray,
+    rect: Rect,
+    rect_dx: float,
+    rect_dy: float,
+    since: float,
+) -> float:
+    """按撞墙时刻把每个球的路径切成直线段，逐段与移动矩形做扫掠检测（会修改传入的数组）。"""
+    right = cfg.WIDTH - r
+    bottom = cfg.HEIGHT - r
+    first = np.inf
+    t = np.zeros(len(x))
+    for _ in range(SWEEP_MAX_BOUNCES):
+        tx = _wall_time(x, mx, r, right)
+        ty = _wall_time(y, my, r, bottom)
+        t_wall = t + np.minimum(tx, ty)
+        end = np.minimum(t_wall, 1.0)
+
+        # 在矩形的参考系里看：圆做相对运动，矩形固定在这一步开始时的位置
+        start = np.maximum(t, since)
+        span = end - start
+        active = span > 0
+        if active.any():
+            start = start[active]
+            span = span[active]
+            offset = start - t[active]
+            toi = circles_rect_sweep(
+                x[active] + mx[active] * offset - rect_dx * start,
+                y[active] + my[active] * offset - rect_dy * start,
+                (mx[active] - rect_dx) * span,
+                (my[active] - rect_dy) * span,
+                r[active],
+                rect,
+            )
+            first = min(first, float((start + toi * span).min()))
+
+        bounced = t_wall < 1.0
+        if not bounced.any():
+            break
+        x += mx * (end - t)
+        y += my * (end - t)
+        np.negative(mx, out=mx, where=bounced & (tx <= ty))
+        np.negative(my, out=my, where=bounced & (ty <= tx))
+        t = end
+    return first
+
+
+def ball_store_sweep(
+    store: BallStore,
+    ticks: float,
+    rect: Rect | None = None,
+    rect_dx: float = 0.0,
+    rect_dy: float = 0.0,
+    since: float = 0.0,
+) -> float:
+    """扫掠推进：一次前进 ticks 个基准刻度，按精确的撞墙位置折返，大步长也不会穿墙。
+
+    给出 rect 时，矩形在这一步内匀速移动 (rect_dx, rect_dy)，对弹球的每段路径做与移动矩形的扫掠检测，
+    返回 since 之后首次接触的时刻（步长内比例 0..1，未接触为 inf）。
+    """
+    n = store["count"]
+    if n == 0:
+        return np.inf
+    x = store["x"][:n]
+    y = store["y"][:n]
+    vx = store["vx"][:n]
+    vy = store["vy"][:n]
+    r = store["r"][:n]
+    mx = vx * ticks
+    my = vy * ticks
+
+    first = np.inf
+    if rect is not None and since <= 1.0:
+        # 粗筛：一步内每个轴的移动距离不超过整步位移（反弹只会折回），只精确检测附近的球
+        left, top, right, bottom = rect
+        reach_x = (right - left) / 2 + r + np.abs(mx) + abs(rect_dx)
+        reach_y = (bottom - top) / 2 + r + np.abs(my) + abs(rect_dy)
+        near = (np.abs(x - (left + right) / 2) <= reach_x) & (np.abs(y - (top + bottom) / 2) <= reach_y)
+        if near.any():
+            first = _sweep_rect(x[near], y[near], mx[near], my[near], r[near], rect, rect_dx, rect_dy, since)
+
+    # 整步位移按往返反弹折叠，一次算出终点与速度方向
+    _fold(x, mx, r, cfg.WIDTH - r, vx)
+    _fold(y, my, r, cfg.HEIGHT - r, vy)
+    return first
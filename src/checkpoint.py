@@ -0,0 +1,218 @@
+﻿"""
+游戏存档：把模拟状态打包成扁平的二进制布局，用于崩溃恢复与快速回退。
+
+布局（小端，8 字节对齐）：
+- 固定头部 HEADER_DTYPE：魔数、版本、配置指纹、种子、状态、分数、关卡、玩家字段、随机数状态
+- 弹球数组 x, y, vx, vy, r（float64 × count）
+- 空间网格排列 order（int64 × order_count，弹球互撞的处理顺序依赖它）
+- 弹球颜色下标（int16 × count）
+
+打包时直接写进复用的 bytearray，恢复时按偏移从任意缓冲区（包括 np.memmap）切出视图再复制，
+都只是几次内存拷贝。HUD、输入源、帧统计等不影响模拟结果的部分不保存。
+"""
+
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+import config as cfg
+from ball_store import FLOAT_FIELDS, ball_store_reserve
+from replay import config_fingerprint
+
+Game = dict[str, Any]
+AutoSave = dict[str, Any]
+
+CHECKPOINT_MAGIC = b"DGCK"
+CHECKPOINT_VERSION = 1
+PLAYER_FLOAT_FIELDS = ("x", "y", "w", "h", "speed", "hurt_cd")
+PLAYER_INT_FIELDS = ("hp", "hp_max")
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S4"),
+        ("version", "<u4"),
+        ("fingerprint", "S8"),
+        ("seed", "<u8"),
+        ("ball_count", "<i8"),
+        ("order_count", "<i8"),
+        ("state", "u1"),
+        ("audio_muted", "u1"),
+        ("has_player", "u1"),
+        ("rng_has_uint32", "u1"),
+        ("rng_uinteger", "<u4"),
+        # PCG64 的 128 位 state 与 inc，各拆成低、高两个 64 位字
+        ("rng_state", "<u8", (4,)),
+        ("score", "<f8"),
+        ("high_score", "<i8"),
+        ("level_index", "<i8"),
+        ("level_timer", "<f8"),
+        ("level_flash_timer", "<f8"),
+    ]
+    + [(f"player_{name}", "<f8") for name in PLAYER_FLOAT_FIELDS]
+    + [(f"player_{name}", "<i8") for name in PLAYER_INT_FIELDS]
+)
+WORD_MASK = (1 << 64) - 1
+
+
+def checkpoint_size(ball_count: int, order_count: int) -> int:
+    """返回存有 ball_count 个弹球、order_count 个网格下标的存档字节数。"""
+    return HEADER_DTYPE.itemsize + ball_count * (8 * len(FLOAT_FIELDS) + 2) + order_count * 8
+
+
+def checkpoint_views(buf: Any, ball_count: int, order_count: int) -> dict[str, np.ndarray]:
+    """按布局从缓冲区切出各段数组视图（不复制）。"""
+    views = {}
+    offset = HEADER_DTYPE.itemsize
+    for name in FLOAT_FIELDS:
+        views[name] = np.frombuffer(buf, dtype="<f8", count=ball_count, offset=offset)
+        offset += ball_count * 8
+    views["order"] = np.frombuffer(buf, dtype="<i8", count=order_count, offset=offset)
+    offset += order_count * 8
+    views["color"] = np.frombuffer(buf, dtype="<i2", count=ball_count, offset=offset)
+    return views
+
+
+def checkpoint_pack(game: Game, buf: bytearray | None = None) -> bytearray:
+    """把模拟状态写入 buf（长度不符时重新分配）并返回。"""
+    balls = game["balls"]
+    count = balls["count"]
+    order = game["grid"]["order"]
+    size = checkpoint_size(count, len(order))
+    if buf is None or len(buf) != size:
+        buf = bytearray(size)
+
+    header = np.frombuffer(buf, dtype=HEADER_DTYPE, count=1)[0]
+    header["magic"] = CHECKPOINT_MAGIC
+    header["version"] = CHECKPOINT_VERSION
+    header["fingerprint"] = config_fingerprint()
+    header["seed"] = game["seed"]
+    header["ball_count"] = count
+    header["order_count"] = len(order)
+    header["state"] = cfg.GAME_STATES.index(game["state"])
+    header["audio_muted"] = game["audio_muted"]
+    header["score"] = game["score"]
+    header["high_score"] = game["high_score"]
+    header["level_index"] = game["level"]["index"]
+    header["level_timer"] = game["level"]["timer"]
+    header["level_flash_timer"] = game["level_flash_timer"]
+
+    rng_state = game["rng"].bit_generator.state
+    state, inc = rng_state["state"]["state"], rng_state["state"]["inc"]
+    header["rng_state"] = (state & WORD_MASK, state >> 64, inc & WORD_MASK, inc >> 64)
+    header["rng_has_uint32"] = rng_state["has_uint32"]
+    header["rng_uinteger"] = rng_state["uinteger"]
+
+    player = game["player"]
+    header["has_player"] = player is not None
+    if player is not None:
+        for name in PLAYER_FLOAT_FIELDS + PLAYER_INT_FIELDS:
+            header[f"player_{name}"] = player[name]
+
+    views = checkpoint_views(buf, count, len(order))
+    for name in FLOAT_FIELDS:
+        views[name][:] = balls[name][:count]
+    views["order"][:] = order
+    views["color"][:] = balls["color"][:count]
+    return buf
+
+
+def checkpoint_restore(game: Game, data: Any, check_config: bool = True) -> None:
+    """把存档写回 game；data 可以是 bytes、bytearray 或 np.memmap。
+
+    格式或配置指纹不符时抛出 ValueError，此时 game 保持不变。
+    """
+    if len(data) < HEADER_DTYPE.itemsize:
+        raise ValueError("不是受支持的存档")
+    header = np.frombuffer(data, dtype=HEADER_DTYPE, count=1)[0]
+    if header["magic"] != CHECKPOINT_MAGIC or header["version"] != CHECKPOINT_VERSION:
+        raise ValueError("不是受支持的存档")
+    if check_config and header["fingerprint"] != config_fingerprint():
+        raise ValueError("存档时的配置与当前 config.py 不一致")
+    count = int(header["ball_count"])
+    order_count = int(header["order_count"])
+    if len(data) != checkpoint_size(count, order_count):
+        raise ValueError("存档数据长度不符")
+    state = int(header["state"])
+    if state >= len(cfg.GAME_STATES):
+        raise ValueError(f"存档中的游戏状态编号 {state} 无效")
+
+    views = checkpoint_views(data, count, order_count)
+    balls = game["balls"]
+    ball_store_reserve(balls, count)
+    for name in FLOAT_FIELDS + ("color",):
+        balls[name][:count] = views[name]
+    balls["count"] = count
+    game["grid"]["order"] = views["order"].astype(np.int64)
+
+    game["seed"] = int(header["seed"])
+    game["state"] = cfg.GAME_STATES[state]
+    game["audio_muted"] = bool(header["audio_muted"])
+    game["score"] = float(header["score"])
+    game["high_score"] = int(header["high_score"])
+    game["level"]["index"] = int(header["level_index"])
+    game["level"]["timer"] = float(header["level_timer"])
+    game["level_flash_timer"] = float(header["level_flash_timer"])
+
+    words = [int(word) for word in header["rng_state"]]
+    game["rng"].bit_generator.state = {
+        "bit_generator": "PCG64",
+        "state": {"state": words[0] | (words[1] << 64), "inc": words[2] | (words[3] << 64)},
+        "has_uint32": int(header["rng_has_uint32"]),
+        "uinteger": int(header["rng_uinteger"]),
+    }
+
+    if header["has_player"]:
+        player = {name: float(header[f"player_{name}"]) for name in PLAYER_FLOAT_FIELDS}
+        player.update({name: int(header[f"player_{name}"]) for name in PLAYER_INT_FIELDS})
+        game["player"] = player
+    else:
+        game["player"] = None
+
+
+def checkpoint_save(game: Game, path: Path, buf: bytearray | None = None) -> bytearray:
+    """打包并原子写入存档文件，返回可供下次复用的缓冲区。"""
+    buf = checkpoint_pack(game, buf)
+    path = Path(path)
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(tmp, "wb") as fh:
+        fh.write(buf)
+    os.replace(tmp, path)
+    return buf
+
+
+def checkpoint_load(path: Path) -> np.ndarray:
+    """以只读内存映射方式打开存档文件，交给 checkpoint_restore 使用。"""
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+# ============ 自动存档 ============
+def autosave_create(path: Path, interval: float | None = None) -> AutoSave:
+    """每隔 interval 秒（默认 CHECKPOINT_INTERVAL）模拟时间把游戏写入 path。"""
+    if interval is None:
+        interval = cfg.CHECKPOINT_INTERVAL
+    return {
+        "path": Path(path),
+        "every": max(1, round(interval * cfg.SIM_HZ)),
+        "steps": 0,
+        "buffer": None,
+    }
+
+
+def autosave_tick(autosave: AutoSave, game: Game) -> None:
+    """每个模拟步之后调用一次，到期时保存；写入失败只跳过本次。"""
+    autosave["steps"] += 1
+    if autosave["steps"] < autosave["every"]:
+        return
+    autosave["steps"] = 0
+    try:
+        autosave["buffer"] = checkpoint_save(game, autosave["path"], autosave["buffer"])
+    except OSError:
+        pass
+
+
+def autosave_discard(autosave: AutoSave) -> None:
+    """正常退出时删除存档，下次启动不再恢复。"""
+    autosave["path"].unlink(missing_ok=True)
@@ -10,9 +10,18 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 ASSETS_DIR = BASE_DIR / "assets"
 IMAGES_DIR = ASSETS_DIR / "images"
 SOUNDS_DIR = ASSETS_DIR / "sounds"
+CACHE_DIR = BASE_DIR / ".cache"  # 解码后的音效与缩放背景的磁盘缓存
 
 IMAGE_BACKGROUND = IMAGES_DIR / "bg_layer.png"
 
+# 带明暗的弹球图（由 tools/generate_visual_assets.py 生成），键为图中弹球直径
+IMAGE_BALL_SPRITES = {
+    24: IMAGES_DIR / "ball_small.png",
+    32: IMAGES_DIR / "ball_medium.png",
+    40: IMAGES_DIR / "ball_large.png",
+}
+BALL_USE_SHADED_SPRITES = False  # False 时使用纯色圆精灵
+
 SOUND_FILES = {
     "hit": SOUNDS_DIR / "sfx_hit.ogg",
     "levelup": SOUNDS_DIR / "sfx_levelup.ogg",
@@ -21,13 +30,90 @@ SOUND_FILES = {
 }
 
 SFX_VOLUME = 0.6
+SFX_SYNTHESIZE = False  # True 时启动时用 sfx_recipes 直接合成音效，不读取 OGG 文件
+SFX_VARIANTS = 4  # 合成模式下每个音效预生成的变体数
+SFX_PITCH_JITTER = 1.0  # 变体音高的最大偏移（半音）
+SFX_VOLUME_JITTER = 0.2  # 变体音量的最大衰减比例
+ASSET_CACHE_ENABLED = True  # 关闭后每次启动都重新解码资源
+STARTUP_REPORT = False  # 在终端打印首帧与资源加载完成的耗时
 
 # 屏幕参数
 WIDTH, HEIGHT = 800, 600
-FPS = 60
+FPS = 60  # 渲染帧率上限
+# 逻辑分辨率：游戏世界始终按 WIDTH x HEIGHT 计算，画面先画到内部画布再放大到窗口（保持宽高比，多余部分留黑边）
+WINDOW_SIZE = None  # 初始窗口尺寸，None 表示 (WIDTH, HEIGHT)
+WINDOW_RESIZABLE = False  # 允许拖动改变窗口大小
+RENDER_SCALE = 1.0  # 内部画布相对窗口可用区域的比例；0.5 时只绘制四分之一的像素再放大
+SCALED_ASSET_CACHE = 4  # 按尺寸缓存的背景图数量，窗口在这几个尺寸间切换时不再重新缩放
+SPRITE_CACHE_LIMIT = 512  # 每种弹球精灵缓存最多保存的 (半径, 颜色) 组合数
+
+# 固定步长模拟：物理按 SIM_HZ 推进，与渲染帧率解耦
+SIM_HZ = 60
+SIM_DT = 1.0 / SIM_HZ
+MAX_CATCHUP_STEPS = 5  # 一帧最多补算的模拟步数，防止越卡越慢
+PIPELINED_SIM = False  # 模拟在后台线程运行，主线程只渲染最新快照（更新与渲染重叠执行）
+# 输入延迟（仅单线程主循环）：探针测量方向键按下到被模拟读取、到画面提交的耗时，退出时打印统计；
+# 延迟采样把每帧的等待挪到读取输入之前，按近期工作耗时推算，尽量晚地读取输入后立即绘制提交
+LATENCY_PROBE = False
+LATE_LATCH = False
+LATE_LATCH_MARGIN_MS = 2.0  # 预计完成时刻与计划呈现时刻之间预留的余量（毫秒）
+# 速度、冷却帧数等按每秒 MOTION_HZ 个基准刻度定义；
+# SIM_HZ 与之不同时每步覆盖 MOTION_HZ / SIM_HZ 个刻度，改用扫掠碰撞，大步长也不会漏检
+MOTION_HZ = 60
 BG_FALLBACK_COLOR = (18, 20, 32)
 BG_COLOR = BG_FALLBACK_COLOR
 
+# 脏矩形渲染（可选模式）
+DIRTY_RECT_RENDER = False  # 默认整屏重绘；开启后只重画并提交变化区域
+DIRTY_FULL_REDRAW_RATIO = 0.5  # 脏区域总面积超过屏幕该比例时改为整屏重绘
+
+# 画质调节（可选模式）：帧耗时超出 1/FPS 预算时逐级降低画质，余量恢复后再逐级升回（0 档为最高画质）
+QUALITY_GOVERNOR = False  # 默认固定最高画质；开启后按帧耗时自动切换档位
+QUALITY_WINDOW = 30  # 判定降档时观察的最近帧数（取 90 分位）
+QUALITY_RECOVER_RATIO = 0.6  # 单帧耗时低于预算的该比例才算有余量
+QUALITY_RECOVER_FRAMES = 180  # 连续这么多帧都有余量才升一档
+QUALITY_TIERS = [
+    # background: 是否绘制背景图（否则填充 BG_COLOR）
+    # shaded_balls: 是否使用带明暗的弹球精灵（否则用纯色圆精灵）
+    # hud_interval_ms: HUD 数据最短同步间隔，0 表示每帧同步
+    # max_catchup: 一帧最多补算的模拟步数
+    {"background": True, "shaded_balls": True, "hud_interval_ms": 0, "max_catchup": MAX_CATCHUP_STEPS},
+    {"background": True, "shaded_balls": False, "hud_interval_ms": 0, "max_catchup": 4},
+    {"background": False, "shaded_balls": False, "hud_interval_ms": 100, "max_catchup": 3},
+    {"background": False, "shaded_balls": False, "hud_interval_ms": 250, "max_catchup": 2},
+]
+
+# 帧耗时统计（F3 切换屏幕统计图层）
+PROFILER_ENABLED = False
+PROFILER_FRAMES = 3600  # 环形缓冲区保存的帧数
+PROFILER_DUMP_PATH = None  # 退出时导出的文件路径（.csv 或 .json），None 表示不导出
+
+# 输入录像：设置路径后，退出时把本次会话写入该文件（用 src/replay_player.py 回放）
+REPLAY_RECORD_PATH = None
+
+# 自动存档：设置路径后每隔 CHECKPOINT_INTERVAL 秒（模拟时间）写入一次，
+# 启动时若存在则恢复到暂停状态，正常退出时删除（录像时不恢复，录像必须从头开始）
+CHECKPOINT_PATH = None
+CHECKPOINT_INTERVAL = 1.0
+# 游戏状态：存档、联机快照与遥测都按这里的下标编码，只能在末尾追加
+GAME_STATES = ("ready", "playing", "paused", "gameover")
+
+# 联机对战（src/net_server.py 与 src/net_client.py）
+NET_HOST = "127.0.0.1"
+NET_PORT = 47800
+NET_ROOM_PLAYERS = 2  # 每个房间的座位数，坐满后开局
+NET_SNAPSHOT_EVERY = 2  # 每隔几个模拟步发送一次快照
+NET_HISTORY = 32  # 双方各保留的最近快照数，超出后增量基准失效，改发完整快照
+NET_INTERP_TICKS = 6  # 客户端画面落后最新快照的模拟步数（插值缓冲）
+NET_TIMEOUT = 5.0  # 超过该秒数没有收到消息的客户端被移出房间
+NET_POS_SCALE = 8  # 坐标量化精度：每像素的刻度数（WIDTH、HEIGHT 乘以它不能超过 65535）
+NET_OPPONENT_COLOR = (230, 140, 60)  # 对手方块颜色
+
+# 遥测：每帧向共享内存环形缓冲区写一条记录，用 tools/telemetry_reader.py 读取
+TELEMETRY_ENABLED = False
+TELEMETRY_NAME = "dodgeball_telemetry"  # 共享内存名称
+TELEMETRY_CAPACITY = 4096  # 环形缓冲区记录数（60 FPS 下约 68 秒）
+
 # 颜色
 WHITE = (240, 240, 240)
 GREEN = (50, 205, 50)
@@ -41,6 +127,7 @@ BALL_COLORS = [
 PLAYER_COLOR = (78, 205, 196)
 PLAYER_HURT_COLOR = (255, 120, 120)
 HUD_PANEL_ALPHA = 140
+HUD_TEXT_CACHE_SIZE = 64  # HUD 文字渲染缓存的最大条目数
 LEVEL_FLASH_COLOR = (255, 209, 102)
 
 # 弹球参数
@@ -49,6 +136,11 @@ BALL_MAX = 30
 R_MIN, R_MAX = 12, 24
 SPEED_MIN, SPEED_MAX = 1.5, 4.0
 
+# 弹球互撞与空间网格
+BALL_COLLISIONS = False  # 开启后弹球之间发生弹性碰撞
+GRID_CELL_SIZE = 2 * R_MAX  # 格子边长不小于最大直径
+GRID_MIN_BALLS = 256  # 未开启互撞时，弹球数达到该值才用网格做玩家碰撞查询
+
 # 玩家参数
 PLAYER_SIZE = 32
 PLAYER_SPEED = 5.5
@@ -66,3 +158,4 @@ LEVEL_BONUS_PER_LEVEL = 0.5
 LEVEL_BALL_INCREMENT = 1
 LEVEL_INITIAL_BALLS = BALL_MIN
 LEVEL_MAX_BALLS = BALL_MAX
+SPAWN_CLEARANCE = 0  # 新弹球表面与玩家中心的最小距离（像素），0 表示不限制
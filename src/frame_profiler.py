@@ -0,0 +1,164 @@
+﻿"""
+逐阶段帧耗时统计：把每帧各阶段耗时写入固定大小的环形缓冲区。
+
+用法：每帧开始调用 prof_begin_frame，每个阶段结束时调用 prof_mark
+（距上一次标记的时间记到该阶段），帧末调用 prof_end_frame。
+关闭时 game["profiler"] 为 None，调用方只多一次 None 判断。
+"""
+
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pygame
+
+Profiler = dict[str, Any]
+
+PHASES = (
+    "events",
+    "level_tick",
+    "balls",
+    "player",
+    "collision",
+    "background",
+    "entities",
+    "hud",
+    "flip",
+    "frame",
+)
+PHASE_EVENTS = 0
+PHASE_LEVEL_TICK = 1
+PHASE_BALLS = 2
+PHASE_PLAYER = 3
+PHASE_COLLISION = 4
+PHASE_BACKGROUND = 5
+PHASE_ENTITIES = 6
+PHASE_HUD = 7
+PHASE_FLIP = 8
+PHASE_FRAME = 9
+
+OVERLAY_SIZE = (300, 150)
+OVERLAY_HISTORY = 240
+
+
+def prof_create(size: int) -> Profiler:
+    """创建可保存 size 帧数据的统计器。"""
+    return {
+        "samples": np.zeros((size, len(PHASES)), dtype=np.float64),
+        "current": np.zeros(len(PHASES), dtype=np.float64),
+        "index": 0,
+        "filled": 0,
+        "frame_start": 0.0,
+        "mark": 0.0,
+        "overlay": False,
+        "font": None,
+    }
+
+
+def prof_begin_frame(prof: Profiler) -> None:
+    """开始新一帧的计时。"""
+    prof["current"].fill(0.0)
+    now = time.perf_counter()
+    prof["frame_start"] = now
+    prof["mark"] = now
+
+
+def prof_mark(prof: Profiler, phase: int) -> None:
+    """把距上一次标记的时间累加到 phase 阶段。"""
+    now = time.perf_counter()
+    prof["current"][phase] += now - prof["mark"]
+    prof["mark"] = now
+
+
+def prof_end_frame(prof: Profiler) -> None:
+    """结束本帧，把各阶段耗时（毫秒）写入环形缓冲区。"""
+    current = prof["current"]
+    current[PHASE_FRAME] = time.perf_counter() - prof["frame_start"]
+    samples = prof["samples"]
+    samples[prof["index"]] = current * 1000.0
+    prof["index"] = (prof["index"] + 1) % len(samples)
+    prof["filled"] = min(prof["filled"] + 1, len(samples))
+
+
+def prof_history(prof: Profiler) -> np.ndarray:
+    """按时间顺序返回已记录的全部样本（毫秒）。"""
+    samples = prof["samples"]
+    if prof["filled"] < len(samples):
+        return samples[: prof["filled"]]
+    return np.roll(samples, -prof["index"], axis=0)
+
+
+def prof_percentiles(prof: Profiler, phase: int = PHASE_FRAME) -> tuple[float, float, float]:
+    """返回某阶段耗时的 p50/p95/p99（毫秒）。"""
+    if prof["filled"] == 0:
+        return 0.0, 0.0, 0.0
+    values = prof["samples"][: prof["filled"], phase]
+    p50, p95, p99 = np.percentile(values, (50, 95, 99))
+    return float(p50), float(p95), float(p99)
+
+
+def prof_toggle_overlay(prof: Profiler) -> None:
+    """切换屏幕上的统计图层。"""
+    prof["overlay"] = not prof["overlay"]
+
+
+def prof_draw_overlay(prof: Profiler, screen: pygame.Surface, budget_ms: float) -> None:
+    """在右下角绘制帧耗时曲线与分位数。"""
+    if not prof["overlay"] or prof["filled"] == 0:
+        return
+    if prof["font"] is None:
+        prof["font"] = pygame.font.SysFont(None, 18)
+    font = prof["font"]
+
+    w, h = OVERLAY_SIZE
+    x0 = screen.get_width() - w - 12
+    y0 = screen.get_height() - h - 12
+    panel = pygame.Surface((w, h), pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 170))
+    screen.blit(panel, (x0, y0))
+
+    # 曲线纵轴以两倍帧预算为满格，预算线用黄色标出
+    graph_top = y0 + 42
+    graph_h = h - 50
+    scale = graph_h / (budget_ms * 2)
+    budget_y = graph_top + graph_h - int(budget_ms * scale)
+    pygame.draw.line(screen, (255, 209, 102), (x0 + 4, budget_y), (x0 + w - 4, budget_y))
+    frames = prof_history(prof)[-OVERLAY_HISTORY:, PHASE_FRAME]
+    if len(frames) > 1:
+        step = (w - 8) / (OVERLAY_HISTORY - 1)
+        heights = np.minimum(frames * scale, graph_h)
+        points = [
+            (x0 + 4 + int(i * step), graph_top + graph_h - int(value))
+            for i, value in enumerate(heights.tolist())
+        ]
+        pygame.draw.lines(screen, (120, 220, 120), False, points)
+
+    p50, p95, p99 = prof_percentiles(prof)
+    text = font.render(f"frame p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f} ms", True, (240, 240, 240))
+    screen.blit(text, (x0 + 6, y0 + 4))
+    means = prof["samples"][: prof["filled"]].mean(axis=0)
+    parts = [f"{PHASES[i][:4]} {means[i]:.1f}" for i in range(PHASE_FRAME) if means[i] >= 0.05]
+    text = font.render(" ".join(parts), True, (200, 200, 200))
+    screen.blit(text, (x0 + 6, y0 + 22))
+
+
+def prof_dump(prof: Profiler, path: Path) -> None:
+    """把缓冲区按时间顺序导出为 CSV（.csv）或 JSON（其余后缀），单位毫秒。"""
+    rows = prof_history(prof).tolist()
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(PHASES)
+            writer.writerows(rows)
+        return
+    p50, p95, p99 = prof_percentiles(prof)
+    data = {
+        "phases": PHASES,
+        "frame_ms": {"p50": p50, "p95": p95, "p99": p99},
+        "samples": rows,
+    }
+    path.write_text(json.dumps(data), encoding="utf-8")
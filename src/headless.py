@@ -0,0 +1,81 @@
+﻿"""
+无窗口模拟：不打开显示窗口、不读键盘，按 CPU 能跑的最快速度推进 game_update。
+
+用法示例（在项目根目录）：
+    python src/headless.py --frames 100000 --input random --seed 1
+    python src/headless.py --frames 25000 --ticks-per-step 4   # 大步长（扫掠碰撞）
+"""
+
+import argparse
+import time
+from typing import Any
+
+import config as cfg
+from main import InputSource, game_create, game_start, game_update
+from policies import POLICIES, input_idle, policy_create
+
+
+# ============ 运行 ============
+def headless_run(
+    frames: int,
+    input_source: InputSource | None = None,
+    dt: float = cfg.SIM_DT,
+    restart: bool = True,
+    seed: int | None = None,
+) -> dict[str, Any]:
+    """无窗口推进最多 frames 帧，返回统计信息（frames 与 fps 按实际推进的帧数计算）。
+
+    restart=True 时游戏结束后立即开新局，适合长时间浸泡测试；否则游戏结束即停止。
+    """
+    game = game_create(input_source or input_idle, with_hud=False, seed=seed)
+    game_start(game)
+    episodes = 1
+    best_level = 0
+
+    ran = 0
+    start = time.perf_counter()
+    while ran < frames:
+        game_update(game, dt)
+        ran += 1
+        best_level = max(best_level, game["level"]["index"])
+        if game["state"] == "gameover":
+            if not restart:
+                break
+            game_start(game)
+            episodes += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "frames": ran,
+        "elapsed": elapsed,
+        "fps": ran / elapsed if elapsed > 0 else float("inf"),
+        "episodes": episodes,
+        "high_score": game["high_score"],
+        "best_level": best_level + 1,
+        "state": game["state"],
+    }
+
+
+def main() -> None:
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description="无窗口运行躲避球模拟")
+    parser.add_argument("--frames", type=int, default=60 * 60, help="模拟帧数")
+    parser.add_argument("--input", choices=sorted(POLICIES), default="random", help="输入策略")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--no-restart", action="store_true", help="游戏结束后停止")
+    parser.add_argument("--ticks-per-step", type=float, default=1.0, help="每步覆盖的基准刻度数（>1 时用扫掠碰撞）")
+    args = parser.parse_args()
+
+    stats = headless_run(
+        args.frames,
+        policy_create(args.input, args.seed),
+        dt=args.ticks_per_step / cfg.MOTION_HZ,
+        restart=not args.no_restart,
+        seed=args.seed,
+    )
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
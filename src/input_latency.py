@@ -0,0 +1,208 @@
+﻿"""
+输入延迟：测量按键到画面呈现的耗时，并提供“延迟采样”（late latch）的帧节奏。
+
+默认主循环在帧首由 clock.tick 等待，随后立即读取输入、推进模拟、绘制并提交。
+按键要等到下一次读取才生效；若提交会阻塞到垂直同步，画面还要再等一帧才显示。
+
+- 节奏器（pacer）：替代 clock.tick 的等待。普通模式与 tick 相同（距上次醒来满一帧）；
+  延迟采样模式按预计的下一次呈现时刻倒推，睡到“呈现时刻 - 近期工作耗时 90 分位 - 余量”才醒来
+  读取输入，把等待从采样之后挪到采样之前。
+- 探针（probe）：记录每个方向键 KEYDOWN 的时刻、第一次被模拟步读到的时刻、
+  以及读到它的那一帧提交完成的时刻，退出时打印分位数统计。
+  pygame 不提供事件的系统时间戳，探针在等待期间每毫秒用 pygame.event.peek 查看一次队列；
+  绘制与提交期间无法查看，这段空档计入上界（按键可能在空档内任何时刻到达）。
+"""
+
+import time
+from typing import Any
+
+import numpy as np
+import pygame
+
+import config as cfg
+from replay import BIT_DOWN, BIT_LEFT, BIT_RIGHT, BIT_UP, move_to_bits
+
+Pacer = dict[str, Any]
+Probe = dict[str, Any]
+
+# 预测工作耗时时观察的最近帧数（取 90 分位）
+WORK_WINDOW = 30
+# 探针等待期间查看事件队列的间隔（秒）
+POLL_INTERVAL = 0.001
+# 超过该秒数仍未被模拟读到的按键（在非对局状态按下、或按下又松开得太快）不计入统计
+PENDING_TIMEOUT = 1.0
+PROBE_SAMPLES = 4096
+
+KEY_BITS = {
+    pygame.K_LEFT: BIT_LEFT,
+    pygame.K_a: BIT_LEFT,
+    pygame.K_RIGHT: BIT_RIGHT,
+    pygame.K_d: BIT_RIGHT,
+    pygame.K_UP: BIT_UP,
+    pygame.K_w: BIT_UP,
+    pygame.K_DOWN: BIT_DOWN,
+    pygame.K_s: BIT_DOWN,
+}
+
+
+# ============ 节奏器 ============
+def pacer_create(fps: float, late_latch: bool) -> Pacer:
+    """创建帧节奏器；late_latch 为 True 时尽量晚地醒来读取输入。"""
+    return {
+        "period": 1.0 / fps,
+        "late_latch": late_latch,
+        "margin": cfg.LATE_LATCH_MARGIN_MS / 1000.0,
+        "wake": None,
+        "present": None,  # 预计的下一次呈现时刻
+        "last_present": None,  # 上一帧醒来时预计的呈现时刻
+        "work": np.zeros(WORK_WINDOW, dtype=np.float64),
+        "work_count": 0,
+        "work_ms": 0.0,  # 上一帧从醒来到开始提交的耗时（不含提交时等待垂直同步）
+    }
+
+
+def pacer_sleep_until(target: float, probe: Probe | None = None) -> None:
+    """睡到 target（perf_counter 时刻）；有探针时分段睡眠并记录按键最早出现在队列里的时刻。"""
+    if probe is None:
+        remaining = target - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        return
+    while True:
+        now = time.perf_counter()
+        if probe["seen"] is None:
+            if pygame.event.peek(pygame.KEYDOWN):
+                probe["seen"] = now
+                probe["seen_blind"] = now - probe["polled"]
+            probe["polled"] = now
+        remaining = target - now
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, POLL_INTERVAL))
+
+
+def pacer_wait(pacer: Pacer, probe: Probe | None = None) -> float:
+    """等待到本帧开始处理的时刻，返回本帧应推进的时间（秒）。
+
+    普通模式返回与上一帧醒来的间隔；延迟采样模式的醒来时刻随工作耗时估计浮动，
+    改为返回两次计划呈现的间隔，模拟步数不会因醒来时刻的抖动在 0 步与 2 步之间跳动。
+    """
+    last = pacer["wake"]
+    if last is None:
+        pacer["wake"] = time.perf_counter()
+        pacer["present"] = pacer["last_present"] = pacer["wake"] + pacer["period"]
+        return 0.0
+    if not pacer["late_latch"]:
+        pacer_sleep_until(last + pacer["period"], probe)
+        pacer["wake"] = time.perf_counter()
+        return pacer["wake"] - last
+    filled = min(pacer["work_count"], WORK_WINDOW)
+    work = float(np.percentile(pacer["work"][:filled], 90)) if filled else 0.0
+    pacer_sleep_until(pacer["present"] - work - pacer["margin"], probe)
+    pacer["wake"] = time.perf_counter()
+    frame_dt = pacer["present"] - pacer["last_present"]
+    pacer["last_present"] = pacer["present"]
+    return frame_dt
+
+
+def pacer_presented(pacer: Pacer, ready: float, done: float) -> None:
+    """记录一帧在 ready 时刻开始提交、done 时刻提交完成，并排定下一次呈现时刻。"""
+    work = ready - pacer["wake"]
+    pacer["work"][pacer["work_count"] % WORK_WINDOW] = work
+    pacer["work_count"] += 1
+    pacer["work_ms"] = work * 1000.0
+    if done - ready > pacer["margin"] / 2 or done > pacer["present"]:
+        # 提交阻塞了（垂直同步）或晚于计划（掉帧）：完成时刻就是实际呈现时刻，以它为准重新对齐
+        pacer["present"] = done + pacer["period"]
+    else:
+        pacer["present"] += pacer["period"]
+
+
+# ============ 探针 ============
+def probe_create() -> Probe:
+    """创建按键延迟探针。"""
+    return {
+        "seen": None,  # 本帧等待期间第一次在队列里看到 KEYDOWN 的时刻
+        "seen_blind": 0.0,  # 看到它之前有多久没查看过队列
+        "polled": time.perf_counter(),  # 上一次确认队列里没有 KEYDOWN 的时刻
+        "pending": [],  # [方向位, 按键时刻, 被读到的时刻或 None, 按键时刻的不确定量]
+        "to_sample": np.zeros(PROBE_SAMPLES, dtype=np.float64),
+        "to_present": np.zeros(PROBE_SAMPLES, dtype=np.float64),
+        "to_present_max": np.zeros(PROBE_SAMPLES, dtype=np.float64),
+        "count": 0,
+        "expired": 0,
+    }
+
+
+def probe_note_key(probe: Probe, key: int, now: float) -> None:
+    """记录一个 KEYDOWN；只统计方向键。"""
+    bit = KEY_BITS.get(key)
+    if bit is None:
+        return
+    if probe["seen"] is not None:
+        probe["pending"].append([bit, probe["seen"], None, probe["seen_blind"]])
+    else:
+        probe["pending"].append([bit, now, None, now - probe["polled"]])
+
+
+def probe_end_events(probe: Probe) -> None:
+    """本帧事件处理完毕（队列已取空），清除等待期间的队列标记。"""
+    probe["seen"] = None
+    probe["polled"] = time.perf_counter()
+
+
+def probe_note_sample(probe: Probe, move: tuple[int, int], now: float) -> None:
+    """模拟步读取了方向 move：包含对应方向的待测按键记为已读到。"""
+    bits = move_to_bits(move)
+    for entry in probe["pending"]:
+        if entry[2] is None and bits & entry[0]:
+            entry[2] = now
+
+
+def probe_note_present(probe: Probe, now: float) -> None:
+    """一帧提交完成：已被读到的按键记一条样本，过期的丢弃。"""
+    keep = []
+    for entry in probe["pending"]:
+        bit, stamp, sampled, blind = entry
+        if sampled is not None:
+            slot = probe["count"] % PROBE_SAMPLES
+            probe["to_sample"][slot] = (sampled - stamp) * 1000.0
+            probe["to_present"][slot] = (now - stamp) * 1000.0
+            probe["to_present_max"][slot] = (now - stamp + blind) * 1000.0
+            probe["count"] += 1
+        elif now - stamp > PENDING_TIMEOUT:
+            probe["expired"] += 1
+        else:
+            keep.append(entry)
+    probe["pending"] = keep
+
+
+def probe_summary(probe: Probe) -> dict[str, Any]:
+    """返回按键到读取、按键到呈现（及其上界）的耗时统计（毫秒）。"""
+    n = min(probe["count"], PROBE_SAMPLES)
+    summary: dict[str, Any] = {"samples": n, "expired": probe["expired"]}
+    for name in ("to_sample", "to_present", "to_present_max"):
+        values = probe[name][:n]
+        if n == 0:
+            continue
+        summary[name] = {
+            "mean": float(values.mean()),
+            "p50": float(np.percentile(values, 50)),
+            "p95": float(np.percentile(values, 95)),
+            "max": float(values.max()),
+        }
+    return summary
+
+
+def probe_report(probe: Probe) -> str:
+    """生成一行可读的统计文本。"""
+    summary = probe_summary(probe)
+    parts = [f"input latency: {summary['samples']} keys ({summary['expired']} unobserved)"]
+    labels = (("to_sample", "key->sample"), ("to_present", "key->present"), ("to_present_max", "upper bound"))
+    for name, label in labels:
+        if name in summary:
+            s = summary[name]
+            parts.append(
+                f"{label} mean {s['mean']:.1f} / p50 {s['p50']:.1f} / p95 {s['p95']:.1f} / max {s['max']:.1f} ms"
+            )
+    return "; ".join(parts)
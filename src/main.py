@@ -4,67 +4,185 @@
 
 import math
 import random
-from typing import Any
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable
 
+import numpy as np
 import pygame
 
 import config as cfg
+from asset_cache import cache_prune, load_background_pixels, load_sound_samples
+from ball_store import (
+    BallStore,
+    ball_store_clear,
+    ball_store_copy,
+    ball_store_create,
+    ball_store_spawn,
+    ball_store_sweep,
+    ball_store_truncate,
+    ball_store_update,
+)
+from checkpoint import AutoSave, autosave_create, autosave_discard, autosave_tick, checkpoint_load, checkpoint_restore
+from collision import circles_rect_first_hit
+from frame_profiler import (
+    PHASE_BACKGROUND,
+    PHASE_BALLS,
+    PHASE_COLLISION,
+    PHASE_ENTITIES,
+    PHASE_EVENTS,
+    PHASE_FLIP,
+    PHASE_HUD,
+    PHASE_LEVEL_TICK,
+    PHASE_PLAYER,
+    prof_begin_frame,
+    prof_create,
+    prof_draw_overlay,
+    prof_dump,
+    prof_end_frame,
+    prof_mark,
+    prof_toggle_overlay,
+)
+from input_latency import (
+    pacer_create,
+    pacer_presented,
+    pacer_wait,
+    probe_create,
+    probe_end_events,
+    probe_note_key,
+    probe_note_present,
+    probe_note_sample,
+    probe_report,
+)
+from quality import governor_create, governor_settings, governor_update
+from replay import rec_create, rec_note_key, rec_save, rec_tick
+from scaled_assets import asset_store_create, asset_store_get, asset_store_put
+from sfx_synth import synth_sounds
+from spatial_grid import Grid, balls_resolve_collisions, grid_create, grid_query_rect, grid_rebuild
+from sprites import ball_sprite
+from telemetry import telemetry_close, telemetry_create, telemetry_publish
 
-Ball = dict[str, Any]
-Balls = list[Ball]
 Player = dict[str, Any]
 HUD = dict[str, Any]
 Game = dict[str, Any]
 Level = dict[str, Any]
+SimClock = dict[str, Any]
+InputSource = Callable[[Game], tuple[int, int]]
 
 background: pygame.Surface | None = None
-sounds: dict[str, pygame.mixer.Sound] = {}
+# 各尺寸的背景图（按比例渲染时窗口尺寸会变），background 是当前画布尺寸对应的那一张
+background_store = asset_store_create(cfg.SCALED_ASSET_CACHE)
+# 每个事件对应一组可轮换播放的变体（从文件加载时只有一个）
+sounds: dict[str, list[pygame.mixer.Sound]] = {}
+sound_cursor: dict[str, int] = {}
+# 后台线程解码好、等待主线程转换为显示格式的背景像素
+pending_background: np.ndarray | None = None
 
 
 # ============ 资源加载 ============
 
 
+def background_surface(pixels: np.ndarray) -> pygame.Surface:
+    """把 (h, w, 3) 的 RGB 像素转换为显示格式的 Surface（需在主线程调用）。"""
+    height, width, _ = pixels.shape
+    return pygame.image.frombuffer(pixels, (width, height), "RGB").convert()
+
+
 def load_graphics() -> None:
-    """加载背景图片，失败时保持为 None。"""
+    """加载背景图片（优先读磁盘缓存），失败时保持为 None。"""
     global background
-    background = None
-    path = cfg.IMAGE_BACKGROUND
-    if not path.is_file():
-        return
+    pixels = load_background_pixels(cfg.IMAGE_BACKGROUND, (cfg.WIDTH, cfg.HEIGHT))
+    background = background_surface(pixels) if pixels is not None else None
+
+
+def background_use(size: tuple[int, int]) -> None:
+    """切换到 size 尺寸的背景图：先查内存缓存，再查磁盘缓存，最后才重新解码缩放。"""
+    global background
+
+    def build() -> pygame.Surface | None:
+        pixels = load_background_pixels(cfg.IMAGE_BACKGROUND, size)
+        return background_surface(pixels) if pixels is not None else None
+
+    background = asset_store_get(background_store, size, build)
+
+
+def audio_init() -> bool:
+    """在主线程初始化混音器，失败时返回 False（游戏照常运行，只是没有声音）。"""
     try:
-        image = pygame.image.load(str(path)).convert()
-        background = pygame.transform.smoothscale(image, (cfg.WIDTH, cfg.HEIGHT))
+        pygame.mixer.init()
     except pygame.error:
-        background = None
+        return False
+    return True
 
 
 def load_audio() -> None:
-    """初始化混音器并加载音效资源。"""
+    """按已初始化的混音器格式加载音效：运行时合成，或从文件读取（优先读磁盘缓存）。"""
     global sounds
-    sounds = {}
+    if pygame.mixer.get_init() is None:
+        sounds = {}
+        return
 
-    try:
-        pygame.mixer.init()
-    except pygame.error:
+    if cfg.SFX_SYNTHESIZE:
+        sounds = synth_sounds(cfg.SFX_VARIANTS)
         return
 
+    loaded = {}
     for name, sound_path in cfg.SOUND_FILES.items():
-        if not sound_path.is_file():
+        samples = load_sound_samples(sound_path)
+        if samples is None:
             continue
         try:
-            sound = pygame.mixer.Sound(str(sound_path))
+            sound = pygame.mixer.Sound(buffer=samples)
             sound.set_volume(cfg.SFX_VOLUME)
         except pygame.error:
             continue
-        sounds[name] = sound
+        loaded[name] = [sound]
+    # 整体替换：加载途中 play_sound 看到的始终是一个完整的字典
+    sounds = loaded
+
+
+def assets_load_start(size: tuple[int, int] = (cfg.WIDTH, cfg.HEIGHT)) -> threading.Thread:
+    """在后台线程解码 size 尺寸的背景像素并加载音效，主循环无需等待即可绘制首帧。
+
+    混音器在调用线程（主线程）上初始化，后台线程只读取和解码文件，最后清理过期的磁盘缓存。
+    """
+    audio_init()
+
+    def work() -> None:
+        global pending_background
+        pending_background = load_background_pixels(cfg.IMAGE_BACKGROUND, size)
+        load_audio()
+        if cfg.ASSET_CACHE_ENABLED:
+            cache_prune([cfg.IMAGE_BACKGROUND, *cfg.SOUND_FILES.values()])
+
+    thread = threading.Thread(target=work, name="asset-loader", daemon=True)
+    thread.start()
+    return thread
+
+
+def assets_load_poll() -> bool:
+    """若后台已解码好背景则在主线程安装，返回本次是否更换了背景。"""
+    global background, pending_background
+    pixels = pending_background
+    if pixels is None:
+        return False
+    pending_background = None
+    background = background_surface(pixels)
+    height, width, _ = pixels.shape
+    asset_store_put(background_store, (width, height), background)
+    return True
 
 
 def play_sound(game: Game, name: str) -> None:
-    """在未静音时播放指定事件的音效。"""
-    sound = sounds.get(name)
-    if not sound or game.get("audio_muted", False):
+    """在未静音时播放指定事件的音效；资源尚未加载完成时静默跳过。"""
+    variants = sounds.get(name)
+    if not variants or game.get("audio_muted", False):
         return
-    sound.play()
+    # 轮换变体，连续受击时音高与音量略有不同
+    index = sound_cursor.get(name, 0)
+    sound_cursor[name] = index + 1
+    variants[index % len(variants)].play()
 
 
 def toggle_mute(game: Game) -> None:
@@ -82,67 +200,60 @@ def clamp(value: float, lower: float, upper: float) -> float:
     return value
 
 
-def ball_create() -> Ball:
-    """生成一个随机属性的弹球字典。"""
-    radius = random.randint(cfg.R_MIN, cfg.R_MAX)
-    x = random.uniform(radius, cfg.WIDTH - radius)
-    y = random.uniform(radius, cfg.HEIGHT - radius)
-    angle = random.uniform(0, 2 * math.pi)
-    speed = random.uniform(cfg.SPEED_MIN, cfg.SPEED_MAX)
-    vx = math.cos(angle) * speed
-    vy = math.sin(angle) * speed
-    color = random.choice(cfg.BALL_COLORS)
-    return {
-        "x": x,
-        "y": y,
-        "vx": vx,
-        "vy": vy,
-        "r": radius,
-        "color": color,
-    }
+def balls_count(balls: BallStore | None) -> int:
+    """返回弹球存储中的有效数量。"""
+    return balls["count"] if balls else 0
+
 
+def balls_update_all(balls: BallStore) -> None:
+    """以向量化方式更新存储中所有弹球。"""
+    ball_store_update(balls)
 
-def balls_create_many(count: int) -> Balls:
-    """批量创建指定数量的弹球。"""
-    return [ball_create() for _ in range(count)]
 
+def balls_grid_update(game: Game) -> Grid | None:
+    """按配置重建空间网格并处理弹球互撞；不需要网格时返回 None。"""
+    balls = game["balls"]
+    if not cfg.BALL_COLLISIONS and balls["count"] < cfg.GRID_MIN_BALLS:
+        return None
+    grid = game["grid"]
+    grid_rebuild(grid, balls)
+    if cfg.BALL_COLLISIONS:
+        balls_resolve_collisions(grid, balls)
+    return grid
 
-def ball_update(ball: Ball) -> None:
-    """推进单个弹球位置并处理边界反弹。"""
-    ball["x"] += ball["vx"]
-    ball["y"] += ball["vy"]
 
-    radius = ball["r"]
-    if ball["x"] <= radius:
-        ball["x"] = radius
-        ball["vx"] = -ball["vx"]
-    elif ball["x"] >= cfg.WIDTH - radius:
-        ball["x"] = cfg.WIDTH - radius
-        ball["vx"] = -ball["vx"]
+def render_scale(screen: pygame.Surface) -> float:
+    """画布相对逻辑分辨率的缩放比例（直接画到 WIDTH x HEIGHT 的窗口时为 1）。"""
+    return screen.get_width() / cfg.WIDTH
 
-    if ball["y"] <= radius:
-        ball["y"] = radius
-        ball["vy"] = -ball["vy"]
-    elif ball["y"] >= cfg.HEIGHT - radius:
-        ball["y"] = cfg.HEIGHT - radius
-        ball["vy"] = -ball["vy"]
 
+def balls_screen_boxes(balls: BallStore, pick: Any, scale: float = 1.0) -> tuple[np.ndarray, list[int], list[int]]:
+    """返回弹球在画布上的像素半径与左上角坐标；绘制与脏矩形共用，保证两者一致。"""
+    radius = balls["r"][pick].astype(int)
+    x = balls["x"][pick]
+    y = balls["y"][pick]
+    if scale != 1.0:
+        radius = np.maximum(np.rint(radius * scale), 1).astype(int)
+        x = x * scale
+        y = y * scale
+    return radius, (x.astype(int) - radius).tolist(), (y.astype(int) - radius).tolist()
 
-def balls_update_all(balls: Balls) -> None:
-    """更新列表中所有弹球。"""
-    for ball in balls:
-        ball_update(ball)
 
+def balls_draw_all(
+    balls: BallStore, screen: pygame.Surface, subset: np.ndarray | None = None, shaded: bool = True
+) -> None:
+    """用缓存的精灵一次性批量绘制所有弹球；subset 给定时只画这些下标，shaded=False 时用纯色圆。"""
+    n = balls["count"]
+    pick = slice(0, n) if subset is None else subset
+    radius, lefts, tops = balls_screen_boxes(balls, pick, render_scale(screen))
 
-def balls_draw_all(balls: Balls, screen: pygame.Surface) -> None:
-    """在屏幕上绘制所有弹球。"""
-    for ball in balls:
-        pygame.draw.circle(
-            screen,
-            ball["color"],
-            (int(ball["x"]), int(ball["y"])),
-            int(ball["r"]),
-        )
+    # 同一 (半径, 颜色) 组合共用一张精灵，先把本帧用到的组合取出来
+    keys = (radius * len(cfg.BALL_COLORS) + balls["color"][pick]).tolist()
+    table = {}
+    for key in set(keys):
+        table[key] = ball_sprite(*divmod(key, len(cfg.BALL_COLORS)), shaded)
+    sprites = [table[key] for key in keys]
+    screen.blits(list(zip(sprites, zip(lefts, tops))), doreturn=False)
 
 
 # ============ 难度与关卡 ============
@@ -167,13 +278,21 @@ def level_desired_ball_count(level: Level) -> int:
     return min(base + increment, cfg.LEVEL_MAX_BALLS)
 
 
+def balls_spawn(game: Game, count: int) -> None:
+    """批量生成 count 个弹球；设置了 SPAWN_CLEARANCE 时避开玩家周围。"""
+    player = game["player"]
+    avoid = (player["x"], player["y"]) if player is not None else None
+    ball_store_spawn(game["balls"], count, game["rng"], avoid, cfg.SPAWN_CLEARANCE)
+
+
 def level_apply_progression(game: Game) -> None:
-    """根据关卡进度补足弹球数量。"""
+    """根据关卡进度补足或移除弹球，使数量与关卡目标一致。"""
     target = level_desired_ball_count(game["level"])
-    current = len(game["balls"])
-    to_add = target - current
-    if to_add > 0:
-        game["balls"].extend(balls_create_many(to_add))
+    current = balls_count(game["balls"])
+    if target > current:
+        balls_spawn(game, target - current)
+    elif target < current:
+        ball_store_truncate(game["balls"], target)
 
 
 def level_tick(game: Game, dt: float) -> bool:
@@ -190,8 +309,18 @@ def level_tick(game: Game, dt: float) -> bool:
 
 
 # ============ HUD ============
+# HUD 采用"保留模式"：每个面板（图层）记住上次的输入值与绘好的 Surface，
+# 只有输入变化时才重新渲染文字和面板，其余帧直接 blit 缓存结果。
+HUD_LAYER_NAMES = ("hp", "scores", "level", "banner", "sound")
+BANNER_TEXTS = {
+    "ready": ("READY", "Space/Enter Start · M Mute"),
+    "paused": ("PAUSED", "P Pause · M Mute"),
+    "gameover": ("GAME OVER", "Space/Enter Restart"),
+}
+
+
 def hud_create(font_name: str | None = None) -> HUD:
-    """初始化 HUD 状态字典与字体资源。"""
+    """初始化 HUD 状态字典、字体资源与图层缓存。"""
     return {
         "font_small": pygame.font.SysFont(font_name, 24),
         "font_normal": pygame.font.SysFont(font_name, 22),
@@ -205,6 +334,8 @@ def hud_create(font_name: str | None = None) -> HUD:
         "ball_count": 0,
         "muted": False,
         "level_flash_timer": 0.0,
+        "text_cache": OrderedDict(),
+        "layers": {},
     }
 
 
@@ -215,106 +346,215 @@ def hud_refresh(hud: HUD, game: Game) -> None:
     hud["score"] = int(game.get("score", 0))
     hud["high_score"] = game.get("high_score", 0)
     hud["level"] = game.get("level")
-    hud["ball_count"] = len(game.get("balls") or [])
+    hud["ball_count"] = balls_count(game.get("balls"))
     hud["muted"] = game.get("audio_muted", False)
     hud["level_flash_timer"] = game.get("level_flash_timer", 0.0)
-
-
-def hud_draw_panel(screen: pygame.Surface, x: int, y: int, w: int, h: int) -> None:
-    """绘制带透明背景的 HUD 面板。"""
-    panel = pygame.Surface((w, h), pygame.SRCALPHA)
+    hud["refreshed_at"] = pygame.time.get_ticks()
+
+
+def hud_refresh_throttled(hud: HUD, game: Game, interval_ms: int) -> None:
+    """距上次同步不足 interval_ms 时跳过；游戏状态切换时总是立即同步。"""
+    if (
+        interval_ms <= 0
+        or hud.get("state") != game.get("state")
+        or pygame.time.get_ticks() - hud.get("refreshed_at", 0) >= interval_ms
+    ):
+        hud_refresh(hud, game)
+
+
+def hud_text(hud: HUD, font_key: str, text: str, color: tuple[int, int, int]) -> pygame.Surface:
+    """渲染文字并放入 LRU 缓存，超过 HUD_TEXT_CACHE_SIZE 时淘汰最久未用的。"""
+    cache = hud["text_cache"]
+    key = (font_key, text, color)
+    surf = cache.get(key)
+    if surf is not None:
+        cache.move_to_end(key)
+        return surf
+    surf = hud[font_key].render(text, True, color)
+    cache[key] = surf
+    if len(cache) > cfg.HUD_TEXT_CACHE_SIZE:
+        cache.popitem(last=False)
+    return surf
+
+
+def hud_panel_surface(layer: dict[str, Any] | None, w: int, h: int) -> pygame.Surface:
+    """取得带透明背景的面板 Surface；尺寸不变时复用上一次的。"""
+    panel = layer["surface"] if layer else None
+    if panel is None or panel.get_size() != (w, h):
+        panel = pygame.Surface((w, h), pygame.SRCALPHA)
     panel.fill((0, 0, 0, cfg.HUD_PANEL_ALPHA))
-    screen.blit(panel, (x, y))
+    return panel
 
 
-def hud_draw_hp(hud: HUD, screen: pygame.Surface) -> None:
-    """绘制玩家生命值文字与血条。"""
+def hud_key_hp(hud: HUD) -> tuple | None:
+    """生命值面板的输入值。"""
     player = hud["player"]
     if player is None:
-        return
+        return None
+    return (player["hp"], player["hp_max"])
+
 
+def hud_build_hp(hud: HUD, layer: dict[str, Any] | None) -> list:
+    """绘制玩家生命值文字与血条面板。"""
+    player = hud["player"]
     pad = hud["padding"]
-    font = hud["font_normal"]
-    text = font.render(f"HP: {player['hp']}/{player['hp_max']}", True, cfg.WHITE)
-    hud_draw_panel(screen, pad, pad, 240, 60)
-    screen.blit(text, (pad + 10, pad + 6))
+    text = hud_text(hud, "font_normal", f"HP: {player['hp']}/{player['hp_max']}", cfg.WHITE)
+    panel = hud_panel_surface(layer, 240, 60)
+    panel.blit(text, (10, 6))
 
-    bar_x = pad + 10
-    bar_y = pad + 30
+    bar_x = 10
+    bar_y = 30
     bar_w = 220
     bar_h = 16
-    pygame.draw.rect(screen, cfg.RED, (bar_x, bar_y, bar_w, bar_h))
+    pygame.draw.rect(panel, cfg.RED, (bar_x, bar_y, bar_w, bar_h))
     if player["hp"] > 0:
         ratio = player["hp"] / player["hp_max"]
-        pygame.draw.rect(screen, cfg.GREEN, (bar_x, bar_y, int(bar_w * ratio), bar_h))
-    pygame.draw.rect(screen, cfg.WHITE, (bar_x, bar_y, bar_w, bar_h), 2)
+        pygame.draw.rect(panel, cfg.GREEN, (bar_x, bar_y, int(bar_w * ratio), bar_h))
+    pygame.draw.rect(panel, cfg.WHITE, (bar_x, bar_y, bar_w, bar_h), 2)
+    return [(panel, (pad, pad))]
+
 
+def hud_key_scores(hud: HUD) -> tuple | None:
+    """分数面板的输入值。"""
+    return (hud["score"], hud["high_score"])
 
-def hud_draw_scores(hud: HUD, screen: pygame.Surface) -> None:
-    """绘制当前分数与最高分信息。"""
+
+def hud_build_scores(hud: HUD, layer: dict[str, Any] | None) -> list:
+    """绘制当前分数与最高分面板。"""
     pad = hud["padding"]
-    font = hud["font_normal"]
-    score_text = font.render(f"Score: {hud['score']}", True, cfg.WHITE)
-    best_text = font.render(f"High: {hud['high_score']}", True, cfg.WHITE)
+    score_text = hud_text(hud, "font_normal", f"Score: {hud['score']}", cfg.WHITE)
+    best_text = hud_text(hud, "font_normal", f"High: {hud['high_score']}", cfg.WHITE)
     width = max(score_text.get_width(), best_text.get_width()) + 20
     height = score_text.get_height() + best_text.get_height() + 22
-    x = cfg.WIDTH - width - pad
-    y = pad
-    hud_draw_panel(screen, x, y, width, height)
-    screen.blit(score_text, (x + 10, y + 6))
-    screen.blit(best_text, (x + 10, y + 14 + score_text.get_height()))
+    panel = hud_panel_surface(layer, width, height)
+    panel.blit(score_text, (10, 6))
+    panel.blit(best_text, (10, 14 + score_text.get_height()))
+    return [(panel, (cfg.WIDTH - width - pad, pad))]
 
 
-def hud_draw_level(hud: HUD, screen: pygame.Surface) -> None:
-    """绘制关卡等级与弹球数量提示。"""
+def hud_key_level(hud: HUD) -> tuple | None:
+    """关卡提示的输入值。"""
     level = hud["level"]
     if not level:
-        return
-    font = hud["font_normal"]
+        return None
+    return (level.get("index", 0), hud["ball_count"], hud["level_flash_timer"] > 0)
+
+
+def hud_build_level(hud: HUD, layer: dict[str, Any] | None) -> list:
+    """绘制关卡等级与弹球数量提示。"""
     color = cfg.LEVEL_FLASH_COLOR if hud["level_flash_timer"] > 0 else cfg.WHITE
-    level_no = level.get("index", 0) + 1
-    text = font.render(f"Level: {level_no}", True, color)
-    balls_text = font.render(f"Balls: {hud['ball_count']}", True, color)
-    screen.blit(text, text.get_rect(center=(cfg.WIDTH // 2, 24)))
-    screen.blit(balls_text, balls_text.get_rect(center=(cfg.WIDTH // 2, 48)))
+    level_no = hud["level"].get("index", 0) + 1
+    text = hud_text(hud, "font_normal", f"Level: {level_no}", color)
+    balls_text = hud_text(hud, "font_normal", f"Balls: {hud['ball_count']}", color)
+    return [
+        (text, text.get_rect(center=(cfg.WIDTH // 2, 24)).topleft),
+        (balls_text, balls_text.get_rect(center=(cfg.WIDTH // 2, 48)).topleft),
+    ]
+
+
+def hud_key_banner(hud: HUD) -> tuple | None:
+    """非 Playing 状态横幅的输入值。"""
+    if hud["state"] not in BANNER_TEXTS:
+        return None
+    return (hud["state"],)
 
 
-def hud_draw_banner(hud: HUD, screen: pygame.Surface) -> None:
+def hud_build_banner(hud: HUD, layer: dict[str, Any] | None) -> list:
     """在非 Playing 状态显示提示横幅。"""
-    mapping = {
-        "ready": ("READY", "Space/Enter Start · M Mute"),
-        "paused": ("PAUSED", "P Pause · M Mute"),
-        "gameover": ("GAME OVER", "Space/Enter Restart"),
-    }
-    title, tip = mapping.get(hud["state"], (None, None))
-    if title is None:
-        return
-    big = hud["font_big"]
-    small = hud["font_small"]
-    title_surf = big.render(title, True, cfg.WHITE)
-    tip_surf = small.render(tip, True, cfg.WHITE)
+    title, tip = BANNER_TEXTS[hud["state"]]
+    title_surf = hud_text(hud, "font_big", title, cfg.WHITE)
+    tip_surf = hud_text(hud, "font_small", tip, cfg.WHITE)
     center = (cfg.WIDTH // 2, cfg.HEIGHT // 2)
-    screen.blit(title_surf, title_surf.get_rect(center=center))
-    screen.blit(tip_surf, tip_surf.get_rect(center=(center[0], center[1] + 48)))
+    return [
+        (title_surf, title_surf.get_rect(center=center).topleft),
+        (tip_surf, tip_surf.get_rect(center=(center[0], center[1] + 48)).topleft),
+    ]
+
+
+def hud_key_sound(hud: HUD) -> tuple | None:
+    """声音开关提示的输入值。"""
+    return (hud["muted"],)
 
 
-def hud_draw_sound_state(hud: HUD, screen: pygame.Surface) -> None:
-    """绘制当前声音开关提示。"""
+def hud_build_sound(hud: HUD, layer: dict[str, Any] | None) -> list:
+    """绘制当前声音开关提示面板。"""
     pad = hud["padding"]
-    font = hud["font_small"]
     text = "Sound: OFF" if hud["muted"] else "Sound: ON"
-    surf = font.render(text, True, cfg.WHITE)
-    hud_draw_panel(screen, pad, cfg.HEIGHT - surf.get_height() - pad - 8, surf.get_width() + 16, surf.get_height() + 12)
-    screen.blit(surf, (pad + 8, cfg.HEIGHT - surf.get_height() - pad))
+    surf = hud_text(hud, "font_small", text, cfg.WHITE)
+    panel = hud_panel_surface(layer, surf.get_width() + 16, surf.get_height() + 12)
+    panel.blit(surf, (8, 8))
+    return [(panel, (pad, cfg.HEIGHT - surf.get_height() - pad - 8))]
+
+
+HUD_LAYERS = {
+    "hp": (hud_key_hp, hud_build_hp),
+    "scores": (hud_key_scores, hud_build_scores),
+    "level": (hud_key_level, hud_build_level),
+    "banner": (hud_key_banner, hud_build_banner),
+    "sound": (hud_key_sound, hud_build_sound),
+}
+
+
+def hud_blits_rect(blits: list) -> pygame.Rect:
+    """一组 (Surface, 位置) 覆盖的外接矩形。"""
+    rect = blits[0][0].get_rect(topleft=blits[0][1])
+    for surf, pos in blits[1:]:
+        rect.union_ip(surf.get_rect(topleft=pos))
+    return rect
+
+
+def hud_layer_scaled(layer: dict[str, Any], scale: float) -> dict[str, Any]:
+    """按画布比例缩放图层；图层仍按逻辑分辨率构建，缩放结果随图层缓存到下次重建。"""
+    blits = layer["base"]
+    if scale != 1.0:
+        blits = [
+            (
+                pygame.transform.smoothscale(
+                    surf, (max(1, round(surf.get_width() * scale)), max(1, round(surf.get_height() * scale)))
+                ),
+                (round(pos[0] * scale), round(pos[1] * scale)),
+            )
+            for surf, pos in blits
+        ]
+    return {**layer, "blits": blits, "rect": hud_blits_rect(blits), "scale": scale}
+
+
+def hud_layer_update(hud: HUD, name: str, scale: float = 1.0) -> dict[str, Any] | None:
+    """输入值变化时重建指定图层，返回图层字典（隐藏时返回 None）；scale 为画布缩放比例。"""
+    key_func, build_func = HUD_LAYERS[name]
+    key = key_func(hud)
+    layers = hud["layers"]
+    layer = layers.get(name)
+    if key is None:
+        if layer is not None:
+            layer["visible"] = False
+        return None
+    if layer is None or layer["key"] != key or not layer["visible"]:
+        blits = build_func(hud, layer)
+        layer = {
+            "key": key,
+            "visible": True,
+            "blits": blits,
+            "base": blits,
+            "surface": blits[0][0],
+            "rect": hud_blits_rect(blits),
+            "scale": 1.0,
+        }
+        layers[name] = layer
+    if layer["scale"] != scale:
+        layer = layers[name] = hud_layer_scaled(layer, scale)
+    return layer
 
 
 def hud_draw(hud: HUD, screen: pygame.Surface) -> None:
-    """汇总调用各 HUD 绘制函数。"""
-    hud_draw_hp(hud, screen)
-    hud_draw_scores(hud, screen)
-    hud_draw_level(hud, screen)
-    hud_draw_banner(hud, screen)
-    hud_draw_sound_state(hud, screen)
+    """更新各 HUD 图层后一次性绘制。"""
+    blits = []
+    scale = render_scale(screen)
+    for name in HUD_LAYER_NAMES:
+        layer = hud_layer_update(hud, name, scale)
+        if layer is not None:
+            blits.extend(layer["blits"])
+    screen.blits(blits, doreturn=False)
 
 
 # ============ 玩家相关 ============
@@ -349,11 +589,23 @@ def player_handle_move_input() -> tuple[int, int]:
     return dx, dy
 
 
-def player_update(player: Player) -> None:
-    """根据输入更新玩家位置与无敌计时。"""
-    dx, dy = player_handle_move_input()
+def input_keyboard(game: Game) -> tuple[int, int]:
+    """默认输入源：读取实时键盘状态。"""
+    return player_handle_move_input()
+
+
+def input_probed(game: Game) -> tuple[int, int]:
+    """读取键盘并告知延迟探针本步读到的方向（cfg.LATENCY_PROBE）。"""
+    move = player_handle_move_input()
+    probe_note_sample(game["latency_probe"], move, time.perf_counter())
+    return move
+
+
+def player_update(player: Player, move: tuple[int, int], ticks: float = 1) -> None:
+    """根据移动向量 move 更新玩家位置与无敌计时；ticks 为本步覆盖的基准刻度数。"""
+    dx, dy = move
     norm = math.sqrt(2) if dx and dy else 1
-    speed = player["speed"] * (cfg.INVINCIBLE_SPEED_MULT if player["hurt_cd"] > 0 else 1)
+    speed = player["speed"] * ticks * (cfg.INVINCIBLE_SPEED_MULT if player["hurt_cd"] > 0 else 1)
     player["x"] += (speed * dx) / norm
     player["y"] += (speed * dy) / norm
 
@@ -363,83 +615,155 @@ def player_update(player: Player) -> None:
     player["y"] = clamp(player["y"], half_h, cfg.HEIGHT - half_h)
 
     if player["hurt_cd"] > 0:
-        player["hurt_cd"] -= 1
+        player["hurt_cd"] = max(0, player["hurt_cd"] - ticks)
 
 
-def player_draw(player: Player, screen: pygame.Surface) -> None:
-    """使用矩形绘制玩家角色。"""
+def player_screen_rect(player: Player, scale: float = 1.0) -> pygame.Rect:
+    """玩家在画布上占据的矩形。"""
     half_w = player["w"] / 2
     half_h = player["h"] / 2
-    rect = pygame.Rect(
-        int(player["x"] - half_w),
-        int(player["y"] - half_h),
-        int(player["w"]),
-        int(player["h"]),
+    return pygame.Rect(
+        int((player["x"] - half_w) * scale),
+        int((player["y"] - half_h) * scale),
+        round(player["w"] * scale),
+        round(player["h"] * scale),
     )
-    color = cfg.PLAYER_HURT_COLOR if player["hurt_cd"] > 0 else cfg.PLAYER_COLOR
-    pygame.draw.rect(screen, color, rect, border_radius=6)
 
 
-def circle_rect_collide(ball: Ball, player: Player) -> bool:
-    """检测弹球与玩家矩形是否发生碰撞。"""
-    cx, cy, radius = ball["x"], ball["y"], ball["r"]
+def player_draw(player: Player, screen: pygame.Surface, color: tuple[int, int, int] | None = None) -> None:
+    """使用矩形绘制玩家角色；color 为未受伤时的颜色（默认 PLAYER_COLOR）。"""
+    scale = render_scale(screen)
+    if player["hurt_cd"] > 0:
+        color = cfg.PLAYER_HURT_COLOR
+    elif color is None:
+        color = cfg.PLAYER_COLOR
+    pygame.draw.rect(screen, color, player_screen_rect(player, scale), border_radius=max(1, round(6 * scale)))
+
+
+def player_rect(player: Player) -> tuple[float, float, float, float]:
+    """返回玩家矩形的 (left, top, right, bottom)。"""
     half_w = player["w"] / 2
     half_h = player["h"] / 2
-    left = player["x"] - half_w
-    right = player["x"] + half_w
-    top = player["y"] - half_h
-    bottom = player["y"] + half_h
-    nearest_x = clamp(cx, left, right)
-    nearest_y = clamp(cy, top, bottom)
-    dx = cx - nearest_x
-    dy = cy - nearest_y
-    return dx * dx + dy * dy <= radius * radius
-
-
-def player_take_damage_if_hit(player: Player, balls: Balls) -> bool:
-    """若检测到碰撞则为玩家扣血并设置冷却。"""
+    return (
+        player["x"] - half_w,
+        player["y"] - half_h,
+        player["x"] + half_w,
+        player["y"] + half_h,
+    )
+
+
+def player_take_damage_if_hit(player: Player, balls: BallStore, grid: Grid | None = None) -> bool:
+    """若检测到碰撞则为玩家扣血并设置冷却；提供网格时只测试附近格子的弹球。"""
     if player["hurt_cd"] > 0 or player["hp"] <= 0:
         return False
-    for ball in balls:
-        if circle_rect_collide(ball, player):
-            player["hp"] = max(0, player["hp"] - cfg.DAMAGE_PER_HIT)
-            player["hurt_cd"] = cfg.HURT_COOLDOWN_FRAMES
-            return True
-    return False
+    n = balls["count"]
+    if n == 0:
+        return False
+    rect = player_rect(player)
+    if grid is None:
+        first_hit = circles_rect_first_hit(balls["x"][:n], balls["y"][:n], balls["r"][:n], rect)
+    else:
+        # 互撞推开会让弹球偏离重建时所在的格子，查询范围多留一个半径
+        near = grid_query_rect(grid, rect, 2 * cfg.R_MAX)
+        first_hit = circles_rect_first_hit(balls["x"][near], balls["y"][near], balls["r"][near], rect)
+    if first_hit < 0:
+        return False
+    player_apply_damage(player)
+    return True
+
+
+def player_apply_damage(player: Player) -> None:
+    """扣除一次伤害并进入无敌冷却。"""
+    player["hp"] = max(0, player["hp"] - cfg.DAMAGE_PER_HIT)
+    player["hurt_cd"] = cfg.HURT_COOLDOWN_FRAMES
+
+
+def step_is_single_tick(ticks: float) -> bool:
+    """本步是否恰好一个基准刻度（走逐刻离散碰撞；否则走扫掠）。
+
+    dt 来自浮点除法（如 1 / SIM_HZ），乘回刻度数时可能差一个末位，按容差比较。
+    """
+    return abs(ticks - 1.0) < 1e-9
+
+
+def player_sweep_damage(player: Player, balls: BallStore, ticks: float, move: tuple[int, int]) -> bool:
+    """大步长推进：移动玩家，并让弹球分段撞墙、与移动中的玩家做扫掠检测，返回是否受击。"""
+    rect = player_rect(player)
+    x0, y0 = player["x"], player["y"]
+    hurt_cd = player["hurt_cd"]
+    player_update(player, move, ticks)
+    # 无敌冷却在本步的 hurt_cd / ticks 处结束，此前的接触不算
+    since = hurt_cd / ticks if player["hp"] > 0 else math.inf
+    toi = ball_store_sweep(balls, ticks, rect, player["x"] - x0, player["y"] - y0, since)
+    if toi > 1.0:
+        return False
+    player_apply_damage(player)
+    return True
 
 
 # ============ 游戏逻辑 ============
-def game_create() -> Game:
-    """构建游戏主状态字典的初始值。"""
+def game_create(
+    input_source: InputSource | None = None,
+    with_hud: bool = True,
+    seed: int | None = None,
+) -> Game:
+    """构建游戏主状态字典的初始值。
+
+    input_source 决定玩家移动方向（默认读键盘）；with_hud=False 时不创建字体，
+    供无窗口模拟使用；seed 固定弹球生成用的随机数（None 时随机选取并记录）。
+    """
+    if seed is None:
+        seed = random.randrange(2**63)
     return {
+        "seed": seed,
+        "rng": np.random.default_rng(seed),
         "state": "ready",
         "score": 0.0,
         "high_score": 0,
-        "balls": [],
+        "balls": ball_store_create(cfg.LEVEL_MAX_BALLS),
+        "grid": grid_create(),
         "player": None,
-        "hud": hud_create(),
+        "hud": hud_create() if with_hud else None,
+        "input_source": input_source or input_keyboard,
         "level": level_create(),
         "audio_muted": False,
         "level_flash_timer": 0.0,
+        "quality": cfg.QUALITY_TIERS[0],
     }
 
 
 def game_start(game: Game) -> None:
     """开始一局游戏并重置相关状态。"""
     level_reset(game["level"])
-    game["balls"] = balls_create_many(level_desired_ball_count(game["level"]))
     game["player"] = player_create()
+    ball_store_clear(game["balls"])
+    balls_spawn(game, level_desired_ball_count(game["level"]))
     game["score"] = 0.0
     game["state"] = "playing"
     game["level_flash_timer"] = 0.0
     play_sound(game, "start")
 
 
+def game_resume(game: Game, data: Any) -> None:
+    """从存档恢复模拟状态；沿用已有 HUD 的字体与文字缓存，只重新同步展示数据。
+
+    进行中的对局恢复为暂停，按 P 继续。
+    """
+    checkpoint_restore(game, data)
+    if game["state"] == "playing":
+        game["state"] = "paused"
+    if game["hud"] is not None:
+        hud_refresh(game["hud"], game)
+
+
 def game_handle_keydown(game: Game, key: int) -> None:
     """处理影响游戏状态与静音的按键。"""
     if key == pygame.K_m:
         toggle_mute(game)
         return
+    if key == pygame.K_F3 and game.get("profiler") is not None:
+        prof_toggle_overlay(game["profiler"])
+        return
     if game["state"] in ("ready", "gameover") and key in (pygame.K_SPACE, pygame.K_RETURN):
         game_start(game)
         return
@@ -461,22 +785,51 @@ def game_handle_event(game: Game, event: pygame.event.Event) -> bool:
     return True
 
 
-def game_update(game: Game, dt: float) -> None:
-    """在 Playing 状态推进一帧游戏逻辑。"""
+def game_update(game: Game, dt: float) -> bool:
+    """在 Playing 状态推进一帧游戏逻辑，返回本步玩家是否受击。"""
     if game["state"] != "playing":
-        return
+        return False
 
+    prof = game.get("profiler")
     leveled = level_tick(game, dt)
     if leveled:
         game["level_flash_timer"] = 1.5
         play_sound(game, "levelup")
+    if prof:
+        prof_mark(prof, PHASE_LEVEL_TICK)
 
-    balls_update_all(game["balls"])
     player = game["player"]
-    if player is not None:
-        player_update(player)
-        if player_take_damage_if_hit(player, game["balls"]):
-            play_sound(game, "hit")
+    ticks = dt * cfg.MOTION_HZ
+    hit = False
+    if step_is_single_tick(ticks):
+        balls_update_all(game["balls"])
+        if prof:
+            prof_mark(prof, PHASE_BALLS)
+        grid = balls_grid_update(game)
+        if prof:
+            prof_mark(prof, PHASE_COLLISION)
+        if player is not None:
+            player_update(player, game["input_source"](game))
+            if prof:
+                prof_mark(prof, PHASE_PLAYER)
+            hit = player_take_damage_if_hit(player, game["balls"], grid)
+            if hit:
+                play_sound(game, "hit")
+            if prof:
+                prof_mark(prof, PHASE_COLLISION)
+    else:
+        # 一步覆盖多个基准刻度（或不足一个）：弹球按撞墙时刻分段移动，并与移动中的玩家做扫掠检测
+        if player is None:
+            ball_store_sweep(game["balls"], ticks)
+        else:
+            hit = player_sweep_damage(player, game["balls"], ticks, game["input_source"](game))
+            if hit:
+                play_sound(game, "hit")
+        if prof:
+            prof_mark(prof, PHASE_BALLS)
+        balls_grid_update(game)
+        if prof:
+            prof_mark(prof, PHASE_COLLISION)
 
     level = game["level"]
     score_rate = cfg.BASE_SCORE_PER_SEC + level["index"] * cfg.LEVEL_BONUS_PER_LEVEL
@@ -489,21 +842,193 @@ def game_update(game: Game, dt: float) -> None:
 
     if game["level_flash_timer"] > 0:
         game["level_flash_timer"] = max(0.0, game["level_flash_timer"] - dt)
+    return hit
+
+
+# ============ 固定步长 ============
+def sim_clock_create() -> SimClock:
+    """创建固定步长累加器。"""
+    return {"accumulator": 0.0, "dropped": 0.0}
+
+
+def sim_clock_advance(clock: SimClock, frame_dt: float, max_steps: int | None = None) -> int:
+    """累加一帧真实耗时，返回本帧需要执行的模拟步数。
+
+    超过 max_steps（默认 MAX_CATCHUP_STEPS）的积压时间直接丢弃（记入 dropped），
+    偶尔的慢帧只会让游戏短暂变慢，而不会越追越卡。
+    """
+    if max_steps is None:
+        max_steps = cfg.MAX_CATCHUP_STEPS
+    clock["accumulator"] += frame_dt
+    steps = int(clock["accumulator"] / cfg.SIM_DT)
+    if steps > max_steps:
+        clock["dropped"] += clock["accumulator"] - max_steps * cfg.SIM_DT
+        clock["accumulator"] = 0.0
+        return max_steps
+    clock["accumulator"] -= steps * cfg.SIM_DT
+    return steps
+
+
+# ============ 流水线模拟 ============
+# 模拟在后台线程按固定步长推进，每步把渲染需要的数据写入两块快照缓冲区中
+# 渲染线程没在读的那一块，再切换为最新快照；主线程只处理事件并渲染最新快照。
+# 快照里的 player / level 每次都是新字典，HUD 可以跨帧持有它们。
+Pipeline = dict[str, Any]
+Snapshot = dict[str, Any]
+
+# 渲染只需要的弹球字段
+SNAPSHOT_BALL_FIELDS = ("x", "y", "r", "color")
+
+
+def input_pipeline(game: Game) -> tuple[int, int]:
+    """流水线模式的输入源：读取主线程最近一次采样的移动向量。"""
+    return game["pipeline_move"]
+
+
+def snapshot_create() -> Snapshot:
+    """创建一块空的渲染快照缓冲区。"""
+    return {"balls": ball_store_create(cfg.LEVEL_MAX_BALLS)}
+
+
+def snapshot_write(snapshot: Snapshot, game: Game) -> None:
+    """把游戏状态中渲染用到的部分复制进快照。"""
+    ball_store_copy(snapshot["balls"], game["balls"], SNAPSHOT_BALL_FIELDS)
+    player = game["player"]
+    snapshot["player"] = dict(player) if player is not None else None
+    snapshot["level"] = dict(game["level"])
+    snapshot["state"] = game["state"]
+    snapshot["score"] = game["score"]
+    snapshot["high_score"] = game["high_score"]
+    snapshot["audio_muted"] = game["audio_muted"]
+    snapshot["level_flash_timer"] = game["level_flash_timer"]
+
+
+def pipeline_create(game: Game, rec: dict[str, Any] | None = None, autosave: AutoSave | None = None) -> Pipeline:
+    """为 game 创建流水线并发布初始快照（尚未启动线程）。
+
+    game 此后归模拟线程所有，主线程只通过 pipeline_send_key 与 game["pipeline_move"] 影响它。
+    """
+    if rec is None:
+        game["input_source"] = input_pipeline
+    game["pipeline_move"] = (0, 0)
+    # 帧统计只在主线程记录渲染阶段
+    game["profiler"] = None
+    pipeline: Pipeline = {
+        "game": game,
+        "rec": rec,
+        "autosave": autosave,
+        "buffers": [snapshot_create(), snapshot_create()],
+        "front": 0,
+        "reading": None,
+        "lock": threading.Lock(),
+        "keys": deque(),
+        "running": True,
+        "thread": None,
+        "published": 0,
+        "skipped": 0,
+    }
+    snapshot_write(pipeline["buffers"][0], game)
+    return pipeline
+
+
+def pipeline_publish(pipeline: Pipeline) -> bool:
+    """把当前状态写入后台缓冲区并设为最新快照；该缓冲区正被渲染时跳过本次发布。"""
+    back = 1 - pipeline["front"]
+    with pipeline["lock"]:
+        if pipeline["reading"] == back:
+            pipeline["skipped"] += 1
+            return False
+    # 渲染线程只会取 front，写 back 期间不需要持锁
+    snapshot_write(pipeline["buffers"][back], pipeline["game"])
+    with pipeline["lock"]:
+        pipeline["front"] = back
+        pipeline["published"] += 1
+    return True
+
+
+def pipeline_run(pipeline: Pipeline) -> None:
+    """模拟线程主体：应用按键、按固定步长推进并发布快照，直到 pipeline_stop。"""
+    game = pipeline["game"]
+    rec = pipeline["rec"]
+    autosave = pipeline["autosave"]
+    keys = pipeline["keys"]
+    sim_clock = sim_clock_create()
+    last = time.perf_counter()
+    dirty = False
+    while pipeline["running"]:
+        while keys:
+            key = keys.popleft()
+            if rec:
+                rec_note_key(rec, key)
+            game_handle_keydown(game, key)
+            dirty = True
+        now = time.perf_counter()
+        steps = sim_clock_advance(sim_clock, now - last, game["quality"]["max_catchup"])
+        last = now
+        for _ in range(steps):
+            if rec:
+                rec_tick(rec, game, game["pipeline_move"])
+            game_update(game, cfg.SIM_DT)
+            if autosave:
+                autosave_tick(autosave, game)
+            dirty = True
+        # 发布被跳过时保留 dirty，下一轮再试
+        if dirty and pipeline_publish(pipeline):
+            dirty = False
+        time.sleep(max(cfg.SIM_DT - sim_clock["accumulator"], 0.0))
+
+
+def pipeline_start(pipeline: Pipeline) -> None:
+    """启动模拟线程。"""
+    thread = threading.Thread(target=pipeline_run, args=(pipeline,), name="sim", daemon=True)
+    pipeline["thread"] = thread
+    thread.start()
+
+
+def pipeline_stop(pipeline: Pipeline) -> None:
+    """通知模拟线程退出并等待其结束。"""
+    pipeline["running"] = False
+    if pipeline["thread"] is not None:
+        pipeline["thread"].join()
+        pipeline["thread"] = None
+
+
+def pipeline_send_key(pipeline: Pipeline, key: int) -> None:
+    """把按键交给模拟线程在下一轮处理。"""
+    pipeline["keys"].append(key)
+
+
+def pipeline_acquire(pipeline: Pipeline, hud: HUD, quality: dict[str, Any], prof: Any = None) -> Game:
+    """取出最新快照供渲染，返回可直接交给 game_render 的只读游戏字典；用完后调用 pipeline_release。"""
+    with pipeline["lock"]:
+        front = pipeline["front"]
+        pipeline["reading"] = front
+    view = dict(pipeline["buffers"][front])
+    view["hud"] = hud
+    view["quality"] = quality
+    view["profiler"] = prof
+    return view
+
+
+def pipeline_release(pipeline: Pipeline) -> None:
+    """渲染结束，允许模拟线程改写刚才读取的缓冲区。"""
+    with pipeline["lock"]:
+        pipeline["reading"] = None
 
 
 def game_draw_entities(game: Game, screen: pygame.Surface) -> None:
     """按需绘制弹球与玩家。"""
     if game["state"] not in ("playing", "paused", "gameover"):
         return
-    if game["balls"]:
-        balls_draw_all(game["balls"], screen)
+    if balls_count(game["balls"]) > 0:
+        balls_draw_all(game["balls"], screen, shaded=game["quality"]["shaded_balls"])
     if game["player"] is not None:
         player_draw(game["player"], screen)
 
 
-def render_background(screen: pygame.Surface) -> None:
-    """绘制背景图或备用底色。"""
-    if background:
+def render_background(screen: pygame.Surface, use_image: bool = True) -> None:
+    """绘制背景图或备用底色；use_image=False 时总是填充底色。"""
+    if background and use_image:
         screen.blit(background, (0, 0))
     else:
         screen.fill(cfg.BG_COLOR)
@@ -511,38 +1036,378 @@ def render_background(screen: pygame.Surface) -> None:
 
 def game_render(game: Game, screen: pygame.Surface) -> None:
     """执行完整一帧的渲染流程。"""
-    render_background(screen)
+    prof = game.get("profiler")
+    render_background(screen, game["quality"]["background"])
+    if prof:
+        prof_mark(prof, PHASE_BACKGROUND)
     game_draw_entities(game, screen)
-    hud_refresh(game["hud"], game)
+    if prof:
+        prof_mark(prof, PHASE_ENTITIES)
+    hud_refresh_throttled(game["hud"], game, game["quality"]["hud_interval_ms"])
     hud_draw(game["hud"], screen)
+    if prof:
+        prof_mark(prof, PHASE_HUD)
+
+
+# ============ 脏矩形渲染 ============
+# 只恢复上一帧与本帧实体、HUD 变化所覆盖的背景区域，再用
+# pygame.display.update(rects) 只提交这些区域；变化面积过大时退回整屏重绘。
+DirtyState = dict[str, Any]
+
+
+def dirty_state_create() -> DirtyState:
+    """创建脏矩形渲染所需的跨帧记录。"""
+    return {
+        "entity_rects": [],
+        "hud_layers": {},
+        "force_full": True,
+    }
+
+
+def game_entity_rects(game: Game, scale: float = 1.0) -> list[pygame.Rect]:
+    """按绘制顺序返回所有弹球与玩家当前在画布上占据的矩形（玩家在最后）。"""
+    if game["state"] not in ("playing", "paused", "gameover"):
+        return []
+    balls = game["balls"]
+    radius, lefts, tops = balls_screen_boxes(balls, slice(0, balls["count"]), scale)
+    sizes = (radius * 2).tolist()
+    rects = [pygame.Rect(left, top, size, size) for left, top, size in zip(lefts, tops, sizes)]
+    player = game["player"]
+    if player is not None:
+        rects.append(player_screen_rect(player, scale))
+    return rects
+
+
+def restore_background(screen: pygame.Surface, rect: pygame.Rect, use_image: bool = True) -> None:
+    """把屏幕上某个区域恢复为背景。"""
+    if background and use_image:
+        screen.blit(background, rect, rect)
+    else:
+        screen.fill(cfg.BG_COLOR, rect)
+
+
+def game_render_dirty(game: Game, screen: pygame.Surface, state: DirtyState) -> list[pygame.Rect] | None:
+    """只重绘变化区域，返回需要提交的矩形列表。
+
+    返回 None 表示本帧已整屏重绘，调用方应使用 pygame.display.flip()；
+    返回空列表表示画面没有变化，无需提交。
+    """
+    prof = game.get("profiler")
+    hud = game["hud"]
+    quality = game["quality"]
+    hud_refresh_throttled(hud, game, quality["hud_interval_ms"])
+    scale = render_scale(screen)
+    prev_entities = state["entity_rects"]
+    entities = game_entity_rects(game, scale)
+
+    # HUD：图层被重建或显隐变化时，新旧位置都需要重画
+    prev_layers = state["hud_layers"]
+    layers = {}
+    dirty = []
+    for name in HUD_LAYER_NAMES:
+        layer = hud_layer_update(hud, name, scale)
+        layers[name] = layer
+        old = prev_layers.get(name)
+        if layer is old:
+            continue
+        if old is not None:
+            dirty.append(old["rect"])
+        if layer is not None:
+            dirty.append(layer["rect"])
+
+    # 实体：有任何移动时，所有实体的新旧位置都是脏区域
+    included = [False] * len(entities)
+    if entities != prev_entities:
+        if len(entities) == len(prev_entities):
+            dirty.extend(new.union(old) for new, old in zip(entities, prev_entities))
+        else:
+            dirty.extend(prev_entities)
+            dirty.extend(entities)
+        included = [True] * len(entities)
+
+    state["entity_rects"] = entities
+    state["hud_layers"] = layers
+    if not dirty and not state["force_full"]:
+        return []
+
+    screen_area = screen.get_width() * screen.get_height()
+    if state["force_full"] or sum(rect.w * rect.h for rect in dirty) > cfg.DIRTY_FULL_REDRAW_RATIO * screen_area:
+        state["force_full"] = False
+        game_render(game, screen)
+        return None
+
+    # 与脏区域相交的实体和 HUD 图层也必须重画，直到不再扩大为止
+    hud_included = {name: False for name in HUD_LAYER_NAMES}
+    grew = True
+    while grew:
+        grew = False
+        for name, layer in layers.items():
+            if layer is not None and not hud_included[name] and layer["rect"].collidelist(dirty) != -1:
+                hud_included[name] = True
+                dirty.append(layer["rect"])
+                grew = True
+        for index, rect in enumerate(entities):
+            if not included[index] and rect.collidelist(dirty) != -1:
+                included[index] = True
+                dirty.append(rect)
+                grew = True
+
+    if prof:
+        prof_mark(prof, PHASE_HUD)
+    for rect in dirty:
+        restore_background(screen, rect, quality["background"])
+    if prof:
+        prof_mark(prof, PHASE_BACKGROUND)
+
+    balls = game["balls"]
+    n = balls_count(balls)
+    subset = [index for index in range(n) if included[index]]
+    if subset:
+        balls_draw_all(balls, screen, np.array(subset), quality["shaded_balls"])
+    if game["player"] is not None and len(entities) > n and included[n]:
+        player_draw(game["player"], screen)
+    if prof:
+        prof_mark(prof, PHASE_ENTITIES)
+
+    blits = []
+    for name in HUD_LAYER_NAMES:
+        if hud_included[name]:
+            blits.extend(layers[name]["blits"])
+    screen.blits(blits, doreturn=False)
+    if prof:
+        prof_mark(prof, PHASE_HUD)
+    return dirty
+
+
+# ============ 窗口与画布 ============
+# 游戏按 WIDTH x HEIGHT 的逻辑坐标绘制到画布上，画布尺寸为“窗口内保持宽高比的最大区域 x RENDER_SCALE”，
+# 绘制函数按画布宽度自行换算坐标与精灵半径。画布与窗口同尺寸时直接画到窗口，与原来的流程完全相同；
+# 否则每帧把画布放大到窗口居中区域再提交。
+Display = dict[str, Any]
+
+
+def display_layout(window_size: tuple[int, int]) -> tuple[tuple[int, int], pygame.Rect]:
+    """计算画布尺寸，以及放大后在窗口中居中的目标区域。"""
+    win_w, win_h = window_size
+    fit = min(win_w / cfg.WIDTH, win_h / cfg.HEIGHT)
+    dest = pygame.Rect(0, 0, max(1, round(cfg.WIDTH * fit)), max(1, round(cfg.HEIGHT * fit)))
+    dest.center = (win_w // 2, win_h // 2)
+    scale = fit * cfg.RENDER_SCALE
+    size = (max(1, round(cfg.WIDTH * scale)), max(1, round(cfg.HEIGHT * scale)))
+    return size, dest
+
+
+def display_create(window: pygame.Surface) -> Display:
+    """为窗口创建画布。"""
+    display: Display = {}
+    display_resize(display, window)
+    return display
+
+
+def display_resize(display: Display, window: pygame.Surface) -> None:
+    """窗口尺寸变化后重建画布；下一次提交时清空黑边。"""
+    size, dest = display_layout(window.get_size())
+    direct = size == window.get_size()
+    display["window"] = window
+    display["dest"] = dest
+    display["direct"] = direct
+    display["canvas"] = window if direct else pygame.Surface(size).convert()
+    display["clear"] = not direct
+
+
+def display_upscale(display: Display) -> bool:
+    """把画布放大到窗口；返回是否刚清过黑边（需要提交整个窗口）。"""
+    if display["direct"]:
+        return False
+    window = display["window"]
+    cleared = display["clear"]
+    if cleared:
+        window.fill((0, 0, 0))
+        display["clear"] = False
+    dest = display["dest"]
+    canvas = display["canvas"]
+    if canvas.get_size() == dest.size:
+        # 只是留黑边居中，不需要缩放
+        window.blit(canvas, dest)
+    else:
+        pygame.transform.scale(canvas, dest.size, window.subsurface(dest))
+    return cleared
+
+
+def display_present(display: Display, rects: list[pygame.Rect] | None) -> None:
+    """提交一帧；rects 为 game_render_dirty 的返回值（None 表示整屏重绘，空列表表示没有变化）。"""
+    if display["direct"]:
+        if rects is None:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+        return
+    if rects == [] and not display["clear"]:
+        return
+    if display_upscale(display):
+        pygame.display.flip()
+    else:
+        pygame.display.update(display["dest"])
 
 
 def main() -> None:
-    """程序入口：初始化资源并运行主循环。"""
+    """程序入口：初始化窗口，后台加载资源并运行主循环。"""
+    start_time = time.perf_counter()
     pygame.init()
-    screen = pygame.display.set_mode((cfg.WIDTH, cfg.HEIGHT))
+    window = pygame.display.set_mode(
+        cfg.WINDOW_SIZE or (cfg.WIDTH, cfg.HEIGHT), pygame.RESIZABLE if cfg.WINDOW_RESIZABLE else 0
+    )
     pygame.display.set_caption("躲避球 M5：视觉与音效增强（ESC 退出）")
+    display = display_create(window)
 
-    load_graphics()
-    load_audio()
+    loader: threading.Thread | None = assets_load_start(display["canvas"].get_size())
+    first_frame = True
 
     clock = pygame.time.Clock()
+    sim_clock = sim_clock_create()
+    dirty_state = dirty_state_create()
     game = game_create()
+    prof = prof_create(cfg.PROFILER_FRAMES) if cfg.PROFILER_ENABLED else None
+    game["profiler"] = prof
+    rec = rec_create(game) if cfg.REPLAY_RECORD_PATH else None
+    governor = governor_create(1000.0 / cfg.FPS) if cfg.QUALITY_GOVERNOR else None
+    autosave = autosave_create(cfg.CHECKPOINT_PATH) if cfg.CHECKPOINT_PATH else None
+    if autosave and rec is None and autosave["path"].is_file():
+        try:
+            game_resume(game, checkpoint_load(autosave["path"]))
+        except ValueError:
+            pass
+    pipeline = pipeline_create(game, rec, autosave) if cfg.PIPELINED_SIM else None
+    telemetry = telemetry_create() if cfg.TELEMETRY_ENABLED else None
+    # 流水线模式下输入由模拟线程读取，探针与延迟采样只作用于单线程主循环
+    probe = probe_create() if cfg.LATENCY_PROBE and not pipeline else None
+    if probe:
+        game["latency_probe"] = probe
+        game["input_source"] = input_probed
+    late_latch = cfg.LATE_LATCH and not pipeline
+    pacer = pacer_create(cfg.FPS, late_latch) if late_latch or probe else None
+    if pipeline:
+        pipeline_start(pipeline)
 
     running = True
     while running:
-        dt = clock.tick(cfg.FPS) / 1000.0
+        if pacer:
+            frame_dt = pacer_wait(pacer, probe)
+            work_ms = pacer["work_ms"]
+        else:
+            frame_dt = clock.tick(cfg.FPS) / 1000.0
+            # get_rawtime 是上一帧实际工作的耗时，不含 tick 为限帧而等待的时间
+            work_ms = clock.get_rawtime()
+        if governor is not None and governor_update(governor, work_ms):
+            game["quality"] = governor_settings(governor)
+            dirty_state["force_full"] = True
+        if prof:
+            prof_begin_frame(prof)
         for event in pygame.event.get():
+            if event.type == pygame.VIDEORESIZE:
+                display_resize(display, pygame.display.get_surface())
+                if loader is None:
+                    background_use(display["canvas"].get_size())
+                dirty_state["force_full"] = True
+                continue
+            if pipeline:
+                # 流水线模式下游戏状态归模拟线程，主线程只转交按键
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    running = False
+                    break
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_F3 and prof:
+                        prof_toggle_overlay(prof)
+                    else:
+                        pipeline_send_key(pipeline, event.key)
+                continue
+            if rec and event.type == pygame.KEYDOWN:
+                rec_note_key(rec, event.key)
+            if probe and event.type == pygame.KEYDOWN:
+                probe_note_key(probe, event.key, time.perf_counter())
             if not game_handle_event(game, event):
                 running = False
                 break
         if not running:
             break
-
-        game_update(game, dt)
-        game_render(game, screen)
-        pygame.display.flip()
-
+        if probe:
+            probe_end_events(probe)
+        if prof:
+            prof_mark(prof, PHASE_EVENTS)
+
+        if loader is not None:
+            # 先记下线程是否已结束，再安装背景，避免漏掉结束前刚写入的结果
+            finished = not loader.is_alive()
+            if assets_load_poll():
+                # 加载期间窗口可能改变过尺寸
+                background_use(display["canvas"].get_size())
+                dirty_state["force_full"] = True
+            if finished:
+                loader = None
+                if cfg.STARTUP_REPORT:
+                    print(f"assets ready: {(time.perf_counter() - start_time) * 1000:.1f} ms")
+
+        if pipeline:
+            game["pipeline_move"] = player_handle_move_input()
+            view = pipeline_acquire(pipeline, game["hud"], game["quality"], prof)
+        else:
+            for _ in range(sim_clock_advance(sim_clock, frame_dt, game["quality"]["max_catchup"])):
+                if rec:
+                    rec_tick(rec, game, player_handle_move_input())
+                game_update(game, cfg.SIM_DT)
+                if autosave:
+                    autosave_tick(autosave, game)
+            view = game
+        if telemetry:
+            # 流水线模式下 pipeline_release 之后模拟线程可能改写 view 所在的缓冲区，必须在释放前记录
+            tier = governor["tier"] if governor is not None else 0
+            telemetry_publish(telemetry, view, time.time(), frame_dt * 1000.0, work_ms, tier)
+
+        # 统计图层每帧都在变化，显示时改用整屏重绘
+        overlay = prof is not None and prof["overlay"]
+        if cfg.DIRTY_RECT_RENDER and not overlay:
+            rects = game_render_dirty(view, display["canvas"], dirty_state)
+            if pipeline:
+                pipeline_release(pipeline)
+            ready = time.perf_counter()
+            display_present(display, rects)
+        else:
+            game_render(view, display["canvas"])
+            if pipeline:
+                pipeline_release(pipeline)
+            display_upscale(display)
+            if overlay:
+                # 统计图层画在放大后的窗口上，不受画布比例影响
+                prof_draw_overlay(prof, display["window"], 1000.0 / cfg.FPS)
+                prof_mark(prof, PHASE_HUD)
+                dirty_state["force_full"] = True
+            ready = time.perf_counter()
+            pygame.display.flip()
+        if pacer:
+            presented = time.perf_counter()
+            pacer_presented(pacer, ready, presented)
+            if probe:
+                probe_note_present(probe, presented)
+        if first_frame:
+            first_frame = False
+            if cfg.STARTUP_REPORT:
+                print(f"first frame: {(time.perf_counter() - start_time) * 1000:.1f} ms")
+        if prof:
+            prof_mark(prof, PHASE_FLIP)
+            prof_end_frame(prof)
+
+    if pipeline:
+        pipeline_stop(pipeline)
+    if autosave:
+        autosave_discard(autosave)
+    if telemetry:
+        telemetry_close(telemetry)
+    if probe:
+        print(probe_report(probe))
+    if rec:
+        rec_save(rec, cfg.REPLAY_RECORD_PATH)
+    if prof and cfg.PROFILER_DUMP_PATH:
+        prof_dump(prof, cfg.PROFILER_DUMP_PATH)
     pygame.quit()
 
 
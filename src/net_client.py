@@ -0,0 +1,372 @@
+﻿"""
+联机对战的瘦客户端：不运行模拟，只上行输入、接收服务器快照，
+并在两帧快照之间插值渲染（画面比最新快照落后 NET_INTERP_TICKS 步，以吸收延迟抖动与丢包）。
+
+--bots N 时不开窗口，在一个进程里运行 N 个由 policies 策略驱动的机器人客户端，用于本机压测。
+
+用法（在项目根目录，先启动 net_server.py）：
+    python src/net_client.py
+    python src/net_client.py --bots 40 --duration 30 --latency 60 --jitter 20 --loss 0.05
+"""
+
+import argparse
+import asyncio
+import struct
+import zlib
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+import pygame
+
+import config as cfg
+from ball_store import ball_store_create, ball_store_reserve
+from main import (
+    Game,
+    balls_draw_all,
+    hud_create,
+    hud_draw,
+    hud_refresh,
+    load_graphics,
+    player_create,
+    player_draw,
+    player_handle_move_input,
+    render_background,
+)
+from net_protocol import (
+    ANY_ROOM,
+    BARE,
+    INPUT,
+    INPUT_START,
+    JOIN,
+    MSG_FULL,
+    MSG_INPUT,
+    MSG_JOIN,
+    MSG_LEAVE,
+    MSG_SNAPSHOT,
+    MSG_WELCOME,
+    NO_BASE,
+    PLAYER_ALIVE,
+    PLAYER_HURT,
+    PLAYER_OCCUPIED,
+    WELCOME,
+    dequantize,
+    link_create,
+    link_pass,
+    link_send,
+    snapshot_base_tick,
+    snapshot_decode,
+)
+from policies import POLICIES, policy_create
+from replay import move_to_bits
+
+Client = dict[str, Any]
+
+# 未收到欢迎包时重发加入请求的间隔（秒）
+JOIN_RETRY = 0.5
+# 按下开始键后连续这么多个输入包带上开始位，防止单个包丢失
+START_REPEAT = 10
+
+
+# ============ 连接 ============
+def client_create(up: dict[str, Any], down: dict[str, Any], room: int = ANY_ROOM) -> Client:
+    """创建客户端状态；up / down 为上下行模拟链路，frames 按刻保存最近解码的快照，也是增量解码的基准。"""
+    return {
+        "up": up,
+        "down": down,
+        "room_request": room,
+        "room": None,
+        "seat": None,
+        "transport": None,
+        "loop": None,
+        "frames": OrderedDict(),
+        "latest": None,
+        "received_at": 0.0,
+        "seq": 0,
+        "start_left": 0,
+        "full": False,
+        "snapshots": 0,
+        "missing_base": 0,
+        "malformed": 0,
+        "bytes_in": 0,
+        "matches": 0,
+        "balls": ball_store_create(cfg.LEVEL_MAX_BALLS),
+    }
+
+
+def client_receive(client: Client, data: bytes) -> None:
+    """处理一个下行数据报。"""
+    if not data:
+        return
+    kind = data[0]
+    client["bytes_in"] += len(data)
+    if kind == MSG_WELCOME and len(data) == WELCOME.size:
+        _, client["room"], client["seat"], _ = WELCOME.unpack(data)
+        return
+    if kind == MSG_FULL:
+        client["full"] = True
+        return
+    if kind != MSG_SNAPSHOT:
+        return
+    frames = client["frames"]
+    try:
+        base_tick = snapshot_base_tick(data)
+        if base_tick != NO_BASE and base_tick not in frames:
+            # 基准帧已被丢弃（或从未收到）：等服务器发完整快照
+            client["missing_base"] += 1
+            return
+        frame = snapshot_decode(data, frames.get(base_tick))
+    except (ValueError, struct.error, zlib.error, IndexError):
+        # 截断或损坏的报文：丢弃，不影响已有的快照
+        client["malformed"] += 1
+        return
+    client["snapshots"] += 1
+    latest = client["latest"]
+    if latest is not None and frame["tick"] <= latest["tick"]:
+        # 乱序到达的旧快照仍可作为插值与增量基准
+        frames[frame["tick"]] = frame
+        frames = OrderedDict(sorted(frames.items()))
+        client["frames"] = frames
+    else:
+        if latest is None or frame["generation"] != latest["generation"]:
+            client["matches"] += 1
+        frames[frame["tick"]] = frame
+        client["latest"] = frame
+        client["received_at"] = client["loop"].time()
+    while len(frames) > cfg.NET_HISTORY:
+        frames.popitem(last=False)
+
+
+async def client_connect(client: Client, host: str, port: int) -> None:
+    """打开 UDP 端点并反复发送加入请求，直到收到欢迎包或房间已满。"""
+    loop = asyncio.get_running_loop()
+    client["loop"] = loop
+    protocol = SimpleNamespace(
+        connection_made=lambda transport: None,
+        datagram_received=lambda data, addr: link_pass(client["down"], loop, data, client_receive, client, data),
+        error_received=lambda exc: None,
+        connection_lost=lambda exc: None,
+    )
+    client["transport"], _ = await loop.create_datagram_endpoint(lambda: protocol, remote_addr=(host, port))
+    while client["seat"] is None and not client["full"]:
+        client_send(client, JOIN.pack(MSG_JOIN, client["room_request"]))
+        await asyncio.sleep(JOIN_RETRY)
+
+
+def client_send(client: Client, data: bytes) -> None:
+    """经模拟链路发送一个上行数据报。"""
+    link_send(client["up"], client["loop"], client["transport"], data)
+
+
+def client_send_input(client: Client, move: tuple[int, int], start: bool = False) -> None:
+    """发送本帧输入，并回报已收到的最新快照刻作为下一次增量的基准。"""
+    if start:
+        client["start_left"] = START_REPEAT
+    bits = move_to_bits(move)
+    if client["start_left"] > 0:
+        client["start_left"] -= 1
+        bits |= INPUT_START
+    client["seq"] += 1
+    latest = client["latest"]
+    ack = NO_BASE if latest is None else latest["tick"]
+    client_send(client, INPUT.pack(MSG_INPUT, client["seq"], ack, bits))
+
+
+def client_close(client: Client) -> None:
+    """通知服务器离开并关闭端点（离开包不经过模拟链路）。"""
+    transport = client["transport"]
+    if transport is not None and not transport.is_closing():
+        transport.sendto(BARE.pack(MSG_LEAVE))
+        transport.close()
+
+
+# ============ 插值 ============
+def frame_players(frame: dict[str, Any]) -> list[dict[str, Any] | None]:
+    """把快照里的座位数据还原为玩家字典（空座位为 None）。"""
+    players = []
+    for qx, qy, hp, flags in frame["players"]:
+        if not flags & PLAYER_OCCUPIED:
+            players.append(None)
+            continue
+        player = player_create()
+        player["x"] = qx / cfg.NET_POS_SCALE
+        player["y"] = qy / cfg.NET_POS_SCALE
+        player["hp"] = hp if flags & PLAYER_ALIVE else 0
+        player["hurt_cd"] = 1 if flags & PLAYER_HURT else 0
+        players.append(player)
+    return players
+
+
+def client_view(client: Client) -> Game | None:
+    """按当前时间在快照之间插值，返回形状与 game 相同的只读字典；还没有快照时返回 None。"""
+    latest = client["latest"]
+    if latest is None:
+        return None
+    elapsed = (client["loop"].time() - client["received_at"]) * cfg.SIM_HZ
+    # 最多外推一个快照间隔，之后停在最新快照
+    render_tick = latest["tick"] + min(elapsed, cfg.NET_SNAPSHOT_EVERY) - cfg.NET_INTERP_TICKS
+    older = None
+    newer = None
+    for tick, frame in client["frames"].items():
+        if tick <= render_tick:
+            older = frame
+        elif newer is None:
+            newer = frame
+    if older is None:
+        older = newer
+    if newer is None or newer["generation"] != older["generation"]:
+        newer = older
+    span = newer["tick"] - older["tick"]
+    alpha = (render_tick - older["tick"]) / span if span > 0 else 0.0
+
+    balls = client["balls"]
+    n = len(newer["qx"])
+    m = min(n, len(older["qx"]))
+    ball_store_reserve(balls, n)
+    for name, key in (("x", "qx"), ("y", "qy")):
+        a = dequantize(older[key][:m])
+        balls[name][:m] = a + (dequantize(newer[key][:m]) - a) * alpha
+        balls[name][m:n] = dequantize(newer[key][m:])
+    balls["r"][:n] = newer["r"]
+    balls["color"][:n] = newer["color"]
+    balls["count"] = n
+
+    players = frame_players(newer)
+    for player, before in zip(players, frame_players(older)):
+        if player is not None and before is not None:
+            player["x"] = before["x"] + (player["x"] - before["x"]) * alpha
+            player["y"] = before["y"] + (player["y"] - before["y"]) * alpha
+    seat = client["seat"]
+    return {
+        "state": newer["state"],
+        "score": float(newer["score"]),
+        "high_score": newer["high_score"],
+        "level": {"index": newer["level"], "timer": 0.0},
+        "balls": balls,
+        "player": players[seat] if seat is not None and seat < len(players) else None,
+        "opponents": [player for index, player in enumerate(players) if player is not None and index != seat],
+        "audio_muted": False,
+        "level_flash_timer": 0.0,
+    }
+
+
+# ============ 渲染 ============
+def client_render(view: Game, hud: dict[str, Any], screen: pygame.Surface) -> None:
+    """整屏绘制插值后的画面：背景、弹球、对手、自己、HUD。"""
+    render_background(screen)
+    if view["state"] != "ready":
+        balls_draw_all(view["balls"], screen)
+        for player in view["opponents"]:
+            player_draw(player, screen, cfg.NET_OPPONENT_COLOR)
+        if view["player"] is not None:
+            player_draw(view["player"], screen)
+    hud_refresh(hud, view)
+    hud_draw(hud, screen)
+
+
+async def play(host: str, port: int, room: int, up: dict[str, Any], down: dict[str, Any]) -> None:
+    """窗口模式：一个玩家的瘦客户端。"""
+    pygame.init()
+    screen = pygame.display.set_mode((cfg.WIDTH, cfg.HEIGHT))
+    pygame.display.set_caption("躲避球联机对战（ESC 退出）")
+    load_graphics()
+    hud = hud_create()
+    client = client_create(up, down, room)
+    await client_connect(client, host, port)
+    if client["full"]:
+        print("room is full")
+        pygame.quit()
+        return
+    loop = client["loop"]
+
+    frame_time = 1.0 / cfg.FPS
+    next_frame = loop.time()
+    running = True
+    while running:
+        start = False
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key in (pygame.K_SPACE, pygame.K_RETURN):
+                start = True
+        client_send_input(client, player_handle_move_input(), start)
+        view = client_view(client)
+        if view is not None:
+            client_render(view, hud, screen)
+            pygame.display.flip()
+        next_frame += frame_time
+        await asyncio.sleep(max(next_frame - loop.time(), 0.0))
+    client_close(client)
+    pygame.quit()
+
+
+# ============ 机器人压测 ============
+async def bot_run(client: Client, host: str, port: int, policy_name: str, seed: int, duration: float) -> None:
+    """一个机器人客户端：按 SIM_DT 发送策略输入，对局结束后立即准备下一局。"""
+    await client_connect(client, host, port)
+    if client["full"]:
+        return
+    loop = client["loop"]
+    policy = policy_create(policy_name, seed)
+    end = loop.time() + duration
+    next_send = loop.time()
+    while loop.time() < end:
+        view = client_view(client)
+        move = (0, 0)
+        if view is not None and view["player"] is not None and view["player"]["hp"] > 0:
+            move = policy(view)
+        client_send_input(client, move, start=view is None or view["state"] != "playing")
+        next_send += cfg.SIM_DT
+        await asyncio.sleep(max(next_send - loop.time(), 0.0))
+    client_close(client)
+
+
+async def bots(host: str, port: int, count: int, policy: str, duration: float, link_args: tuple) -> list[Client]:
+    """并发运行 count 个机器人，结束后返回它们的状态用于统计。"""
+    clients = [
+        client_create(link_create(*link_args, seed=2 * index), link_create(*link_args, seed=2 * index + 1))
+        for index in range(count)
+    ]
+    await asyncio.gather(*(bot_run(client, host, port, policy, index, duration) for index, client in enumerate(clients)))
+    return clients
+
+
+def main() -> None:
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description="躲避球联机对战客户端")
+    parser.add_argument("--host", default=cfg.NET_HOST, help="服务器地址")
+    parser.add_argument("--port", type=int, default=cfg.NET_PORT, help="服务器 UDP 端口")
+    parser.add_argument("--room", type=int, default=ANY_ROOM, help="房间号，默认自动匹配")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟延迟（毫秒，上下行各一次）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="模拟抖动（毫秒）")
+    parser.add_argument("--loss", type=float, default=0.0, help="模拟丢包率（0~1，上下行各一次）")
+    parser.add_argument("--bots", type=int, default=0, help="不开窗口，运行这么多个机器人客户端")
+    parser.add_argument("--input", choices=sorted(POLICIES), default="flee", help="机器人策略")
+    parser.add_argument("--duration", type=float, default=30.0, help="机器人运行秒数")
+    args = parser.parse_args()
+
+    link_args = (args.latency, args.jitter, args.loss)
+    if args.bots <= 0:
+        asyncio.run(play(args.host, args.port, args.room, link_create(*link_args), link_create(*link_args)))
+        return
+
+    clients = asyncio.run(bots(args.host, args.port, args.bots, args.input, args.duration, link_args))
+    joined = [client for client in clients if client["seat"] is not None]
+    snapshots = sum(client["snapshots"] for client in joined)
+    print(f"bots joined: {len(joined)} / {len(clients)}")
+    missing = sum(client["missing_base"] for client in joined)
+    malformed = sum(client["malformed"] for client in joined)
+    print(f"snapshots received: {snapshots}  missing base: {missing}  malformed: {malformed}")
+    print(f"matches seen: {sum(client['matches'] for client in joined)}")
+    if joined:
+        rate = np.mean([client["bytes_in"] for client in joined]) / args.duration
+        print(f"downstream per bot: {rate:.0f} B/s")
+    for direction in ("up", "down"):
+        sent = sum(client[direction]["sent"] for client in joined)
+        dropped = sum(client[direction]["dropped"] for client in joined)
+        print(f"{direction}stream packets: {sent}  dropped by link: {dropped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+﻿"""
+联机对战的报文格式：客户端上行紧凑的输入包，服务器下行量化并增量压缩的快照。
+
+快照里的坐标量化为 1/NET_POS_SCALE 像素的 uint16。客户端在输入包里回报已收到的最新快照刻，
+服务器以此为基准只发送弹球坐标的差值（能放进 int8 时用 int8），再用 zlib 压缩；
+基准丢失或对局重开（generation 变化）时发送完整快照。弹球只会在末尾增减，
+所以前 min(新, 旧) 个弹球总能按下标做差，其余的新弹球完整发送。
+
+本模块只做编解码，不依赖 pygame 与游戏逻辑，服务器与客户端共用。
+"""
+
+import random
+import struct
+import zlib
+from typing import Any, Callable
+
+import numpy as np
+
+import config as cfg
+
+Frame = dict[str, Any]
+Link = dict[str, Any]
+
+MSG_JOIN = 1
+MSG_WELCOME = 2
+MSG_INPUT = 3
+MSG_SNAPSHOT = 4
+MSG_LEAVE = 5
+MSG_FULL = 6
+
+ANY_ROOM = 0xFFFF
+NO_BASE = 0xFFFFFFFF
+
+# 类型、房间号（ANY_ROOM 表示自动匹配）
+JOIN = struct.Struct("<BH")
+# 类型、房间号、座位号、座位数
+WELCOME = struct.Struct("<BHBB")
+# 类型、输入序号、已收到的最新快照刻、按键位（replay.move_to_bits 的方向位 | INPUT_START）
+INPUT = struct.Struct("<BIIB")
+INPUT_START = 16
+# 类型、刻、基准刻（NO_BASE 表示完整快照）、对局代数、状态、座位数、关卡、分数、最高分、弹球数、压缩后的弹球数据长度
+SNAPSHOT = struct.Struct("<BIIHBBHIIHH")
+# 每个座位：x, y（量化）、生命、标志位
+PLAYER = struct.Struct("<HHBB")
+PLAYER_OCCUPIED = 1
+PLAYER_ALIVE = 2
+PLAYER_HURT = 4
+# 单条消息类型（LEAVE / FULL）
+BARE = struct.Struct("<B")
+
+
+# ============ 量化 ============
+def quantize(values: np.ndarray) -> np.ndarray:
+    """把像素坐标量化为 uint16。"""
+    return np.clip(np.rint(values * cfg.NET_POS_SCALE), 0, 0xFFFF).astype(np.uint16)
+
+
+def dequantize(values: np.ndarray) -> np.ndarray:
+    """把量化坐标还原为像素（float64）。"""
+    return values.astype(np.float64) / cfg.NET_POS_SCALE
+
+
+def frame_from_game(game: dict[str, Any], players: list[dict[str, Any] | None], tick: int, generation: int) -> Frame:
+    """从服务器端游戏状态生成一帧量化快照（players 按座位排列，空座位为 None）。"""
+    balls = game["balls"]
+    n = balls["count"]
+    player_rows = []
+    for player in players:
+        if player is None:
+            player_rows.append((0, 0, 0, 0))
+            continue
+        flags = PLAYER_OCCUPIED
+        if player["hp"] > 0:
+            flags |= PLAYER_ALIVE
+        if player["hurt_cd"] > 0:
+            flags |= PLAYER_HURT
+        x, y = quantize(np.array([player["x"], player["y"]]))
+        player_rows.append((int(x), int(y), min(int(player["hp"]), 255), flags))
+    return {
+        "tick": tick,
+        "generation": generation,
+        "state": game["state"],
+        "level": game["level"]["index"],
+        "score": int(game["score"]),
+        "high_score": int(game["high_score"]),
+        "players": player_rows,
+        "qx": quantize(balls["x"][:n]),
+        "qy": quantize(balls["y"][:n]),
+        "r": balls["r"][:n].astype(np.uint8),
+        "color": balls["color"][:n].astype(np.uint8),
+    }
+
+
+# ============ 快照编解码 ============
+def _ball_block(frame: Frame, base: Frame | None) -> bytes:
+    """生成未压缩的弹球数据：增量部分 + 新增弹球的完整数据。"""
+    n = len(frame["qx"])
+    if base is None:
+        m = 0
+        head = b""
+    else:
+        m = min(n, len(base["qx"]))
+        dx = frame["qx"][:m].astype(np.int32) - base["qx"][:m]
+        dy = frame["qy"][:m].astype(np.int32) - base["qy"][:m]
+        wide = m > 0 and max(int(np.abs(dx).max()), int(np.abs(dy).max())) > 127
+        dtype = "<i2" if wide else "i1"
+        head = bytes([2 if wide else 1]) + dx.astype(dtype).tobytes() + dy.astype(dtype).tobytes()
+    tail = (
+        frame["qx"][m:].astype("<u2").tobytes()
+        + frame["qy"][m:].astype("<u2").tobytes()
+        + frame["r"][m:].tobytes()
+        + frame["color"][m:].tobytes()
+    )
+    return head + tail
+
+
+def snapshot_encode(frame: Frame, base: Frame | None = None) -> bytes:
+    """把一帧编码为快照报文；base 为客户端已确认的同代快照时只发送差值。"""
+    if base is not None and base["generation"] != frame["generation"]:
+        base = None
+    block = zlib.compress(_ball_block(frame, base), 1)
+    header = SNAPSHOT.pack(
+        MSG_SNAPSHOT,
+        frame["tick"],
+        NO_BASE if base is None else base["tick"],
+        frame["generation"],
+        cfg.GAME_STATES.index(frame["state"]),
+        len(frame["players"]),
+        frame["level"],
+        frame["score"],
+        frame["high_score"],
+        len(frame["qx"]),
+        len(block),
+    )
+    players = b"".join(PLAYER.pack(*row) for row in frame["players"])
+    return header + players + block
+
+
+def snapshot_base_tick(data: bytes) -> int:
+    """读取快照报文引用的基准刻（NO_BASE 表示完整快照）。"""
+    return SNAPSHOT.unpack_from(data)[2]
+
+
+def snapshot_decode(data: bytes, base: Frame | None = None) -> Frame:
+    """解码快照报文；增量快照需要传入对应基准刻的帧。
+
+    基准不符或字段越界时抛出 ValueError；截断或损坏的报文还可能抛出 struct.error、zlib.error 或 IndexError。
+    """
+    (
+        _,
+        tick,
+        base_tick,
+        generation,
+        state,
+        seats,
+        level,
+        score,
+        high_score,
+        n,
+        block_len,
+    ) = SNAPSHOT.unpack_from(data)
+    if state >= len(cfg.GAME_STATES):
+        raise ValueError(f"快照中的游戏状态编号 {state} 无效")
+    offset = SNAPSHOT.size
+    players = [PLAYER.unpack_from(data, offset + i * PLAYER.size) for i in range(seats)]
+    offset += seats * PLAYER.size
+    block = zlib.decompress(data[offset : offset + block_len])
+
+    qx = np.empty(n, dtype=np.uint16)
+    qy = np.empty(n, dtype=np.uint16)
+    r = np.empty(n, dtype=np.uint8)
+    color = np.empty(n, dtype=np.uint8)
+    pos = 0
+    m = 0
+    if base_tick != NO_BASE:
+        if base is None or base["tick"] != base_tick or base["generation"] != generation:
+            raise ValueError("缺少增量快照的基准帧")
+        m = min(n, len(base["qx"]))
+        dtype = np.dtype("<i2" if block[0] == 2 else "i1")
+        pos = 1
+        dx = np.frombuffer(block, dtype=dtype, count=m, offset=pos)
+        pos += m * dtype.itemsize
+        dy = np.frombuffer(block, dtype=dtype, count=m, offset=pos)
+        pos += m * dtype.itemsize
+        qx[:m] = base["qx"][:m] + dx
+        qy[:m] = base["qy"][:m] + dy
+        r[:m] = base["r"][:m]
+        color[:m] = base["color"][:m]
+    k = n - m
+    qx[m:] = np.frombuffer(block, dtype="<u2", count=k, offset=pos)
+    pos += 2 * k
+    qy[m:] = np.frombuffer(block, dtype="<u2", count=k, offset=pos)
+    pos += 2 * k
+    r[m:] = np.frombuffer(block, dtype=np.uint8, count=k, offset=pos)
+    pos += k
+    color[m:] = np.frombuffer(block, dtype=np.uint8, count=k, offset=pos)
+    return {
+        "tick": tick,
+        "generation": generation,
+        "state": cfg.GAME_STATES[state],
+        "level": level,
+        "score": score,
+        "high_score": high_score,
+        "players": players,
+        "qx": qx,
+        "qy": qy,
+        "r": r,
+        "color": color,
+    }
+
+
+# ============ 模拟网络 ============
+def link_create(latency_ms: float = 0.0, jitter_ms: float = 0.0, loss: float = 0.0, seed: int | None = None) -> Link:
+    """创建单向的模拟链路：固定延迟 + 均匀抖动 + 随机丢包，并统计收发字节。"""
+    return {
+        "latency": latency_ms / 1000.0,
+        "jitter": jitter_ms / 1000.0,
+        "loss": loss,
+        "rng": random.Random(seed),
+        "sent": 0,
+        "dropped": 0,
+        "bytes": 0,
+    }
+
+
+def link_pass(link: Link, loop: Any, data: bytes, deliver: Callable[..., None], *args: Any) -> None:
+    """让数据报经过模拟链路：按丢包率丢弃，否则延迟后调用 deliver(*args)；没有延迟时立即调用。"""
+    link["sent"] += 1
+    link["bytes"] += len(data)
+    if link["loss"] > 0 and link["rng"].random() < link["loss"]:
+        link["dropped"] += 1
+        return
+    delay = link["latency"] + link["jitter"] * link["rng"].random()
+    if delay <= 0:
+        deliver(*args)
+    else:
+        loop.call_later(delay, deliver, *args)
+
+
+def _deliver(transport: Any, data: bytes, addr: Any) -> None:
+    """延迟到期后真正发出数据报；期间连接已关闭则丢弃。"""
+    if not transport.is_closing():
+        transport.sendto(data, addr)
+
+
+def link_send(link: Link, loop: Any, transport: Any, data: bytes, addr: Any = None) -> None:
+    """经模拟链路发送一个数据报。"""
+    link_pass(link, loop, data, _deliver, transport, data, addr)
@@ -0,0 +1,375 @@
+﻿"""
+联机对战服务器：asyncio + UDP 的权威服务器，按固定步长 SIM_DT 同时推进多个房间的 game_update。
+
+每个房间有 NET_ROOM_PLAYERS 个座位，所有玩家在同一场弹球里比拼：座位坐满且每人都按过开始键后开局，
+只剩一名存活者（单座位房间为无人存活）时结束。客户端上行输入包（见 net_protocol.py），
+服务器每 NET_SNAPSHOT_EVERY 步向每个座位发送一次以其已确认快照为基准的增量快照。
+
+定期打印每个房间的每步耗时与每步收发字节数，用于估算单机能承载的房间数。
+
+用法（在项目根目录）：
+    python src/net_server.py
+    python src/net_server.py --latency 60 --jitter 20 --loss 0.05 --duration 30
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import OrderedDict, deque
+from types import SimpleNamespace
+from typing import Any
+
+import config as cfg
+from ball_store import FLOAT_FIELDS, ball_store_copy, ball_store_create
+from main import (
+    Player,
+    game_create,
+    game_start,
+    game_update,
+    player_create,
+    player_sweep_damage,
+    player_take_damage_if_hit,
+    player_update,
+    step_is_single_tick,
+)
+from net_protocol import (
+    ANY_ROOM,
+    BARE,
+    INPUT,
+    INPUT_START,
+    JOIN,
+    MSG_FULL,
+    MSG_INPUT,
+    MSG_JOIN,
+    MSG_LEAVE,
+    MSG_WELCOME,
+    WELCOME,
+    frame_from_game,
+    link_create,
+    link_send,
+    snapshot_encode,
+)
+from policies import input_idle
+from replay import bits_to_move
+
+Room = dict[str, Any]
+Seat = dict[str, Any]
+Server = dict[str, Any]
+
+# 每个房间保留的每步耗时样本数
+WORK_SAMPLES = 600
+
+
+# ============ 房间 ============
+def room_create(room_id: int, seed: int | None = None) -> Room:
+    """创建一个空房间；弹球与关卡由房间内的 game 字典管理，玩家放在座位上。"""
+    return {
+        "id": room_id,
+        "game": game_create(input_idle, with_hud=False, seed=seed),
+        "seats": [None] * cfg.NET_ROOM_PLAYERS,
+        "tick": 0,
+        "generation": 0,
+        "history": OrderedDict(),
+        # 多刻度步长时为每个玩家做扫掠检测用的弹球副本
+        "sweep_balls": ball_store_create(cfg.LEVEL_MAX_BALLS),
+        "work_ms": deque(maxlen=WORK_SAMPLES),
+        "ticks": 0,
+        "bytes_out": 0,
+        "bytes_in": 0,
+    }
+
+
+def seat_create(addr: Any, now: float) -> Seat:
+    """为新加入的客户端创建座位；下一局开始前没有玩家角色（观战）。"""
+    return {
+        "addr": addr,
+        "player": None,
+        "move": (0, 0),
+        "seq": -1,
+        "ack": None,
+        "start": False,
+        "heard": now,
+    }
+
+
+def room_players(room: Room) -> list[Player | None]:
+    """按座位顺序返回玩家角色（空座位或观战为 None）。"""
+    return [seat["player"] if seat else None for seat in room["seats"]]
+
+
+def room_start(room: Room) -> None:
+    """开始新一局：重置弹球与关卡，并把玩家沿水平方向均匀摆开。"""
+    game = room["game"]
+    game_start(game)
+    # game_start 创建的单人角色不用，玩家角色挂在座位上
+    game["player"] = None
+    seats = room["seats"]
+    for index, seat in enumerate(seats):
+        if seat is None:
+            continue
+        player = player_create()
+        player["x"] = cfg.WIDTH * (index + 1) / (len(seats) + 1)
+        seat["player"] = player
+        seat["start"] = False
+    room["generation"] = (room["generation"] + 1) & 0xFFFF
+    room["history"].clear()
+
+
+def room_step(room: Room, dt: float) -> None:
+    """推进房间一步：未开局时检查是否可以开局，对局中推进弹球与所有玩家。"""
+    game = room["game"]
+    seats = room["seats"]
+    if game["state"] != "playing":
+        if all(seat is not None and seat["start"] for seat in seats):
+            room_start(room)
+    else:
+        ticks = dt * cfg.MOTION_HZ
+        single = step_is_single_tick(ticks)
+        players = [(seat["player"], seat["move"]) for seat in seats if seat and seat["player"] is not None]
+        if not single:
+            # 与 game_update 的扫掠路径相同：从本步开始时的弹球位置出发，与移动中的玩家做扫掠检测。
+            # 弹球只由 game_update 推进一次，每个玩家在相同起点的副本上检测
+            scratch = room["sweep_balls"]
+            for player, move in players:
+                if player["hp"] > 0:
+                    ball_store_copy(scratch, game["balls"], FLOAT_FIELDS)
+                    player_sweep_damage(player, scratch, ticks, move)
+        game_update(game, dt)
+        alive = 0
+        for player, move in players:
+            if player["hp"] <= 0:
+                continue
+            if single:
+                player_update(player, move, ticks)
+                player_take_damage_if_hit(player, game["balls"])
+            if player["hp"] > 0:
+                alive += 1
+        contenders = len(players)
+        if alive == 0 or (contenders > 1 and alive <= 1):
+            game["state"] = "gameover"
+    room["tick"] += 1
+
+
+def room_broadcast(server: Server, room: Room) -> None:
+    """生成本步快照，按各座位已确认的基准编码后发送；相同基准的座位共用一份报文。"""
+    frame = frame_from_game(room["game"], room_players(room), room["tick"], room["generation"])
+    history = room["history"]
+    history[frame["tick"]] = frame
+    while len(history) > cfg.NET_HISTORY:
+        history.popitem(last=False)
+    packets = {}
+    for seat in room["seats"]:
+        if seat is None:
+            continue
+        base = history.get(seat["ack"])
+        key = None if base is None else base["tick"]
+        if key not in packets:
+            packets[key] = snapshot_encode(frame, base)
+        data = packets[key]
+        room["bytes_out"] += len(data)
+        link_send(server["link"], server["loop"], server["transport"], data, seat["addr"])
+
+
+def room_metrics(room: Room) -> dict[str, Any]:
+    """汇总上次汇报以来的房间指标，并清零计数。"""
+    samples = sorted(room["work_ms"])
+    ticks = max(room["ticks"], 1)
+    metrics = {
+        "room": room["id"],
+        "players": sum(seat is not None for seat in room["seats"]),
+        "state": room["game"]["state"],
+        "balls": room["game"]["balls"]["count"],
+        "tick_ms": statistics.fmean(samples) if samples else 0.0,
+        "tick_ms_p99": samples[int(0.99 * (len(samples) - 1))] if samples else 0.0,
+        "bytes_out_per_tick": room["bytes_out"] / ticks,
+        "bytes_in_per_tick": room["bytes_in"] / ticks,
+    }
+    room["work_ms"].clear()
+    room["ticks"] = 0
+    room["bytes_out"] = 0
+    room["bytes_in"] = 0
+    return metrics
+
+
+# ============ 服务器 ============
+def server_create(link: dict[str, Any], max_rooms: int = 0, seed: int | None = None) -> Server:
+    """创建服务器状态；max_rooms 为 0 时不限房间数。"""
+    return {
+        "rooms": {},
+        "clients": {},
+        "link": link,
+        "max_rooms": max_rooms,
+        "rng": random.Random(seed),
+        "transport": None,
+        "loop": None,
+    }
+
+
+def server_find_room(server: Server, room_id: int) -> Room | None:
+    """找到可加入的房间：指定房间号时使用（不存在则新建），否则选第一个有空座位的房间。"""
+    rooms = server["rooms"]
+    if room_id == ANY_ROOM:
+        for room in rooms.values():
+            if None in room["seats"]:
+                return room
+        room_id = 0
+        while room_id in rooms:
+            room_id += 1
+    if room_id not in rooms:
+        if server["max_rooms"] and len(rooms) >= server["max_rooms"]:
+            return None
+        rooms[room_id] = room_create(room_id, server["rng"].randrange(2**63))
+    return rooms[room_id]
+
+
+def server_join(server: Server, addr: Any, room_id: int) -> None:
+    """处理加入请求；重复的请求（欢迎包丢失）只重发欢迎包。"""
+    if addr in server["clients"]:
+        room_id, index = server["clients"][addr]
+        room = server["rooms"][room_id]
+    else:
+        room = server_find_room(server, room_id)
+        if room is None or None not in room["seats"]:
+            link_send(server["link"], server["loop"], server["transport"], BARE.pack(MSG_FULL), addr)
+            return
+        index = room["seats"].index(None)
+        room["seats"][index] = seat_create(addr, server["loop"].time())
+        server["clients"][addr] = (room["id"], index)
+    data = WELCOME.pack(MSG_WELCOME, room["id"], index, len(room["seats"]))
+    link_send(server["link"], server["loop"], server["transport"], data, addr)
+
+
+def server_leave(server: Server, addr: Any) -> None:
+    """释放客户端的座位；房间空了就删除。"""
+    room_id, index = server["clients"].pop(addr)
+    room = server["rooms"][room_id]
+    room["seats"][index] = None
+    if all(seat is None for seat in room["seats"]):
+        del server["rooms"][room_id]
+
+
+def server_receive(server: Server, data: bytes, addr: Any) -> None:
+    """处理一个上行数据报；格式不对的包直接忽略。"""
+    if not data:
+        return
+    kind = data[0]
+    if kind == MSG_JOIN and len(data) == JOIN.size:
+        server_join(server, addr, JOIN.unpack(data)[1])
+        return
+    if addr not in server["clients"]:
+        return
+    if kind == MSG_LEAVE:
+        server_leave(server, addr)
+        return
+    if kind != MSG_INPUT or len(data) != INPUT.size:
+        return
+    room_id, index = server["clients"][addr]
+    room = server["rooms"][room_id]
+    seat = room["seats"][index]
+    room["bytes_in"] += len(data)
+    _, seq, ack, bits = INPUT.unpack(data)
+    seat["heard"] = server["loop"].time()
+    # 乱序到达的旧输入不覆盖新输入
+    if seq <= seat["seq"]:
+        return
+    seat["seq"] = seq
+    seat["move"] = bits_to_move(bits)
+    seat["ack"] = ack
+    if bits & INPUT_START:
+        seat["start"] = True
+
+
+def server_expire(server: Server) -> None:
+    """移除超过 NET_TIMEOUT 秒没有消息的客户端。"""
+    deadline = server["loop"].time() - cfg.NET_TIMEOUT
+    for addr, (room_id, index) in list(server["clients"].items()):
+        if server["rooms"][room_id]["seats"][index]["heard"] < deadline:
+            server_leave(server, addr)
+
+
+def server_tick(server: Server) -> None:
+    """所有房间推进一步，并按 NET_SNAPSHOT_EVERY 发送快照。"""
+    for room in server["rooms"].values():
+        start = time.perf_counter()
+        room_step(room, cfg.SIM_DT)
+        if room["tick"] % cfg.NET_SNAPSHOT_EVERY == 0:
+            room_broadcast(server, room)
+        room["work_ms"].append((time.perf_counter() - start) * 1000.0)
+        room["ticks"] += 1
+
+
+def server_report(server: Server) -> None:
+    """打印每个房间的指标与全部房间的合计。"""
+    rows = [room_metrics(room) for room in server["rooms"].values()]
+    for row in rows:
+        print(
+            f"room {row['room']:4d}  {row['players']} players  {row['state']:8s}  {row['balls']:4d} balls  "
+            f"tick {row['tick_ms']:.3f} ms (p99 {row['tick_ms_p99']:.3f})  "
+            f"out {row['bytes_out_per_tick']:.0f} B/tick  in {row['bytes_in_per_tick']:.0f} B/tick"
+        )
+    if rows:
+        busy = sum(row["tick_ms"] for row in rows)
+        print(f"{len(rows)} rooms: {busy:.3f} ms per tick of {cfg.SIM_DT * 1000:.1f} ms budget")
+
+
+async def server_run(server: Server, host: str, port: int, duration: float = 0.0, report_every: float = 5.0) -> None:
+    """绑定 UDP 端口并按固定步长运行，duration > 0 时运行这么多秒后退出。"""
+    loop = asyncio.get_running_loop()
+    server["loop"] = loop
+    # 不使用类：asyncio 只需要协议对象上有这几个回调
+    protocol = SimpleNamespace(
+        connection_made=lambda transport: None,
+        datagram_received=lambda data, addr: server_receive(server, data, addr),
+        error_received=lambda exc: None,
+        connection_lost=lambda exc: None,
+    )
+    transport, _ = await loop.create_datagram_endpoint(lambda: protocol, local_addr=(host, port))
+    server["transport"] = transport
+    print(f"listening on {host}:{port}")
+
+    start = loop.time()
+    next_tick = start
+    next_report = start + report_every
+    try:
+        while duration <= 0 or loop.time() - start < duration:
+            server_tick(server)
+            server_expire(server)
+            now = loop.time()
+            if report_every > 0 and now >= next_report:
+                server_report(server)
+                next_report = now + report_every
+            next_tick += cfg.SIM_DT
+            # 落后太多时放弃追赶，与 sim_clock_advance 的处理一致
+            if now - next_tick > cfg.MAX_CATCHUP_STEPS * cfg.SIM_DT:
+                next_tick = now
+            await asyncio.sleep(max(next_tick - now, 0.0))
+    finally:
+        server_report(server)
+        transport.close()
+
+
+def main() -> None:
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description="躲避球联机对战服务器")
+    parser.add_argument("--host", default=cfg.NET_HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=cfg.NET_PORT, help="UDP 端口")
+    parser.add_argument("--max-rooms", type=int, default=0, help="房间数上限，0 表示不限")
+    parser.add_argument("--duration", type=float, default=0.0, help="运行秒数，0 表示一直运行")
+    parser.add_argument("--report", type=float, default=5.0, help="指标汇报间隔（秒），0 表示只在退出时汇报")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟下行延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="模拟下行抖动（毫秒）")
+    parser.add_argument("--loss", type=float, default=0.0, help="模拟下行丢包率（0~1）")
+    parser.add_argument("--seed", type=int, default=None, help="房间种子与丢包的随机种子")
+    args = parser.parse_args()
+
+    server = server_create(link_create(args.latency, args.jitter, args.loss, args.seed), args.max_rooms, args.seed)
+    try:
+        asyncio.run(server_run(server, args.host, args.port, args.duration, args.report))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+﻿"""
+脚本化输入策略：无窗口模拟、批量试玩时代替键盘驱动玩家。
+
+每个策略都是 InputSource：接收 game 字典，返回移动向量 (dx, dy)。
+"""
+
+import random
+from typing import Callable
+
+import numpy as np
+
+import config as cfg
+
+InputSource = Callable[[dict], tuple[int, int]]
+
+# 方向键组合：八个方向加上原地不动
+MOVES = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+MOVE_VECTORS = np.array(MOVES, dtype=np.float64)
+MOVE_VECTORS[(MOVE_VECTORS != 0).all(axis=1)] /= np.sqrt(2)
+
+# 逃离策略只考虑这个距离以内的弹球
+FLEE_RADIUS = 160.0
+
+
+def input_idle(game: dict) -> tuple[int, int]:
+    """原地不动的输入源。"""
+    return 0, 0
+
+
+def input_random(seed: int | None = None, hold_frames: int = 15) -> InputSource:
+    """生成随机方向输入源，每个方向保持 hold_frames 帧。"""
+    rng = random.Random(seed)
+    state = {"move": (0, 0), "left": 0}
+
+    def source(game: dict) -> tuple[int, int]:
+        if state["left"] <= 0:
+            state["move"] = rng.choice(MOVES)
+            state["left"] = hold_frames
+        state["left"] -= 1
+        return state["move"]
+
+    return source
+
+
+def input_flee(seed: int | None = None) -> InputSource:
+    """逃离策略：把附近弹球和墙壁当作斥力源，选最接近合力方向的按键组合。"""
+
+    def source(game: dict) -> tuple[int, int]:
+        player = game["player"]
+        balls = game["balls"]
+        n = balls["count"]
+        px, py = player["x"], player["y"]
+        dx = px - balls["x"][:n]
+        dy = py - balls["y"][:n]
+        gap = np.maximum(np.hypot(dx, dy) - balls["r"][:n], 1.0)
+        near = gap < FLEE_RADIUS
+        # 斥力随距离平方衰减，方向背离弹球
+        weight = 1.0 / (gap[near] ** 3)
+        fx = float((dx[near] * weight).sum())
+        fy = float((dy[near] * weight).sum())
+
+        # 墙壁斥力，避免被逼进角落
+        margin = player["w"]
+        fx += 1.0 / max(px - margin, 1.0) ** 2 - 1.0 / max(cfg.WIDTH - margin - px, 1.0) ** 2
+        fy += 1.0 / max(py - margin, 1.0) ** 2 - 1.0 / max(cfg.HEIGHT - margin - py, 1.0) ** 2
+        if fx == 0.0 and fy == 0.0:
+            return 0, 0
+        best = int(np.argmax(MOVE_VECTORS @ np.array([fx, fy])))
+        return MOVES[best]
+
+    return source
+
+
+POLICIES = {
+    "idle": lambda seed: input_idle,
+    "random": input_random,
+    "flee": input_flee,
+}
+
+
+def policy_create(name: str, seed: int | None = None) -> InputSource:
+    """按名称创建策略输入源。"""
+    return POLICIES[name](seed)
@@ -0,0 +1,75 @@
+﻿"""
+画质调节器：根据最近的帧耗时在 cfg.QUALITY_TIERS 的档位之间切换，优先保证帧间隔稳定。
+
+- 降档：最近 QUALITY_WINDOW 帧耗时的 90 分位超过帧预算时降一档
+- 升档：连续若干帧耗时都低于预算的 QUALITY_RECOVER_RATIO 才升一档
+- 防抖：每次切换后清空观察窗口；刚升档又被迫降档时，下次升档需要等待的帧数加倍
+"""
+
+from typing import Any
+
+import numpy as np
+
+import config as cfg
+
+Governor = dict[str, Any]
+
+# 升档等待帧数的最大倍数
+RECOVER_BACKOFF_MAX = 8
+
+
+def governor_create(budget_ms: float, tier: int = 0) -> Governor:
+    """创建调节器；budget_ms 为单帧预算（毫秒）。"""
+    return {
+        "budget": budget_ms,
+        "tier": tier,
+        "samples": np.zeros(cfg.QUALITY_WINDOW, dtype=np.float64),
+        "count": 0,
+        "calm": 0,
+        "backoff": 1,
+        "last_change": 0,
+        "changes": 0,
+    }
+
+
+def governor_settings(gov: Governor) -> dict[str, Any]:
+    """返回当前档位的画质设置。"""
+    return cfg.QUALITY_TIERS[gov["tier"]]
+
+
+def _governor_set_tier(gov: Governor, tier: int) -> bool:
+    """切换档位并重新开始观察。"""
+    direction = tier - gov["tier"]
+    if direction > 0 and gov["last_change"] < 0:
+        # 刚升上去就扛不住：说明余量判断偏乐观，放慢下一次升档
+        gov["backoff"] = min(gov["backoff"] * 2, RECOVER_BACKOFF_MAX)
+    gov["tier"] = tier
+    gov["last_change"] = direction
+    gov["count"] = 0
+    gov["calm"] = 0
+    gov["changes"] += 1
+    return True
+
+
+def governor_update(gov: Governor, work_ms: float) -> bool:
+    """记录一帧的实际耗时（不含帧率限制的等待），档位发生变化时返回 True。"""
+    samples = gov["samples"]
+    samples[gov["count"] % len(samples)] = work_ms
+    gov["count"] += 1
+    if work_ms <= gov["budget"] * cfg.QUALITY_RECOVER_RATIO:
+        gov["calm"] += 1
+    else:
+        gov["calm"] = 0
+    if gov["count"] < len(samples):
+        return False
+    if gov["last_change"] < 0 and gov["count"] >= cfg.QUALITY_RECOVER_FRAMES:
+        # 升档后稳定运行了一个完整的恢复周期：升档等待恢复正常，之后再降档也不算"刚升就降"
+        gov["backoff"] = 1
+        gov["last_change"] = 0
+
+    tier = gov["tier"]
+    if tier < len(cfg.QUALITY_TIERS) - 1 and np.percentile(samples, 90) > gov["budget"]:
+        return _governor_set_tier(gov, tier + 1)
+    if tier > 0 and gov["calm"] >= cfg.QUALITY_RECOVER_FRAMES * gov["backoff"]:
+        return _governor_set_tier(gov, tier - 1)
+    return False
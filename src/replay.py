@@ -0,0 +1,159 @@
+﻿"""
+输入录像格式与录制：保存随机种子、配置指纹和每个模拟步的输入位掩码，
+回放见 replay_player.py。
+
+每个模拟步一个字节：
+- 低 4 位：方向（左、右、上、下）
+- 高位：本步之前发生的按键事件（开始、暂停、静音）
+字节流用 zlib 压缩，长时间按住同一方向时几乎不占空间。
+"""
+
+import hashlib
+import struct
+import zlib
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pygame
+
+import config as cfg
+
+Game = dict[str, Any]
+Recorder = dict[str, Any]
+Replay = dict[str, Any]
+
+REPLAY_MAGIC = b"DGRP"
+REPLAY_VERSION = 2
+# 魔数、版本、种子、配置指纹、总步数
+HEADER = struct.Struct("<4sHQ8sI")
+
+BIT_LEFT = 1
+BIT_RIGHT = 2
+BIT_UP = 4
+BIT_DOWN = 8
+MOVE_MASK = 0x0F
+# 按键事件位，回放时按此顺序派发
+KEY_BITS = (
+    (16, pygame.K_SPACE),
+    (32, pygame.K_p),
+    (64, pygame.K_m),
+)
+RECORDED_KEYS = {
+    pygame.K_SPACE: 16,
+    pygame.K_RETURN: 16,
+    pygame.K_p: 32,
+    pygame.K_m: 64,
+}
+
+# 会影响模拟结果的配置常量；纯视觉、音频、调试类的配置不参与指纹
+FINGERPRINT_KEYS = (
+    "WIDTH",
+    "HEIGHT",
+    "SIM_HZ",
+    "MOTION_HZ",
+    "BALL_COLORS",
+    "BALL_COLLISIONS",
+    "R_MIN",
+    "R_MAX",
+    "SPEED_MIN",
+    "SPEED_MAX",
+    "PLAYER_SIZE",
+    "PLAYER_SPEED",
+    "PLAYER_HP_MAX",
+    "DAMAGE_PER_HIT",
+    "HURT_COOLDOWN_FRAMES",
+    "INVINCIBLE_SPEED_MULT",
+    "BASE_SCORE_PER_SEC",
+    "LEVEL_INTERVAL",
+    "LEVEL_BONUS_PER_LEVEL",
+    "LEVEL_BALL_INCREMENT",
+    "LEVEL_INITIAL_BALLS",
+    "LEVEL_MAX_BALLS",
+    "SPAWN_CLEARANCE",
+)
+
+
+def config_fingerprint() -> bytes:
+    """计算影响玩法的配置常量指纹。"""
+    digest = hashlib.sha1()
+    for name in FINGERPRINT_KEYS:
+        digest.update(f"{name}={getattr(cfg, name)!r};".encode("utf-8"))
+    return digest.digest()[:8]
+
+
+def move_to_bits(move: tuple[int, int]) -> int:
+    """把移动向量编码为方向位。"""
+    dx, dy = move
+    bits = 0
+    if dx < 0:
+        bits |= BIT_LEFT
+    elif dx > 0:
+        bits |= BIT_RIGHT
+    if dy < 0:
+        bits |= BIT_UP
+    elif dy > 0:
+        bits |= BIT_DOWN
+    return bits
+
+
+def bits_to_move(bits: int) -> tuple[int, int]:
+    """把方向位解码为移动向量。"""
+    dx = (1 if bits & BIT_RIGHT else 0) - (1 if bits & BIT_LEFT else 0)
+    dy = (1 if bits & BIT_DOWN else 0) - (1 if bits & BIT_UP else 0)
+    return dx, dy
+
+
+def input_replay(game: Game) -> tuple[int, int]:
+    """录制/回放时使用的输入源：读取本步已确定的移动向量。"""
+    return game["replay_move"]
+
+
+# ============ 录制 ============
+def rec_create(game: Game) -> Recorder:
+    """为一局游戏创建录制器，并让游戏改用录制的输入。"""
+    game["input_source"] = input_replay
+    game["replay_move"] = (0, 0)
+    return {
+        "seed": game["seed"],
+        "fingerprint": config_fingerprint(),
+        "ticks": bytearray(),
+        "pending": 0,
+    }
+
+
+def rec_note_key(rec: Recorder, key: int) -> None:
+    """记下一个按键事件，写入下一个模拟步。"""
+    rec["pending"] |= RECORDED_KEYS.get(key, 0)
+
+
+def rec_tick(rec: Recorder, game: Game, move: tuple[int, int]) -> None:
+    """记录下一个模拟步的输入，调用方随后执行 game_update。"""
+    rec["ticks"].append(rec["pending"] | move_to_bits(move))
+    rec["pending"] = 0
+    game["replay_move"] = move
+
+
+def replay_tick_keys(bits: int) -> list[int]:
+    """返回某个模拟步之前需要派发的按键。"""
+    return [key for bit, key in KEY_BITS if bits & bit]
+
+
+def rec_save(rec: Recorder, path: Path) -> None:
+    """把录像写入二进制文件。"""
+    header = HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, rec["seed"], rec["fingerprint"], len(rec["ticks"]))
+    Path(path).write_bytes(header + zlib.compress(bytes(rec["ticks"]), 9))
+
+
+def replay_load(path: Path, check_config: bool = True) -> Replay:
+    """读取录像文件；配置指纹不一致时抛出 ValueError。"""
+    data = Path(path).read_bytes()
+    magic, version, seed, fingerprint, count = HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError(f"{path} 不是受支持的录像文件")
+    if check_config and fingerprint != config_fingerprint():
+        raise ValueError(f"{path} 录制时的配置与当前 config.py 不一致")
+    ticks = np.frombuffer(zlib.decompress(data[HEADER.size :]), dtype=np.uint8)
+    if len(ticks) != count:
+        raise ValueError(f"{path} 数据长度不符")
+    return {"seed": seed, "fingerprint": fingerprint, "ticks": ticks}
@@ -0,0 +1,111 @@
+﻿"""
+录像回放：无窗口、全速重演录像，可借助周期快照跳转到任意模拟步。
+
+用法（在项目根目录）：
+    python src/replay_player.py session.rpl
+    python src/replay_player.py session.rpl --seek 3600
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any
+
+import config as cfg
+from checkpoint import checkpoint_pack, checkpoint_restore
+from main import Game, game_create, game_handle_keydown, game_update
+from replay import MOVE_MASK, Replay, bits_to_move, input_replay, replay_load, replay_tick_keys
+
+Session = dict[str, Any]
+
+
+def sim_snapshot(game: Game) -> bytes:
+    """把当前模拟状态打包为二进制存档。"""
+    return bytes(checkpoint_pack(game))
+
+
+def sim_restore(game: Game, snapshot: bytes) -> None:
+    """把快照写回游戏（快照本身保持不变，可重复使用）。"""
+    checkpoint_restore(game, snapshot)
+
+
+def replay_create(replay: Replay, snapshot_every: int = 0) -> Session:
+    """创建回放会话；snapshot_every > 0 时每隔这么多步保存一次快照，用于跳转。"""
+    game = game_create(input_replay, with_hud=False, seed=replay["seed"])
+    game["replay_move"] = (0, 0)
+    session = {
+        "replay": replay,
+        "game": game,
+        "tick": 0,
+        "snapshot_every": snapshot_every,
+        "snapshots": {},
+    }
+    if snapshot_every > 0:
+        session["snapshots"][0] = sim_snapshot(game)
+    return session
+
+
+def replay_step(session: Session) -> None:
+    """重演一个模拟步：先派发按键，再推进游戏。"""
+    game = session["game"]
+    bits = int(session["replay"]["ticks"][session["tick"]])
+    for key in replay_tick_keys(bits):
+        game_handle_keydown(game, key)
+    game["replay_move"] = bits_to_move(bits & MOVE_MASK)
+    game_update(game, cfg.SIM_DT)
+    session["tick"] += 1
+    every = session["snapshot_every"]
+    if every > 0 and session["tick"] % every == 0 and session["tick"] not in session["snapshots"]:
+        session["snapshots"][session["tick"]] = sim_snapshot(game)
+
+
+def replay_run(session: Session, until: int | None = None) -> None:
+    """全速重演到第 until 步（默认到结尾）。"""
+    total = len(session["replay"]["ticks"])
+    until = total if until is None else min(until, total)
+    while session["tick"] < until:
+        replay_step(session)
+
+
+def replay_seek(session: Session, tick: int) -> None:
+    """跳到第 tick 步：从不晚于它的最近快照恢复，再重演剩余步数。"""
+    tick = max(0, min(tick, len(session["replay"]["ticks"])))
+    saved = [mark for mark in session["snapshots"] if mark <= tick]
+    best = max(saved) if saved else None
+    if tick < session["tick"] or (best is not None and best > session["tick"]):
+        if best is None:
+            # 没有可用快照：从头开始
+            session.update(replay_create(session["replay"], session["snapshot_every"]))
+        else:
+            sim_restore(session["game"], session["snapshots"][best])
+            session["tick"] = best
+    replay_run(session, tick)
+
+
+def main() -> None:
+    """命令行入口：全速回放录像并打印结果。"""
+    parser = argparse.ArgumentParser(description="回放躲避球录像")
+    parser.add_argument("path", type=Path, help="录像文件")
+    parser.add_argument("--seek", type=int, default=None, help="只回放到指定模拟步")
+    parser.add_argument("--snapshot-every", type=int, default=cfg.SIM_HZ * 10, help="快照间隔（步）")
+    parser.add_argument("--force", action="store_true", help="忽略配置指纹不一致")
+    args = parser.parse_args()
+
+    replay = replay_load(args.path, check_config=not args.force)
+    session = replay_create(replay, args.snapshot_every)
+    start = time.perf_counter()
+    replay_seek(session, len(replay["ticks"]) if args.seek is None else args.seek)
+    elapsed = time.perf_counter() - start
+
+    game = session["game"]
+    print(f"ticks: {session['tick']} / {len(replay['ticks'])}")
+    print(f"elapsed: {elapsed:.3f}s")
+    print(f"state: {game['state']}")
+    print(f"score: {int(game['score'])}  high: {game['high_score']}")
+    print(f"level: {game['level']['index'] + 1}")
+    if game["player"] is not None:
+        print(f"hp: {game['player']['hp']}")
+
+
+if __name__ == "__main__":
+    main()
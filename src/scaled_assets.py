@@ -0,0 +1,56 @@
+﻿"""
+按目标尺寸缓存的缩放资源：键里带上尺寸，同一资源的不同尺寸各存一份，超出容量时淘汰最久未用的。
+
+窗口在几个尺寸之间来回缩放时，回到用过的尺寸直接命中缓存，不再重新 smoothscale。
+只在主线程使用，不加锁。
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import pygame
+
+AssetStore = dict[str, Any]
+
+
+def asset_store_create(capacity: int) -> AssetStore:
+    """创建最多保存 capacity 项的缓存。"""
+    return {
+        "items": OrderedDict(),
+        "capacity": max(1, capacity),
+        "hits": 0,
+        "misses": 0,
+        "evictions": 0,
+    }
+
+
+def asset_store_put(store: AssetStore, key: Hashable, surface: pygame.Surface) -> None:
+    """放入一项（已存在则替换），超出容量时淘汰最久未用的项。"""
+    items = store["items"]
+    items[key] = surface
+    items.move_to_end(key)
+    while len(items) > store["capacity"]:
+        items.popitem(last=False)
+        store["evictions"] += 1
+
+
+def asset_store_get(
+    store: AssetStore, key: Hashable, build: Callable[[], pygame.Surface | None]
+) -> pygame.Surface | None:
+    """取出 key 对应的资源；未命中时调用 build 生成并放入（build 返回 None 时不缓存）。"""
+    items = store["items"]
+    surface = items.get(key)
+    if surface is not None:
+        items.move_to_end(key)
+        store["hits"] += 1
+        return surface
+    store["misses"] += 1
+    surface = build()
+    if surface is not None:
+        asset_store_put(store, key, surface)
+    return surface
+
+
+def asset_store_clear(store: AssetStore) -> None:
+    """清空缓存（例如显示模式改变后像素格式不再匹配）。"""
+    store["items"].clear()
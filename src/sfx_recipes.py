@@ -0,0 +1,129 @@
+﻿"""
+程序化音效配方：纯 NumPy 合成，返回采样率为 SR 的单声道 float32 采样（幅度在 [-1, 1] 内）。
+
+tools/generate_audio_assets.py 用它们导出 OGG；运行时 sfx_synth.py 直接合成到混音器缓冲区。
+"""
+
+import numpy as np
+
+SR = 44100
+
+
+def envelope(length: float, attack: float = 0.01, release: float = 0.1) -> np.ndarray:
+    """生成线性起音与释音的音量包络。"""
+    samples = max(1, int(length * SR))
+    env = np.ones(samples, dtype=np.float32)
+    attack_samples = max(1, int(min(attack, length) * SR))
+    release_samples = max(1, int(min(release, length) * SR))
+    env[:attack_samples] = np.linspace(0.0, 1.0, attack_samples, dtype=np.float32)
+    env[-release_samples:] = np.linspace(1.0, 0.0, release_samples, dtype=np.float32)
+    return env
+
+
+def white_noise(length: float, color: float = 1.0, rng=np.random) -> np.ndarray:
+    """生成白噪声；color 不为 1 时按频率幂次衰减着色。"""
+    samples = max(1, int(length * SR))
+    noise = rng.uniform(-1.0, 1.0, samples).astype(np.float32)
+    if color != 1.0:
+        spectrum = np.fft.rfft(noise.astype(np.float64))
+        freqs = np.fft.rfftfreq(samples, d=1.0 / SR)
+        spectrum *= np.power(np.maximum(freqs, 1.0), -color)
+        noise = np.fft.irfft(spectrum).astype(np.float32)
+    return noise
+
+
+def sine_wave(freq: float, length: float, phase: float = 0.0) -> np.ndarray:
+    """生成指定频率与时长的正弦波。"""
+    t = np.linspace(0, length, int(length * SR), endpoint=False, dtype=np.float32)
+    return np.sin(2 * np.pi * freq * t + phase)
+
+
+def normalize(samples: np.ndarray, peak: float = 0.9) -> np.ndarray:
+    """把峰值缩放到 peak。"""
+    max_val = float(np.max(np.abs(samples)))
+    if max_val == 0:
+        return samples
+    return samples * (peak / max_val)
+
+
+def make_hit(seed: int = 42) -> np.ndarray:
+    """受击：着色噪声加高频咔嗒声。"""
+    length = 0.18
+    # 每个配方自带随机数种子，单独重建或并行重建时结果都一样
+    noise = white_noise(length, color=0.2, rng=np.random.RandomState(seed))
+    click = sine_wave(880, length)
+    env = envelope(length, attack=0.005, release=0.12) * np.linspace(1.0, 0.2, len(noise), dtype=np.float32)
+    sound = (0.6 * noise + 0.4 * click) * env
+    return normalize(sound, 0.75)
+
+
+def make_levelup() -> np.ndarray:
+    """升级：三个上行音符。"""
+    notes = [392, 523.25, 659.25]
+    segment = 0.22
+    pause = 0.04
+    total_len = int((segment + pause) * len(notes) * SR)
+    sound = np.zeros(total_len, dtype=np.float32)
+    cursor = 0
+    for idx, freq in enumerate(notes):
+        wave = sine_wave(freq, segment) + 0.3 * sine_wave(freq * 2, segment)
+        env = envelope(segment, attack=0.01, release=0.08)
+        block = wave * env * (1.0 + 0.1 * idx)
+        end = cursor + len(block)
+        sound[cursor:end] += block
+        cursor = end + int(pause * SR)
+    return normalize(sound, 0.8)
+
+
+def make_start() -> np.ndarray:
+    """开局：四音琶音加低频铺底。"""
+    pattern = [261.63, 329.63, 392.0, 523.25]
+    durations = [0.18, 0.18, 0.18, 0.32]
+    pause = 0.03
+    total_samples = int((sum(durations) + pause * (len(pattern) - 1)) * SR)
+    sound = np.zeros(total_samples, dtype=np.float32)
+    cursor = 0
+    for freq, dur in zip(pattern, durations):
+        wave = sine_wave(freq, dur) + 0.4 * sine_wave(freq * 1.5, dur)
+        env = envelope(dur, attack=0.015, release=0.1)
+        block = wave * env
+        sound[cursor:cursor + len(block)] += block
+        cursor += len(block) + int(pause * SR)
+    shimmer = 0.2 * sine_wave(196.0, total_samples / SR)
+    return normalize(sound + shimmer, 0.85)
+
+
+def make_gameover() -> np.ndarray:
+    """结束：缓慢淡出的小调和弦。"""
+    length = 1.4
+    base = sine_wave(174.61, length)
+    minor = 0.5 * sine_wave(207.65, length)
+    low = 0.4 * sine_wave(130.81, length)
+    env = envelope(length, attack=0.02, release=0.8)
+    fade = np.linspace(1.0, 0.0, len(env), dtype=np.float32) ** 1.5
+    sound = (base + minor + low) * env * fade
+    return normalize(sound, 0.8)
+
+
+def make_bgm() -> np.ndarray:
+    """背景音乐：16 拍循环。"""
+    bpm = 90
+    beats = 16
+    seconds = beats * 60 / bpm
+    t = np.linspace(0, seconds, int(seconds * SR), endpoint=False, dtype=np.float32)
+    bass = 0.22 * np.sin(2 * np.pi * 110 * t)
+    beat_length = int((60 / bpm) * SR)
+    sequence = [261.63, 293.66, 329.63, 349.23, 392.0, 349.23, 329.63, 293.66]
+
+    # 整段旋律一次算完：每拍的相位与包络相同，只有频率按拍切换
+    phase_t = np.linspace(0, beat_length / SR, beat_length, endpoint=False, dtype=np.float32)
+    env = envelope(beat_length / SR, attack=0.01, release=0.2)
+    freqs = np.resize(np.array(sequence, dtype=np.float32), beats)[:, None]
+    osc1 = np.sin(2 * np.pi * freqs * phase_t)
+    osc2 = np.sin(2 * np.pi * freqs * 2 * phase_t)
+    lead = np.zeros_like(t)
+    lead[:beats * beat_length] = ((0.18 * osc1 + 0.1 * osc2) * env).ravel()
+
+    pad = 0.16 * np.sin(2 * np.pi * 440 * t) * envelope(seconds, attack=0.3, release=1.0)
+    rhythm = 0.08 * np.sign(np.sin(2 * np.pi * bpm / 60 * t * 2)).astype(np.float32)
+    return normalize(bass + lead + pad + rhythm, 0.6)
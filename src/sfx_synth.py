@@ -0,0 +1,69 @@
+﻿"""
+运行时音效合成：启动时直接用 sfx_recipes 的配方生成采样，写入 pygame.sndarray 缓冲区，
+跳过 OGG 解码。每个音效预先生成若干音高、音量略有不同的变体，连续播放时轮换使用。
+"""
+
+import numpy as np
+import pygame
+
+import config as cfg
+from sfx_recipes import SR, make_gameover, make_hit, make_levelup, make_start
+
+# 事件名 -> 配方，与 cfg.SOUND_FILES 的键一致
+SFX_RECIPES = {
+    "hit": make_hit,
+    "levelup": make_levelup,
+    "start": make_start,
+    "gameover": make_gameover,
+}
+
+
+def resample(samples: np.ndarray, step: float) -> np.ndarray:
+    """以 step 为步长线性插值重采样；step > 1 时音高升高、时长变短。"""
+    positions = np.arange(0.0, len(samples) - 1, step)
+    return np.interp(positions, np.arange(len(samples)), samples)
+
+
+def to_mixer_array(samples: np.ndarray, mixer: tuple[int, int, int]) -> np.ndarray:
+    """把 [-1, 1] 的单声道浮点采样转换为当前混音器格式的采样数组。"""
+    _, size, channels = mixer
+    bits = abs(size)
+    if bits == 32:
+        # pygame 的 32 位格式总是浮点（get_init 可能报告为 -32）
+        data = samples.astype(np.float32)
+    elif size < 0:
+        # 有符号整数
+        data = (samples * (2 ** (bits - 1) - 1)).astype(f"<i{bits // 8}")
+    else:
+        # 无符号整数，零点位于中间
+        data = ((samples + 1.0) * (2 ** (bits - 1) - 1)).astype(f"<u{bits // 8}")
+    if channels == 1:
+        return data
+    return np.repeat(data[:, None], channels, axis=1)
+
+
+def synth_variants(name: str, count: int, rng: np.random.Generator) -> list[pygame.mixer.Sound]:
+    """合成某个音效的 count 个变体；第一个保持原音高与音量。"""
+    mixer = pygame.mixer.get_init()
+    base = np.asarray(SFX_RECIPES[name](), dtype=np.float64)
+    variants = []
+    for index in range(count):
+        if index == 0:
+            pitch, volume = 1.0, 1.0
+        else:
+            pitch = 2.0 ** (rng.uniform(-1.0, 1.0) * cfg.SFX_PITCH_JITTER / 12.0)
+            volume = 1.0 - rng.uniform(0.0, cfg.SFX_VOLUME_JITTER)
+        # 一次插值同时完成采样率转换与变调
+        samples = resample(base, pitch * SR / mixer[0])
+        sound = pygame.sndarray.make_sound(np.ascontiguousarray(to_mixer_array(samples, mixer)))
+        sound.set_volume(cfg.SFX_VOLUME * volume)
+        variants.append(sound)
+    return variants
+
+
+def synth_sounds(count: int, seed: int = 0) -> dict[str, list[pygame.mixer.Sound]]:
+    """为全部音效生成变体；混音器未初始化时返回空字典。"""
+    if pygame.mixer.get_init() is None:
+        return {}
+    rng = np.random.default_rng(seed)
+    return {name: synth_variants(name, count, rng) for name in SFX_RECIPES}
@@ -0,0 +1,181 @@
+﻿"""
+均匀网格空间哈希：把弹球按所在格子排序，加速弹球互撞与玩家碰撞的查询。
+
+格子边长不小于最大直径（2 * R_MAX），所以两个相交的弹球一定位于
+同一格或相邻格；每帧只需检查 3x3 邻域而不是两两比较。
+"""
+
+import math
+from typing import Any
+
+import numpy as np
+
+import config as cfg
+from ball_store import BallStore
+
+Grid = dict[str, Any]
+
+# 只看"半个"邻域（本格 + 右、左下、下、右下），每对弹球只会被枚举一次
+HALF_NEIGHBORS = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+def grid_create(cell_size: float | None = None) -> Grid:
+    """按屏幕尺寸创建空网格。"""
+    cell = float(cell_size or cfg.GRID_CELL_SIZE)
+    cols = max(1, math.ceil(cfg.WIDTH / cell))
+    rows = max(1, math.ceil(cfg.HEIGHT / cell))
+    return {
+        "cell": cell,
+        "cols": cols,
+        "rows": rows,
+        "order": np.zeros(0, dtype=np.int64),
+        "keys": np.zeros(0, dtype=np.int32),
+        "starts": np.zeros(cols * rows + 1, dtype=np.int64),
+    }
+
+
+def grid_rebuild(grid: Grid, balls: BallStore) -> None:
+    """根据当前位置重排弹球下标。
+
+    沿用上一帧的排列作为起点做稳定排序：大多数弹球不会换格，
+    输入几乎有序，排序接近线性时间。
+    """
+    n = balls["count"]
+    cell = grid["cell"]
+    cols = grid["cols"]
+    cx = np.clip((balls["x"][:n] // cell).astype(np.int32), 0, cols - 1)
+    cy = np.clip((balls["y"][:n] // cell).astype(np.int32), 0, grid["rows"] - 1)
+    keys = cy * cols + cx
+
+    prev = grid["order"]
+    if len(prev) != n:
+        # 弹球数量变化：去掉越界的旧下标，追加新弹球的下标
+        prev = np.concatenate([prev[prev < n], np.arange(len(prev), n, dtype=np.int64)])
+    order = prev[np.argsort(keys[prev], kind="stable")]
+
+    sorted_keys = keys[order]
+    counts = np.bincount(sorted_keys, minlength=cols * grid["rows"])
+    grid["order"] = order
+    grid["keys"] = sorted_keys
+    grid["starts"][0] = 0
+    np.cumsum(counts, out=grid["starts"][1:])
+
+
+def grid_query_rect(grid: Grid, rect: tuple[float, float, float, float], margin: float) -> np.ndarray:
+    """返回与矩形（四周外扩 margin）重叠的格子中全部弹球的下标。"""
+    left, top, right, bottom = rect
+    cell = grid["cell"]
+    cols = grid["cols"]
+    c0 = max(0, int((left - margin) // cell))
+    c1 = min(cols - 1, int((right + margin) // cell))
+    r0 = max(0, int((top - margin) // cell))
+    r1 = min(grid["rows"] - 1, int((bottom + margin) // cell))
+    if c0 > c1 or r0 > r1:
+        return np.zeros(0, dtype=np.int64)
+
+    # 同一行内相邻的格子在排序后的数组里是连续的一段
+    starts = grid["starts"]
+    order = grid["order"]
+    pieces = [order[starts[row * cols + c0] : starts[row * cols + c1 + 1]] for row in range(r0, r1 + 1)]
+    return np.concatenate(pieces)
+
+
+def _expand_ranges(owner: np.ndarray, begin: np.ndarray, end: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """把每个 owner 对应的 [begin, end) 区间展开为 (owner, 位置) 对。"""
+    counts = np.maximum(end - begin, 0)
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(owner, counts), np.repeat(begin, counts) + offsets
+
+
+def grid_candidate_pairs(grid: Grid) -> tuple[np.ndarray, np.ndarray]:
+    """枚举可能相交的弹球对 (i, j)，每对只出现一次。"""
+    keys = grid["keys"]
+    starts = grid["starts"]
+    order = grid["order"]
+    cols = grid["cols"]
+    rows = grid["rows"]
+    pos = np.arange(len(keys))
+    cx = keys % cols
+    cy = keys // cols
+
+    # 同一格：只与排在自己后面的弹球配对
+    first, second = _expand_ranges(pos, pos + 1, starts[keys + 1])
+    pairs_i = [first]
+    pairs_j = [second]
+
+    for ox, oy in HALF_NEIGHBORS:
+        nx = cx + ox
+        ny = cy + oy
+        valid = (nx >= 0) & (nx < cols) & (ny < rows)
+        nkeys = ny[valid] * cols + nx[valid]
+        first, second = _expand_ranges(pos[valid], starts[nkeys], starts[nkeys + 1])
+        pairs_i.append(first)
+        pairs_j.append(second)
+
+    return order[np.concatenate(pairs_i)], order[np.concatenate(pairs_j)]
+
+
+def balls_resolve_collisions(grid: Grid, balls: BallStore) -> int:
+    """处理弹球之间的弹性碰撞，返回本帧发生碰撞的对数。
+
+    质量按半径平方计算；相向运动的弹球沿连心线交换动量，
+    并把重叠部分按质量比推开，避免粘连。
+    """
+    i, j = grid_candidate_pairs(grid)
+    if len(i) == 0:
+        return 0
+    n = balls["count"]
+    x = balls["x"][:n]
+    y = balls["y"][:n]
+    vx = balls["vx"][:n]
+    vy = balls["vy"][:n]
+    r = balls["r"][:n]
+
+    dx = x[j] - x[i]
+    dy = y[j] - y[i]
+    dist2 = dx * dx + dy * dy
+    reach = r[i] + r[j]
+    touching = (dist2 < reach * reach) & (dist2 > 0)
+    if not touching.any():
+        return 0
+    i = i[touching]
+    j = j[touching]
+    dist = np.sqrt(dist2[touching])
+    nx = dx[touching] / dist
+    ny = dy[touching] / dist
+
+    mi = r[i] * r[i]
+    mj = r[j] * r[j]
+    share_i = mj / (mi + mj)
+    share_j = mi / (mi + mj)
+
+    # 沿法线的相对速度 < 0 表示正在靠近，只对这些弹球交换动量
+    v_rel = np.minimum((vx[j] - vx[i]) * nx + (vy[j] - vy[i]) * ny, 0.0)
+    push_i = 2 * share_i * v_rel
+    push_j = -2 * share_j * v_rel
+    vx += np.bincount(i, push_i * nx, n) + np.bincount(j, push_j * nx, n)
+    vy += np.bincount(i, push_i * ny, n) + np.bincount(j, push_j * ny, n)
+
+    # 拥挤时一个弹球会同时吃到多份冲量，把速度限制在配置范围内，防止越撞越快或停住
+    touched = np.unique(np.concatenate([i, j]))
+    speed = np.hypot(vx[touched], vy[touched])
+    scale = np.clip(speed, cfg.SPEED_MIN, cfg.SPEED_MAX) / np.maximum(speed, 1e-9)
+    vx[touched] *= scale
+    vy[touched] *= scale
+
+    # 重叠部分按接触数平均后推开，避免一个弹球被多次推过头
+    contacts = np.bincount(i, minlength=n) + np.bincount(j, minlength=n)
+    weight_i = 1.0 / contacts[i]
+    weight_j = 1.0 / contacts[j]
+    overlap = reach[touching] - dist
+    push_i = -overlap * share_i * weight_i
+    push_j = overlap * share_j * weight_j
+    x += np.bincount(i, push_i * nx, n) + np.bincount(j, push_j * nx, n)
+    y += np.bincount(i, push_i * ny, n) + np.bincount(j, push_j * ny, n)
+    np.clip(x, r, cfg.WIDTH - r, out=x)
+    np.clip(y, r, cfg.HEIGHT - r, out=y)
+    return len(i)
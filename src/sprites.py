@@ -0,0 +1,95 @@
+﻿"""
+弹球精灵缓存：每种 (半径, 颜色) 只光栅化一次，之后每帧直接 blit。
+
+半径取值在 R_MIN..R_MAX 之间，颜色只有 BALL_COLORS 中几种，缓存很小。
+按比例渲染时半径是缩放后的像素半径，不同窗口尺寸会用到不同的半径，
+缓存按 SPRITE_CACHE_LIMIT 淘汰最久未用的精灵。
+"""
+
+import pygame
+
+import config as cfg
+from scaled_assets import AssetStore, asset_store_clear, asset_store_create, asset_store_get
+
+SpriteKey = tuple[int, int]
+
+sprite_cache: AssetStore = asset_store_create(cfg.SPRITE_CACHE_LIMIT)
+# 低画质档位使用的纯色圆精灵，与 sprite_cache 分开保存，切换档位时两边都不用重建
+flat_sprite_cache: AssetStore = asset_store_create(cfg.SPRITE_CACHE_LIMIT)
+shaded_bases: dict[int, pygame.Surface] | None = None
+
+# 生成的弹球图片四周留有 4 像素透明边
+SHADED_PADDING = 4
+
+
+def sprite_cache_clear() -> None:
+    """清空精灵缓存（例如显示模式改变后）。"""
+    global shaded_bases
+    asset_store_clear(sprite_cache)
+    asset_store_clear(flat_sprite_cache)
+    shaded_bases = None
+
+
+def _surface_ready(surface: pygame.Surface, alpha: bool) -> pygame.Surface:
+    """尽量转换成与屏幕一致的像素格式；尚无窗口时保持原样。"""
+    try:
+        return surface.convert_alpha() if alpha else surface.convert()
+    except pygame.error:
+        return surface
+
+
+def load_shaded_bases() -> dict[int, pygame.Surface]:
+    """加载 tools/generate_visual_assets.py 生成的带明暗弹球图，按直径索引。"""
+    bases: dict[int, pygame.Surface] = {}
+    if not cfg.BALL_USE_SHADED_SPRITES:
+        return bases
+    for diameter, path in cfg.IMAGE_BALL_SPRITES.items():
+        if not path.is_file():
+            continue
+        try:
+            image = pygame.image.load(str(path))
+        except pygame.error:
+            continue
+        inner = pygame.Rect(SHADED_PADDING, SHADED_PADDING, diameter, diameter)
+        bases[diameter] = image.subsurface(inner).copy()
+    return bases
+
+
+def make_flat_sprite(radius: int, color: tuple[int, int, int]) -> pygame.Surface:
+    """用纯色圆生成精灵，外观与 pygame.draw.circle 一致。"""
+    size = radius * 2
+    surface = pygame.Surface((size, size))
+    surface.fill((0, 0, 0))
+    surface.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+    pygame.draw.circle(surface, color, (radius, radius), radius)
+    return _surface_ready(surface, alpha=False)
+
+
+def make_shaded_sprite(base: pygame.Surface, radius: int, color: tuple[int, int, int]) -> pygame.Surface:
+    """把带明暗的弹球图缩放到目标大小，再去色并乘上弹球颜色。"""
+    size = radius * 2
+    surface = pygame.transform.smoothscale(base, (size, size))
+    if hasattr(pygame.transform, "grayscale"):
+        surface = pygame.transform.grayscale(surface)
+    surface.fill(color, special_flags=pygame.BLEND_RGB_MULT)
+    return _surface_ready(surface, alpha=True)
+
+
+def ball_sprite(radius: int, color_index: int, shaded: bool = True) -> pygame.Surface:
+    """取出 (半径, 颜色下标) 对应的精灵，第一次使用时生成；shaded=False 时总是纯色圆。"""
+    key = (radius, color_index)
+    color = cfg.BALL_COLORS[color_index]
+    if not shaded:
+        return asset_store_get(flat_sprite_cache, key, lambda: make_flat_sprite(radius, color))
+    return asset_store_get(sprite_cache, key, lambda: _build_shaded(radius, color))
+
+
+def _build_shaded(radius: int, color: tuple[int, int, int]) -> pygame.Surface:
+    """用最接近目标直径的明暗底图生成精灵；没有底图时退回纯色圆。"""
+    global shaded_bases
+    if shaded_bases is None:
+        shaded_bases = load_shaded_bases()
+    if not shaded_bases:
+        return make_flat_sprite(radius, color)
+    nearest = min(shaded_bases, key=lambda diameter: abs(diameter - radius * 2))
+    return make_shaded_sprite(shaded_bases[nearest], radius, color)
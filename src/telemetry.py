@@ -0,0 +1,150 @@
+﻿"""
+遥测发布：每帧把一条定长记录写入 multiprocessing.shared_memory 里的环形缓冲区，供外部看板读取。
+
+只有游戏一个写入者，不加锁，也不等待读取方：
+- 每条记录带序号 seq（第 n 条记录为 n + 1）；写入前先把 seq 置 0，字段写完再写入序号
+- 全部字段写完后才更新头部的 write_seq（已写入的记录总数）
+读取方按 write_seq 复制新记录，丢弃 seq 不符或在复制期间被覆盖的记录
+（见 tools/telemetry_reader.py 的 telemetry_read）。读取方跟不上时只会丢数据，游戏不受影响。
+
+所有数组都在创建时映射到共享内存上，每帧只做标量写入，不分配缓冲区。
+"""
+
+import os
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any
+
+import numpy as np
+
+import config as cfg
+
+Telemetry = dict[str, Any]
+
+TELEMETRY_MAGIC = b"DGTL"
+TELEMETRY_VERSION = 1
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S4"),
+        ("version", "<u4"),
+        ("capacity", "<u4"),
+        ("record_size", "<u4"),
+        ("pid", "<u4"),
+        ("reserved", "<u4"),
+        ("write_seq", "<u8"),
+    ]
+)
+RECORD_DTYPE = np.dtype(
+    [
+        ("seq", "<u8"),
+        ("time", "<f8"),  # time.time()，方便与外部日志对齐
+        ("frame_ms", "<f4"),  # 本帧 clock.tick 返回的帧间隔
+        ("work_ms", "<f4"),  # 上一帧的实际工作耗时（clock.get_rawtime，不含限帧等待）
+        ("score", "<f4"),
+        ("balls", "<u4"),
+        ("hits", "<u4"),  # 进程启动以来累计受击次数
+        ("level", "<u2"),
+        ("hp", "<i2"),  # 没有玩家时为 -1
+        ("state", "u1"),
+        ("quality", "u1"),  # 画质档位
+        ("reserved", "u1", (6,)),
+    ]
+)
+
+
+def telemetry_size(capacity: int) -> int:
+    """返回容纳 capacity 条记录的共享内存字节数。"""
+    return HEADER_DTYPE.itemsize + capacity * RECORD_DTYPE.itemsize
+
+
+def telemetry_views(buf: Any, capacity: int) -> tuple[np.ndarray, np.ndarray]:
+    """在共享内存上建立头部与记录数组的视图。"""
+    header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buf)
+    records = np.ndarray((capacity,), dtype=RECORD_DTYPE, buffer=buf, offset=HEADER_DTYPE.itemsize)
+    return header, records
+
+
+def telemetry_attach(name: str) -> shared_memory.SharedMemory:
+    """作为读取方打开已有的共享内存；读取方退出时不会把它删除。"""
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # Python 3.13 之前没有 track 参数，需要手动取消登记
+        shm = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def telemetry_create(name: str | None = None, capacity: int | None = None) -> Telemetry | None:
+    """创建（或接管上次异常退出遗留的）共享内存并清空；系统不支持时返回 None。"""
+    name = name or cfg.TELEMETRY_NAME
+    capacity = capacity or cfg.TELEMETRY_CAPACITY
+    size = telemetry_size(capacity)
+    try:
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+    except OSError:
+        return None
+
+    header, records = telemetry_views(shm.buf, capacity)
+    records[:] = np.zeros((), dtype=RECORD_DTYPE)
+    header["write_seq"] = 0
+    header["capacity"] = capacity
+    header["record_size"] = RECORD_DTYPE.itemsize
+    header["pid"] = os.getpid()
+    header["version"] = TELEMETRY_VERSION
+    # 魔数最后写入，读取方看到魔数时其余头部字段已就绪
+    header["magic"] = TELEMETRY_MAGIC
+    return {
+        "shm": shm,
+        "header": header,
+        "records": records,
+        # 每个字段一个跨步视图，写入时不再经过结构化记录
+        "fields": {field: records[field] for field in RECORD_DTYPE.names},
+        "capacity": capacity,
+        "count": 0,
+        "hits": 0,
+        "last_hp": None,
+    }
+
+
+def telemetry_publish(
+    tel: Telemetry, game: dict[str, Any], now: float, frame_ms: float, work_ms: float, quality: int
+) -> None:
+    """写入本帧的一条记录；受击事件由玩家生命值减少推断。"""
+    player = game["player"]
+    hp = player["hp"] if player is not None else -1
+    last_hp = tel["last_hp"]
+    if last_hp is not None and 0 <= hp < last_hp:
+        tel["hits"] += 1
+    tel["last_hp"] = hp
+
+    n = tel["count"]
+    slot = n % tel["capacity"]
+    fields = tel["fields"]
+    fields["seq"][slot] = 0
+    fields["time"][slot] = now
+    fields["frame_ms"][slot] = frame_ms
+    fields["work_ms"][slot] = work_ms
+    fields["score"][slot] = game["score"]
+    fields["balls"][slot] = game["balls"]["count"]
+    fields["hits"][slot] = tel["hits"]
+    fields["level"][slot] = game["level"]["index"]
+    fields["hp"][slot] = hp
+    fields["state"][slot] = cfg.GAME_STATES.index(game["state"])
+    fields["quality"][slot] = quality
+    fields["seq"][slot] = n + 1
+    tel["count"] = n + 1
+    tel["header"]["write_seq"] = n + 1
+
+
+def telemetry_close(tel: Telemetry) -> None:
+    """释放视图并删除共享内存。"""
+    tel["header"] = tel["records"] = tel["fields"] = None
+    tel["shm"].close()
+    tel["shm"].unlink()
@@ -0,0 +1,210 @@
+﻿"""
+向量化多环境：在一组 NumPy 批量数组里同时运行 N 局独立的游戏，供训练躲避机器人使用。
+
+规则与 game_update / level_tick / player_take_damage_if_hit 一致：
+升级补球 → 弹球移动与墙壁反弹 → 玩家移动与冷却 → 碰撞扣血 → 计分 → 判定结束。
+不模拟弹球互撞（BALL_COLLISIONS）。
+每步恰好推进一个基准刻度，要求 SIM_HZ == MOTION_HZ；不实现 game_update 在多刻度步长下的扫掠碰撞。
+
+所有状态都是形状为 (N,) 或 (N, M) 的数组，M = LEVEL_MAX_BALLS；
+每局的弹球占据前 count 个槽位，alive 标记有效槽位。
+"""
+
+from typing import Any
+
+import numpy as np
+
+import config as cfg
+from policies import MOVES
+
+VecEnv = dict[str, Any]
+
+# 动作编号 0..8 对应 policies.MOVES 中的方向组合
+ACTION_DX = np.array([move[0] for move in MOVES], dtype=np.float64)
+ACTION_DY = np.array([move[1] for move in MOVES], dtype=np.float64)
+ACTION_NORM = np.where((ACTION_DX != 0) & (ACTION_DY != 0), np.sqrt(2), 1.0)
+NUM_ACTIONS = len(MOVES)
+
+
+def venv_create(num_envs: int, seed: int | None = None, max_steps: int = 0, hit_penalty: float = 1.0) -> VecEnv:
+    """创建 num_envs 局并行游戏并全部重置。
+
+    max_steps > 0 时单局最多运行这么多步（超出视为截断并自动重置）；
+    hit_penalty 为每次受击从奖励中扣除的值。
+    """
+    if cfg.SIM_HZ != cfg.MOTION_HZ:
+        raise ValueError(f"vec_env 每步推进一个基准刻度，需要 SIM_HZ == MOTION_HZ（当前 {cfg.SIM_HZ} / {cfg.MOTION_HZ}）")
+    slots = cfg.LEVEL_MAX_BALLS
+    shape = (num_envs, slots)
+    env: VecEnv = {
+        "num_envs": num_envs,
+        "slots": slots,
+        "rng": np.random.default_rng(seed),
+        "max_steps": max_steps,
+        "hit_penalty": hit_penalty,
+        "bx": np.zeros(shape),
+        "by": np.zeros(shape),
+        "bvx": np.zeros(shape),
+        "bvy": np.zeros(shape),
+        "br": np.ones(shape),
+        "alive": np.zeros(shape, dtype=bool),
+        "count": np.zeros(num_envs, dtype=np.int64),
+        "px": np.zeros(num_envs),
+        "py": np.zeros(num_envs),
+        "hp": np.zeros(num_envs, dtype=np.int64),
+        "hurt_cd": np.zeros(num_envs, dtype=np.int64),
+        "level": np.zeros(num_envs, dtype=np.int64),
+        "timer": np.zeros(num_envs),
+        "score": np.zeros(num_envs),
+        "steps": np.zeros(num_envs, dtype=np.int64),
+        "slot_index": np.arange(slots),
+    }
+    venv_reset(env)
+    return env
+
+
+def _venv_desired_count(env: VecEnv) -> np.ndarray:
+    """与 level_desired_ball_count 相同：每局当前关卡应有的弹球数。"""
+    desired = cfg.LEVEL_INITIAL_BALLS + env["level"] * cfg.LEVEL_BALL_INCREMENT
+    return np.minimum(desired, env["slots"])
+
+
+def _venv_spawn(env: VecEnv, fill: np.ndarray) -> None:
+    """在 fill 为真的槽位上一次性随机生成弹球（与 ball_store_spawn 同分布）。"""
+    k = int(fill.sum())
+    if k == 0:
+        return
+    rng = env["rng"]
+    radius = rng.integers(cfg.R_MIN, cfg.R_MAX + 1, k).astype(np.float64)
+    angle = rng.uniform(0.0, 2 * np.pi, k)
+    speed = rng.uniform(cfg.SPEED_MIN, cfg.SPEED_MAX, k)
+    env["br"][fill] = radius
+    env["bx"][fill] = rng.uniform(radius, cfg.WIDTH - radius)
+    env["by"][fill] = rng.uniform(radius, cfg.HEIGHT - radius)
+    env["bvx"][fill] = np.cos(angle) * speed
+    env["bvy"][fill] = np.sin(angle) * speed
+    env["alive"][fill] = True
+
+
+def _venv_fill_to_desired(env: VecEnv) -> None:
+    """按关卡补足各局弹球数量（只增不减）。"""
+    desired = np.maximum(_venv_desired_count(env), env["count"])
+    slot = env["slot_index"][None, :]
+    fill = (slot >= env["count"][:, None]) & (slot < desired[:, None])
+    _venv_spawn(env, fill)
+    env["count"] = desired
+
+
+def venv_reset(env: VecEnv, mask: np.ndarray | None = None) -> dict[str, np.ndarray]:
+    """重置 mask 选中的各局（默认全部），返回全部观测。"""
+    if mask is None:
+        mask = np.ones(env["num_envs"], dtype=bool)
+    env["alive"][mask] = False
+    env["count"][mask] = 0
+    env["px"][mask] = cfg.WIDTH / 2
+    env["py"][mask] = cfg.HEIGHT / 2
+    env["hp"][mask] = cfg.PLAYER_HP_MAX
+    env["hurt_cd"][mask] = 0
+    env["level"][mask] = 0
+    env["timer"][mask] = 0.0
+    env["score"][mask] = 0.0
+    env["steps"][mask] = 0
+    _venv_fill_to_desired(env)
+    return venv_observe(env)
+
+
+def venv_observe(env: VecEnv) -> dict[str, np.ndarray]:
+    """生成归一化观测：玩家 (N, 4)，弹球 (N, M, 5)，有效槽位 (N, M)。"""
+    player = np.stack(
+        [
+            env["px"] / cfg.WIDTH,
+            env["py"] / cfg.HEIGHT,
+            env["hp"] / cfg.PLAYER_HP_MAX,
+            (env["hurt_cd"] > 0).astype(np.float64),
+        ],
+        axis=1,
+    )
+    balls = np.stack(
+        [
+            (env["bx"] - env["px"][:, None]) / cfg.WIDTH,
+            (env["by"] - env["py"][:, None]) / cfg.HEIGHT,
+            env["bvx"] / cfg.SPEED_MAX,
+            env["bvy"] / cfg.SPEED_MAX,
+            env["br"] / cfg.R_MAX,
+        ],
+        axis=2,
+    )
+    balls[~env["alive"]] = 0.0
+    return {"player": player, "balls": balls, "alive": env["alive"].copy()}
+
+
+def venv_step(
+    env: VecEnv, actions: np.ndarray
+) -> tuple[dict[str, np.ndarray], np.ndarray, np.ndarray, dict[str, np.ndarray]]:
+    """所有局同时推进一个模拟步。
+
+    actions: 形状 (N,) 的动作编号（0..8）。
+    返回 (obs, reward, done, info)；done 的局已自动重置，obs 为重置后的观测，
+    info["final_score"] / info["final_level"] 记录这些局结束时的数据。
+    """
+    dt = cfg.SIM_DT
+    score_before = env["score"].copy()
+
+    # 关卡计时与升级补球
+    env["timer"] += dt
+    leveled = np.floor(env["timer"] / cfg.LEVEL_INTERVAL).astype(np.int64)
+    if leveled.any():
+        env["timer"] -= leveled * cfg.LEVEL_INTERVAL
+        env["level"] += leveled
+        _venv_fill_to_desired(env)
+
+    # 弹球移动与墙壁反弹
+    bx, by, bvx, bvy, br = env["bx"], env["by"], env["bvx"], env["bvy"], env["br"]
+    bx += bvx
+    by += bvy
+    right = cfg.WIDTH - br
+    np.negative(bvx, out=bvx, where=(bx <= br) | (bx >= right))
+    np.maximum(bx, br, out=bx)
+    np.minimum(bx, right, out=bx)
+    bottom = cfg.HEIGHT - br
+    np.negative(bvy, out=bvy, where=(by <= br) | (by >= bottom))
+    np.maximum(by, br, out=by)
+    np.minimum(by, bottom, out=by)
+
+    # 玩家移动与无敌冷却
+    actions = np.asarray(actions, dtype=np.int64)
+    hurt = env["hurt_cd"] > 0
+    speed = cfg.PLAYER_SPEED * np.where(hurt, cfg.INVINCIBLE_SPEED_MULT, 1.0)
+    half = cfg.PLAYER_SIZE / 2
+    env["px"] = np.clip(env["px"] + speed * ACTION_DX[actions] / ACTION_NORM[actions], half, cfg.WIDTH - half)
+    env["py"] = np.clip(env["py"] + speed * ACTION_DY[actions] / ACTION_NORM[actions], half, cfg.HEIGHT - half)
+    env["hurt_cd"] = np.maximum(env["hurt_cd"] - 1, 0)
+
+    # 碰撞：冷却结束且仍存活的局，任意一个有效弹球与玩家矩形相交即受击
+    px = env["px"][:, None]
+    py = env["py"][:, None]
+    dx = np.maximum(np.maximum((px - half) - bx, bx - (px + half)), 0.0)
+    dy = np.maximum(np.maximum((py - half) - by, by - (py + half)), 0.0)
+    touching = ((dx * dx + dy * dy) <= br * br) & env["alive"]
+    hit = touching.any(axis=1) & (env["hurt_cd"] == 0) & (env["hp"] > 0)
+    env["hp"] = np.where(hit, np.maximum(env["hp"] - cfg.DAMAGE_PER_HIT, 0), env["hp"])
+    env["hurt_cd"] = np.where(hit, cfg.HURT_COOLDOWN_FRAMES, env["hurt_cd"])
+
+    # 计分
+    env["score"] += dt * (cfg.BASE_SCORE_PER_SEC + env["level"] * cfg.LEVEL_BONUS_PER_LEVEL)
+    env["steps"] += 1
+    reward = env["score"] - score_before - env["hit_penalty"] * hit
+
+    done = env["hp"] <= 0
+    if env["max_steps"] > 0:
+        done |= env["steps"] >= env["max_steps"]
+    info = {
+        "hit": hit,
+        "final_score": np.where(done, env["score"], 0.0),
+        "final_level": np.where(done, env["level"] + 1, 0),
+    }
+    if done.any():
+        obs = venv_reset(env, done)
+    else:
+        obs = venv_observe(env)
+    return obs, reward, done, info
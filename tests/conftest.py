@@ -0,0 +1,13 @@
+﻿"""
+测试公共设置：把 src 加入导入路径，并让 pygame 使用无窗口、无声卡的驱动。
+"""
+
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
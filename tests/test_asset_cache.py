@@ -0,0 +1,31 @@
+﻿"""
+资源磁盘缓存：清理只删除源文件已改动（哈希不再匹配）的旧缓存。
+"""
+
+import numpy as np
+
+import config as cfg
+from asset_cache import cache_file, cache_prune, cache_store
+
+
+def test_prune_keeps_current_hashes(monkeypatch, tmp_path):
+    monkeypatch.setattr(cfg, "CACHE_DIR", tmp_path / "cache")
+    sound = tmp_path / "hit-low.ogg"
+    image = tmp_path / "bg.png"
+    sound.write_bytes(b"old sound")
+    image.write_bytes(b"image")
+    stale = cache_file("pcm", sound, "44100hz")
+    cache_store(stale, np.zeros(4))
+    sound.write_bytes(b"new sound")
+    current = [
+        cache_file("pcm", sound, "44100hz"),
+        cache_file("bg", image, "800x600"),
+        cache_file("bg", image, "400x300"),
+    ]
+    for file in current:
+        cache_store(file, np.zeros(4))
+
+    assert cache_prune([sound, image, tmp_path / "missing.ogg"]) == 1
+    assert not stale.exists()
+    assert all(file.exists() for file in current)
+    assert cache_prune([sound, image]) == 0
@@ -0,0 +1,95 @@
+﻿"""
+弹球存储：向量化推进与逐个弹球的标量写法一致；批量生成遵守与玩家的安全距离。
+"""
+
+import numpy as np
+
+import config as cfg
+from ball_store import ball_store_create, ball_store_spawn, ball_store_truncate, ball_store_update
+
+
+def ball_update_scalar(ball: dict) -> None:
+    """逐个弹球的参考实现：推进一个刻度并处理四面墙的反弹。"""
+    ball["x"] += ball["vx"]
+    ball["y"] += ball["vy"]
+    radius = ball["r"]
+    if ball["x"] <= radius:
+        ball["x"] = radius
+        ball["vx"] = -ball["vx"]
+    elif ball["x"] >= cfg.WIDTH - radius:
+        ball["x"] = cfg.WIDTH - radius
+        ball["vx"] = -ball["vx"]
+    if ball["y"] <= radius:
+        ball["y"] = radius
+        ball["vy"] = -ball["vy"]
+    elif ball["y"] >= cfg.HEIGHT - radius:
+        ball["y"] = cfg.HEIGHT - radius
+        ball["vy"] = -ball["vy"]
+
+
+def test_update_matches_scalar_reference():
+    store = ball_store_create(256)
+    ball_store_spawn(store, 256, np.random.default_rng(1))
+    # 一部分球贴墙放置，第一步就要反弹
+    store["x"][:8] = store["r"][:8]
+    store["y"][8:16] = cfg.HEIGHT - store["r"][8:16]
+    n = store["count"]
+    balls = [{name: float(store[name][i]) for name in ("x", "y", "vx", "vy", "r")} for i in range(n)]
+
+    for _ in range(300):
+        ball_store_update(store)
+        for ball in balls:
+            ball_update_scalar(ball)
+
+    for name in ("x", "y", "vx", "vy"):
+        expected = np.array([ball[name] for ball in balls])
+        np.testing.assert_allclose(store[name][:n], expected, rtol=0, atol=1e-9)
+
+
+def test_update_keeps_balls_inside():
+    store = ball_store_create(64)
+    ball_store_spawn(store, 64, np.random.default_rng(2))
+    n = store["count"]
+    for _ in range(1000):
+        ball_store_update(store)
+    r = store["r"][:n]
+    assert np.all(store["x"][:n] >= r) and np.all(store["x"][:n] <= cfg.WIDTH - r)
+    assert np.all(store["y"][:n] >= r) and np.all(store["y"][:n] <= cfg.HEIGHT - r)
+
+
+def test_spawn_keeps_clearance():
+    rng = np.random.default_rng(4)
+    # 场地中央、贴墙、角落
+    for avoid in ((400.0, 300.0), (16.0, 300.0), (784.0, 584.0)):
+        # 350 大于半个场地高度：中央附近整列都在禁区内，只能生成在左右两侧
+        for clearance in (10.0, 80.0, 200.0, 350.0):
+            store = ball_store_create(8)
+            ball_store_spawn(store, 2000, rng, avoid, clearance)
+            n = store["count"]
+            x, y, r = store["x"][:n], store["y"][:n], store["r"][:n]
+            assert n == 2000
+            gap = np.hypot(x - avoid[0], y - avoid[1]) - r
+            assert gap.min() >= clearance - 1e-9
+            assert np.all((x >= r) & (x <= cfg.WIDTH - r) & (y >= r) & (y <= cfg.HEIGHT - r))
+
+
+def test_spawn_falls_back_to_far_corner():
+    # 禁区盖住整个场地时无法满足间距，全部放在离玩家最远的角落
+    store = ball_store_create(8)
+    ball_store_spawn(store, 50, np.random.default_rng(5), (100.0, 120.0), 2000.0)
+    r = store["r"][:50]
+    np.testing.assert_array_equal(store["x"][:50], cfg.WIDTH - r)
+    np.testing.assert_array_equal(store["y"][:50], cfg.HEIGHT - r)
+
+
+def test_spawn_appends_and_truncate_drops_newest():
+    rng = np.random.default_rng(6)
+    store = ball_store_create(8)
+    ball_store_spawn(store, 5, rng)
+    first = store["x"][:5].copy()
+    ball_store_spawn(store, 20, rng)
+    assert store["count"] == 25
+    np.testing.assert_array_equal(store["x"][:5], first)
+    ball_store_truncate(store, 5)
+    assert store["count"] == 5
+    np.testing.assert_array_equal(store["x"][:5], first)
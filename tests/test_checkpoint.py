@@ -0,0 +1,72 @@
+﻿"""
+游戏存档：打包再恢复后状态（含随机数发生器）完全一致，损坏的存档被拒绝且不改动游戏。
+"""
+
+import numpy as np
+import pytest
+
+import config as cfg
+from checkpoint import HEADER_DTYPE, checkpoint_load, checkpoint_pack, checkpoint_restore, checkpoint_save
+from main import game_create, game_start, game_update
+from policies import policy_create
+
+
+def played_game(seed: int, steps: int):
+    game = game_create(policy_create("flee", seed), with_hud=False, seed=seed)
+    game_start(game)
+    for _ in range(steps):
+        game_update(game, 1 / 60)
+    return game
+
+
+def assert_same_game(a, b):
+    for key in ("seed", "state", "score", "high_score", "audio_muted", "level_flash_timer"):
+        assert a[key] == b[key], key
+    assert a["level"]["index"] == b["level"]["index"]
+    assert a["level"]["timer"] == b["level"]["timer"]
+    assert a["player"] == b["player"]
+    n = a["balls"]["count"]
+    assert b["balls"]["count"] == n
+    for name in ("x", "y", "vx", "vy", "r", "color"):
+        np.testing.assert_array_equal(a["balls"][name][:n], b["balls"][name][:n])
+    np.testing.assert_array_equal(a["grid"]["order"], b["grid"]["order"])
+    assert a["rng"].bit_generator.state == b["rng"].bit_generator.state
+
+
+def test_pack_restore_round_trip():
+    game = played_game(3, 900)
+    # 让发生器留有缓存的半个 32 位字，has_uint32 / uinteger 也要保存
+    game["rng"].integers(0, 2**32, dtype=np.uint32)
+    data = bytes(checkpoint_pack(game))
+
+    restored = game_create(policy_create("flee", 3), with_hud=False, seed=99)
+    checkpoint_restore(restored, data)
+    assert_same_game(game, restored)
+    assert game["rng"].random(8).tolist() == restored["rng"].random(8).tolist()
+
+    # 恢复后继续模拟，两局逐步保持一致
+    for _ in range(600):
+        game_update(game, 1 / 60)
+        game_update(restored, 1 / 60)
+    assert_same_game(game, restored)
+
+
+def test_save_load_memmap(tmp_path):
+    game = played_game(5, 300)
+    path = tmp_path / "autosave.bin"
+    checkpoint_save(game, path)
+    restored = game_create(policy_create("flee", 5), with_hud=False, seed=0)
+    checkpoint_restore(restored, checkpoint_load(path))
+    assert_same_game(game, restored)
+
+
+def test_rejects_bad_state_without_changing_game():
+    data = bytearray(checkpoint_pack(played_game(7, 120)))
+    header = np.frombuffer(data, dtype=HEADER_DTYPE, count=1)[0]
+    header["state"] = len(cfg.GAME_STATES)
+
+    target = played_game(8, 60)
+    before = bytes(checkpoint_pack(target))
+    with pytest.raises(ValueError):
+        checkpoint_restore(target, data)
+    assert bytes(checkpoint_pack(target)) == before
@@ -0,0 +1,72 @@
+﻿"""
+碰撞检测：批量查询与逐个圆的标量判断一致。
+"""
+
+import math
+
+import numpy as np
+
+from collision import circles_rect_first_hit, circles_rect_query
+
+
+def circle_rect_collide_scalar(cx: float, cy: float, radius: float, rect: tuple) -> tuple[bool, float]:
+    """逐个圆的参考实现：返回 (是否相交, 穿透深度)。
+
+    圆心在矩形外时深度为半径减去到最近点的距离，在矩形内时为半径加上到最近边的距离。
+    """
+    left, top, right, bottom = rect
+    nearest_x = min(max(cx, left), right)
+    nearest_y = min(max(cy, top), bottom)
+    dx = cx - nearest_x
+    dy = cy - nearest_y
+    dist2 = dx * dx + dy * dy
+    if dist2 > 0:
+        depth = radius - math.sqrt(dist2)
+    else:
+        depth = radius + min(cx - left, right - cx, cy - top, bottom - cy)
+    return dist2 <= radius * radius, depth
+
+
+def test_query_matches_scalar_reference():
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        n = int(rng.integers(1, 40))
+        # 一半的圆放在矩形附近，保证有相交、相切与圆心在矩形内的情况
+        cx, cy = rng.uniform(100, 700), rng.uniform(100, 500)
+        x = np.where(rng.random(n) < 0.5, rng.uniform(0, 800, n), cx + rng.uniform(-40, 40, n))
+        y = np.where(rng.random(n) < 0.5, rng.uniform(0, 600, n), cy + rng.uniform(-40, 40, n))
+        r = rng.integers(12, 25, n).astype(np.float64)
+        rect = (cx - 16, cy - 16, cx + 16, cy + 16)
+        reference = [circle_rect_collide_scalar(x[i], y[i], r[i], rect) for i in range(n)]
+        hits = [hit for hit, _ in reference]
+        expected = hits.index(True) if any(hits) else -1
+
+        hit_mask, first_hit, depth = circles_rect_query(x, y, r, rect)
+        assert hit_mask.tolist() == hits
+        assert first_hit == expected
+        np.testing.assert_allclose(depth, [d for _, d in reference], rtol=0, atol=1e-9)
+        # 相交 ⇔ 深度非负
+        assert np.array_equal(hit_mask, depth >= 0)
+        assert circles_rect_first_hit(x, y, r, rect) == expected
+
+
+def test_first_hit_edges():
+    rect = (100.0, 100.0, 132.0, 132.0)
+    r = np.array([10.0, 10.0, 10.0, 10.0])
+    # 依次为：刚好相切、角上差一点、圆心在矩形内、远离
+    x = np.array([90.0, 132.0 + 7.1, 116.0, 400.0])
+    y = np.array([116.0, 132.0 + 7.1, 116.0, 400.0])
+    assert circles_rect_first_hit(x, y, r, rect) == 0
+    assert circles_rect_first_hit(x[1:], y[1:], r[1:], rect) == 1
+    assert circles_rect_first_hit(x[3:], y[3:], r[3:], rect) == -1
+    hit_mask, first_hit, depth = circles_rect_query(x, y, r, rect)
+    assert hit_mask.tolist() == [True, False, True, False]
+    assert first_hit == 0
+    # 相切深度为 0；圆心在矩形正中，深度为半径加半个边长
+    np.testing.assert_allclose(depth[[0, 2]], [0.0, 26.0])
+    assert depth[1] < 0 and depth[3] < 0
+
+    empty = np.zeros(0)
+    assert circles_rect_first_hit(empty, empty, empty, rect) == -1
+    hit_mask, first_hit, depth = circles_rect_query(empty, empty, empty, rect)
+    assert len(hit_mask) == 0 and first_hit == -1 and len(depth) == 0
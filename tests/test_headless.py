@@ -0,0 +1,20 @@
+﻿"""
+无窗口运行：提前结束时统计按实际推进的帧数计算。
+"""
+
+import config as cfg
+from headless import headless_run
+
+
+def test_stats_count_frames_that_ran(monkeypatch):
+    # 一次受击即死亡，原地不动的玩家很快结束
+    monkeypatch.setattr(cfg, "DAMAGE_PER_HIT", cfg.PLAYER_HP_MAX)
+    stats = headless_run(100000, restart=False, seed=3)
+    assert stats["state"] == "gameover"
+    assert 0 < stats["frames"] < 100000
+    assert stats["fps"] == stats["frames"] / stats["elapsed"]
+
+
+def test_stats_with_restart_run_all_frames():
+    stats = headless_run(500, restart=True, seed=3)
+    assert stats["frames"] == 500
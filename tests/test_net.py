@@ -0,0 +1,159 @@
+﻿"""
+联机：快照编解码往返一致（完整、int8 增量、弹球数变化的 int16 增量），损坏的报文被丢弃；
+服务器多刻度步长与 game_update 一样做扫掠检测。
+"""
+
+import zlib
+
+import numpy as np
+import pytest
+
+import config as cfg
+from main import game_start
+from net_client import client_create, client_receive
+from net_protocol import (
+    NO_BASE,
+    PLAYER,
+    SNAPSHOT,
+    frame_from_game,
+    link_create,
+    snapshot_base_tick,
+    snapshot_decode,
+    snapshot_encode,
+)
+from net_server import room_create, room_step, seat_create
+
+
+def make_frame(tick: int, n: int, rng: np.random.Generator, generation: int = 1) -> dict:
+    return {
+        "tick": tick,
+        "generation": generation,
+        "state": "playing",
+        "level": 3,
+        "score": 1234,
+        "high_score": 5678,
+        "players": [(800, 900, 100, 3), (0, 0, 0, 0)],
+        "qx": rng.integers(200, 6000, n).astype(np.uint16),
+        "qy": rng.integers(200, 4500, n).astype(np.uint16),
+        "r": rng.integers(12, 25, n).astype(np.uint8),
+        "color": rng.integers(0, 4, n).astype(np.uint8),
+    }
+
+
+def moved(base: dict, tick: int, n: int, step: int, rng: np.random.Generator) -> dict:
+    """在 base 上移动前 min(n, 旧数量) 个弹球（每轴最多 step 个刻度），其余为新生成的弹球。"""
+    frame = make_frame(tick, n, rng, base["generation"])
+    m = min(n, len(base["qx"]))
+    for axis in ("qx", "qy"):
+        frame[axis][:m] = base[axis][:m].astype(np.int32) + rng.integers(-step, step + 1, m)
+    frame["r"][:m] = base["r"][:m]
+    frame["color"][:m] = base["color"][:m]
+    frame["score"] += 7
+    return frame
+
+
+def ball_block(data: bytes) -> bytes:
+    seats = SNAPSHOT.unpack_from(data)[5]
+    return zlib.decompress(data[SNAPSHOT.size + seats * PLAYER.size :])
+
+
+def assert_same_frame(a: dict, b: dict) -> None:
+    for key in ("tick", "generation", "state", "level", "score", "high_score"):
+        assert a[key] == b[key], key
+    assert [tuple(row) for row in a["players"]] == [tuple(row) for row in b["players"]]
+    for key in ("qx", "qy", "r", "color"):
+        np.testing.assert_array_equal(a[key], b[key])
+
+
+def test_full_snapshot_round_trip():
+    rng = np.random.default_rng(1)
+    frame = make_frame(10, 30, rng)
+    data = snapshot_encode(frame)
+    assert snapshot_base_tick(data) == NO_BASE
+    assert_same_frame(frame, snapshot_decode(data))
+
+
+def test_full_snapshot_from_game():
+    room = room_create(1, seed=2)
+    game = room["game"]
+    game_start(game)
+    frame = frame_from_game(game, [game["player"], None], 5, 1)
+    decoded = snapshot_decode(snapshot_encode(frame))
+    assert_same_frame(frame, decoded)
+    n = game["balls"]["count"]
+    assert np.all(np.abs(decoded["qx"] / cfg.NET_POS_SCALE - game["balls"]["x"][:n]) <= 0.5 / cfg.NET_POS_SCALE)
+
+
+def test_narrow_delta_round_trip():
+    rng = np.random.default_rng(3)
+    base = make_frame(20, 30, rng)
+    frame = moved(base, 22, 30, 127, rng)
+    data = snapshot_encode(frame, base)
+    assert snapshot_base_tick(data) == 20
+    assert ball_block(data)[0] == 1
+    assert_same_frame(frame, snapshot_decode(data, base))
+
+
+@pytest.mark.parametrize("count", [30, 42, 12])
+def test_wide_delta_round_trip_with_count_change(count):
+    rng = np.random.default_rng(4)
+    base = make_frame(30, 30, rng)
+    frame = moved(base, 34, count, 600, rng)
+    data = snapshot_encode(frame, base)
+    assert ball_block(data)[0] == 2
+    assert_same_frame(frame, snapshot_decode(data, base))
+
+
+def test_delta_requires_matching_base():
+    rng = np.random.default_rng(5)
+    base = make_frame(40, 10, rng)
+    data = snapshot_encode(moved(base, 41, 10, 5, rng), base)
+    with pytest.raises(ValueError):
+        snapshot_decode(data)
+    with pytest.raises(ValueError):
+        snapshot_decode(data, make_frame(39, 10, rng))
+    # 对局代数不同的基准不做增量
+    other = make_frame(40, 10, rng, generation=2)
+    assert snapshot_base_tick(snapshot_encode(moved(base, 41, 10, 5, rng), other)) == NO_BASE
+
+
+def test_client_drops_malformed_snapshots():
+    rng = np.random.default_rng(6)
+    client = client_create(link_create(), link_create())
+    data = bytearray(snapshot_encode(make_frame(50, 20, rng)))
+    fields = list(SNAPSHOT.unpack_from(data))
+    fields[4] = len(cfg.GAME_STATES)
+    bad_state = SNAPSHOT.pack(*fields) + data[SNAPSHOT.size :]
+    corrupt = bytearray(data)
+    corrupt[-4:] = b"\xff\xff\xff\xff"
+    for packet in (data[:8], data[: SNAPSHOT.size + 3], data[:-5], bytes(bad_state), bytes(corrupt)):
+        client_receive(client, bytes(packet))
+    assert client["malformed"] == 5
+    assert client["snapshots"] == 0 and client["latest"] is None
+
+    delta = snapshot_encode(make_frame(52, 20, rng), make_frame(51, 20, rng))
+    client_receive(client, delta)
+    assert client["missing_base"] == 1
+
+
+def test_room_step_sweeps_multi_tick_steps():
+    room = room_create(1, seed=7)
+    room["seats"] = [seat_create(("a", 1), 0.0), seat_create(("b", 2), 0.0)]
+    for seat in room["seats"]:
+        seat["start"] = True
+    room_step(room, 1 / cfg.MOTION_HZ)
+    game = room["game"]
+    assert game["state"] == "playing"
+
+    # 只留一个高速弹球：一步 4 个刻度内从左到右穿过玩家 0，步末已在玩家另一侧
+    player = room["seats"][0]["player"]
+    balls = game["balls"]
+    balls["count"] = 1
+    balls["x"][0], balls["y"][0] = player["x"] - 70, player["y"]
+    balls["vx"][0], balls["vy"][0] = 35.0, 0.0
+    balls["r"][0] = 12
+    hp = player["hp"]
+    room_step(room, 4 / cfg.MOTION_HZ)
+    assert balls["x"][0] > player["x"] + player["w"] / 2 + 12
+    assert player["hp"] == hp - cfg.DAMAGE_PER_HIT
+    assert room["seats"][1]["player"]["hp"] == hp
@@ -0,0 +1,60 @@
+﻿"""
+模拟/渲染流水线：双缓冲在渲染方持有后台缓冲区时跳过发布，不会改写正在读取的快照。
+"""
+
+import time
+
+import config as cfg
+import main
+from policies import input_idle
+
+
+def started_game():
+    game = main.game_create(input_idle, with_hud=False, seed=3)
+    main.game_start(game)
+    return game
+
+
+def test_publish_skips_buffer_being_read():
+    game = started_game()
+    pipeline = main.pipeline_create(game)
+    view = main.pipeline_acquire(pipeline, None, game["quality"])
+    score = view["score"]
+    x = view["balls"]["x"][: view["balls"]["count"]].copy()
+
+    # 另一块缓冲区空闲：正常发布并成为最新快照
+    main.game_update(game, cfg.SIM_DT)
+    assert main.pipeline_publish(pipeline)
+    assert pipeline["front"] == 1 and pipeline["published"] == 1
+
+    # 再写就会轮到渲染方手里的缓冲区：跳过，快照保持原样
+    main.game_update(game, cfg.SIM_DT)
+    assert not main.pipeline_publish(pipeline)
+    assert pipeline["front"] == 1 and pipeline["skipped"] == 1
+    assert view["score"] == score
+    assert (view["balls"]["x"][: len(x)] == x).all()
+
+    main.pipeline_release(pipeline)
+    assert main.pipeline_publish(pipeline)
+    assert pipeline["front"] == 0
+    latest = main.pipeline_acquire(pipeline, None, game["quality"])
+    assert latest["score"] == game["score"]
+    main.pipeline_release(pipeline)
+
+
+def test_held_snapshot_stays_stable_while_sim_runs():
+    game = started_game()
+    pipeline = main.pipeline_create(game)
+    main.pipeline_start(pipeline)
+    try:
+        for _ in range(5):
+            view = main.pipeline_acquire(pipeline, None, game["quality"])
+            balls = view["balls"]
+            x = balls["x"][: balls["count"]].copy()
+            time.sleep(4 * cfg.SIM_DT)
+            assert (balls["x"][: len(x)] == x).all()
+            main.pipeline_release(pipeline)
+            time.sleep(2 * cfg.SIM_DT)
+    finally:
+        main.pipeline_stop(pipeline)
+    assert pipeline["published"] > 0 and pipeline["skipped"] > 0
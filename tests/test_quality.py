@@ -0,0 +1,70 @@
+﻿"""
+画质调节器：超预算降档，余量恢复后升档，刚升就降时放慢下一次升档。
+"""
+
+import config as cfg
+from quality import governor_create, governor_update
+
+BUDGET = 10.0
+SLOW = 2 * BUDGET
+CALM = 0.5 * BUDGET * cfg.QUALITY_RECOVER_RATIO
+
+
+def feed(gov, work_ms: float, frames: int) -> int | None:
+    """最多喂入 frames 帧相同耗时，档位变化时立即停下并返回这是第几帧，始终未变化时返回 None。"""
+    for frame in range(1, frames + 1):
+        if governor_update(gov, work_ms):
+            return frame
+    return None
+
+
+def test_steps_down_when_window_over_budget():
+    gov = governor_create(BUDGET)
+    # 观察窗口填满之前不做判断；每次切换后重新填满窗口
+    for tier in range(1, len(cfg.QUALITY_TIERS)):
+        assert feed(gov, SLOW, cfg.QUALITY_WINDOW) == cfg.QUALITY_WINDOW
+        assert gov["tier"] == tier
+    assert feed(gov, SLOW, cfg.QUALITY_WINDOW * 4) is None
+
+    # 只有少数帧超预算时 90 分位不超，保持原档位
+    gov = governor_create(BUDGET)
+    for frame in range(cfg.QUALITY_WINDOW * 4):
+        assert not governor_update(gov, SLOW if frame % 15 == 0 else BUDGET)
+    assert gov["tier"] == 0
+
+
+def test_steps_up_after_calm_frames():
+    gov = governor_create(BUDGET, tier=2)
+    # 余量不足（低于预算但高于恢复比例）时不升档
+    assert feed(gov, BUDGET * 0.9, cfg.QUALITY_RECOVER_FRAMES * 2) is None
+    assert feed(gov, CALM, cfg.QUALITY_RECOVER_FRAMES) == cfg.QUALITY_RECOVER_FRAMES
+    assert gov["tier"] == 1
+    # 中途出现一帧没有余量，连续计数重来
+    assert feed(gov, CALM, cfg.QUALITY_RECOVER_FRAMES - 1) is None
+    assert feed(gov, BUDGET * 0.9, 1) is None
+    assert feed(gov, CALM, cfg.QUALITY_RECOVER_FRAMES) == cfg.QUALITY_RECOVER_FRAMES
+    assert gov["tier"] == 0
+
+
+def test_backoff_after_failed_upgrade():
+    recover = cfg.QUALITY_RECOVER_FRAMES
+    gov = governor_create(BUDGET, tier=1)
+    feed(gov, CALM, recover)
+    assert gov["tier"] == 0
+
+    # 刚升档就扛不住：降回去，下一次升档要等两倍帧数，再失败则继续加倍
+    assert feed(gov, SLOW, cfg.QUALITY_WINDOW) is not None
+    assert gov["tier"] == 1 and gov["backoff"] == 2
+    assert feed(gov, CALM, 2 * recover) == 2 * recover
+    feed(gov, SLOW, cfg.QUALITY_WINDOW)
+    assert gov["backoff"] == 4
+    assert feed(gov, CALM, 4 * recover) == 4 * recover
+    assert gov["tier"] == 0
+
+    # 升档后稳定运行一个恢复周期，等待倍数复位；之后再降档不算刚升就降
+    assert feed(gov, CALM, recover) is None
+    assert gov["backoff"] == 1
+    feed(gov, SLOW, cfg.QUALITY_WINDOW)
+    assert gov["tier"] == 1 and gov["backoff"] == 1
+    assert feed(gov, CALM, recover) == recover
+    assert gov["tier"] == 0
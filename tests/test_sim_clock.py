@@ -0,0 +1,52 @@
+﻿"""
+固定步长累加器：按 SIM_DT 切分真实耗时，积压超过补算上限的部分丢弃并计入 dropped。
+"""
+
+import pytest
+
+import config as cfg
+from main import sim_clock_advance, sim_clock_create
+
+
+def test_splits_frames_into_fixed_steps():
+    clock = sim_clock_create()
+    # 半步的帧：每两帧推进一步，余量留在累加器里
+    assert sim_clock_advance(clock, cfg.SIM_DT / 2) == 0
+    assert clock["accumulator"] == pytest.approx(cfg.SIM_DT / 2)
+    assert sim_clock_advance(clock, cfg.SIM_DT / 2) == 1
+    assert clock["accumulator"] == pytest.approx(0.0, abs=1e-12)
+    # 2.5 步的帧：推进两步，半步留到下一帧
+    assert sim_clock_advance(clock, 2.5 * cfg.SIM_DT) == 2
+    assert clock["accumulator"] == pytest.approx(cfg.SIM_DT / 2)
+    assert clock["dropped"] == 0.0
+
+
+def test_long_run_conserves_time():
+    clock = sim_clock_create()
+    frame = 1.0 / 144
+    steps = sum(sim_clock_advance(clock, frame) for _ in range(144 * 10))
+    total = steps * cfg.SIM_DT + clock["accumulator"] + clock["dropped"]
+    assert total == pytest.approx(10.0)
+    assert steps in (cfg.SIM_HZ * 10 - 1, cfg.SIM_HZ * 10)
+    assert clock["dropped"] == 0.0
+
+
+def test_catch_up_is_capped_and_excess_dropped():
+    clock = sim_clock_create()
+    sim_clock_advance(clock, 0.4 * cfg.SIM_DT)
+    # 一次卡顿 1 秒：只补算 max_steps 步，其余时间（含原有余量）全部丢弃，累加器清零
+    assert sim_clock_advance(clock, 1.0, max_steps=3) == 3
+    assert clock["accumulator"] == 0.0
+    assert clock["dropped"] == pytest.approx(1.0 + 0.4 * cfg.SIM_DT - 3 * cfg.SIM_DT)
+    # 之后恢复正常节奏，不再补算被丢弃的时间
+    assert sim_clock_advance(clock, cfg.SIM_DT) == 1
+    dropped = clock["dropped"]
+    assert sim_clock_advance(clock, 0.5) == cfg.MAX_CATCHUP_STEPS
+    assert clock["dropped"] == pytest.approx(dropped + 0.5 - cfg.MAX_CATCHUP_STEPS * cfg.SIM_DT, abs=1e-9)
+
+
+def test_exactly_at_cap_drops_nothing():
+    clock = sim_clock_create()
+    assert sim_clock_advance(clock, 3.5 * cfg.SIM_DT, max_steps=3) == 3
+    assert clock["dropped"] == 0.0
+    assert clock["accumulator"] == pytest.approx(0.5 * cfg.SIM_DT)
@@ -0,0 +1,67 @@
+﻿"""
+空间网格：宽相查询不漏掉暴力两两比较能找到的任何一对。
+"""
+
+import numpy as np
+
+import config as cfg
+from ball_store import ball_store_create, ball_store_spawn, ball_store_update
+from spatial_grid import balls_resolve_collisions, grid_candidate_pairs, grid_create, grid_query_rect, grid_rebuild
+
+
+def spawn(count: int, seed: int):
+    store = ball_store_create(count)
+    ball_store_spawn(store, count, np.random.default_rng(seed))
+    return store
+
+
+def touching_pairs_brute(store) -> set[tuple[int, int]]:
+    """两两比较得到的全部相交弹球对（i < j）。"""
+    n = store["count"]
+    x, y, r = store["x"][:n], store["y"][:n], store["r"][:n]
+    dist2 = (x[:, None] - x[None, :]) ** 2 + (y[:, None] - y[None, :]) ** 2
+    reach = r[:, None] + r[None, :]
+    i, j = np.nonzero(np.triu((dist2 < reach * reach) & (dist2 > 0), k=1))
+    return set(zip(i.tolist(), j.tolist()))
+
+
+def test_candidate_pairs_cover_brute_force():
+    for seed in range(5):
+        store = spawn(400, seed)
+        grid = grid_create()
+        for _ in range(20):
+            grid_rebuild(grid, store)
+            i, j = grid_candidate_pairs(grid)
+            pairs = list(zip(np.minimum(i, j).tolist(), np.maximum(i, j).tolist()))
+            # 每对只出现一次，且不会和自己配对
+            assert len(pairs) == len(set(pairs))
+            assert all(a != b for a, b in pairs)
+            assert touching_pairs_brute(store) <= set(pairs)
+            ball_store_update(store)
+
+
+def test_resolve_counts_match_brute_force():
+    store = spawn(600, 7)
+    grid = grid_create()
+    grid_rebuild(grid, store)
+    expected = len(touching_pairs_brute(store))
+    assert balls_resolve_collisions(grid, store) == expected
+
+
+def test_query_rect_covers_brute_force():
+    rng = np.random.default_rng(11)
+    store = spawn(500, 11)
+    grid = grid_create()
+    grid_rebuild(grid, store)
+    n = store["count"]
+    x, y, r = store["x"][:n], store["y"][:n], store["r"][:n]
+    for _ in range(100):
+        cx, cy = rng.uniform(0, cfg.WIDTH), rng.uniform(0, cfg.HEIGHT)
+        rect = (cx - 16, cy - 16, cx + 16, cy + 16)
+        left, top, right, bottom = rect
+        dx = np.maximum(np.maximum(left - x, x - right), 0.0)
+        dy = np.maximum(np.maximum(top - y, y - bottom), 0.0)
+        hit = set(np.nonzero(dx * dx + dy * dy <= r * r)[0].tolist())
+        near = grid_query_rect(grid, rect, cfg.R_MAX)
+        assert len(near) == len(set(near.tolist()))
+        assert hit <= set(near.tolist())
@@ -0,0 +1,112 @@
+﻿"""
+扫掠推进：大步长的终点与首次接触时刻和细分小步积分一致。
+"""
+
+import math
+
+import numpy as np
+
+import config as cfg
+import main
+from ball_store import ball_store_create, ball_store_spawn, ball_store_sweep
+from collision import circles_rect_sweep
+from policies import input_idle
+
+SUBSTEPS = 4000
+
+
+def rect_dist2(x, y, rect):
+    left, top, right, bottom = rect
+    dx = np.maximum(np.maximum(left - x, x - right), 0.0)
+    dy = np.maximum(np.maximum(top - y, y - bottom), 0.0)
+    return dx * dx + dy * dy
+
+
+def sweep_reference(store, ticks, rect, rect_dx, rect_dy):
+    """细分成 SUBSTEPS 个小步逐步移动、按镜像反弹，并记录第一次与移动矩形相交的小步。"""
+    n = store["count"]
+    x, y, vx, vy, r = (store[name][:n].copy() for name in ("x", "y", "vx", "vy", "r"))
+    h = ticks / SUBSTEPS
+    first = 0.0 if np.any(rect_dist2(x, y, rect) <= r * r) else math.inf
+    for k in range(1, SUBSTEPS + 1):
+        x += vx * h
+        y += vy * h
+        for p, v, hi in ((x, vx, cfg.WIDTH - r), (y, vy, cfg.HEIGHT - r)):
+            over = p > hi
+            p[over] = 2 * hi[over] - p[over]
+            under = p < r
+            p[under] = 2 * r[under] - p[under]
+            np.negative(v, out=v, where=over | under)
+        if first == math.inf:
+            t = k / SUBSTEPS
+            left, top, right, bottom = rect
+            moved = (left + rect_dx * t, top + rect_dy * t, right + rect_dx * t, bottom + rect_dy * t)
+            if np.any(rect_dist2(x, y, moved) <= r * r):
+                first = t
+    return x, y, vx, vy, first
+
+
+def test_store_sweep_matches_small_steps():
+    rng = np.random.default_rng(5)
+    contacts = 0
+    for trial in range(24):
+        store = ball_store_create(12)
+        ball_store_spawn(store, 12, rng)
+        cx, cy = rng.uniform(150, 650), rng.uniform(150, 450)
+        # 弹球放在玩家附近，并让一部分贴近墙壁，步内既有接触也有反弹
+        store["x"][:12] = np.clip(cx + rng.uniform(-90, 90, 12), store["r"][:12], cfg.WIDTH - store["r"][:12])
+        store["y"][:12] = np.clip(cy + rng.uniform(-90, 90, 12), store["r"][:12], cfg.HEIGHT - store["r"][:12])
+        store["x"][0] = store["r"][0] + 1.0
+        rect = (cx - 16, cy - 16, cx + 16, cy + 16)
+        rect_dx, rect_dy = rng.uniform(-30, 30, 2)
+        ticks = 6.0
+        x, y, vx, vy, first = sweep_reference(store, ticks, rect, rect_dx, rect_dy)
+
+        toi = ball_store_sweep(store, ticks, rect, rect_dx, rect_dy)
+        n = store["count"]
+        np.testing.assert_allclose(store["x"][:n], x, atol=1e-6)
+        np.testing.assert_allclose(store["y"][:n], y, atol=1e-6)
+        np.testing.assert_array_equal(store["vx"][:n], vx)
+        np.testing.assert_array_equal(store["vy"][:n], vy)
+        if first == math.inf:
+            assert toi > 1.0
+        else:
+            contacts += 1
+            # 小步积分只在步末检查，首次接触最多晚一个小步
+            assert first - 1.0 / SUBSTEPS - 1e-9 <= toi <= first + 1e-9
+    assert contacts >= 6
+
+
+def test_circles_sweep_matches_sampling():
+    rng = np.random.default_rng(9)
+    n = 500
+    rect = (300.0, 200.0, 332.0, 232.0)
+    x = rng.uniform(150, 480, n)
+    y = rng.uniform(50, 380, n)
+    dx = rng.uniform(-150, 150, n)
+    dy = rng.uniform(-150, 150, n)
+    r = rng.integers(12, 25, n).astype(np.float64)
+    toi = circles_rect_sweep(x, y, dx, dy, r, rect)
+
+    t = np.linspace(0.0, 1.0, SUBSTEPS + 1)[:, None]
+    touching = rect_dist2(x + dx * t, y + dy * t, rect) <= r * r
+    sampled = np.where(touching.any(axis=0), t[touching.argmax(axis=0), 0], np.inf)
+    hit = np.isfinite(sampled)
+    assert hit.sum() > 50
+    assert np.all(toi[~hit] > 1.0)
+    assert np.all(toi[hit] <= sampled[hit] + 1e-9)
+    assert np.all(toi[hit] >= sampled[hit] - 1.0 / SUBSTEPS - 1e-9)
+
+
+def test_single_tick_step_uses_discrete_path(monkeypatch):
+    # 1 / 49 * 49 在浮点下不等于 1，仍应按单刻度步长处理
+    monkeypatch.setattr(cfg, "MOTION_HZ", 49)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("单刻度步长不应走扫掠路径")
+
+    monkeypatch.setattr(main, "ball_store_sweep", fail)
+    game = main.game_create(input_idle, with_hud=False, seed=1)
+    main.game_start(game)
+    for _ in range(10):
+        main.game_update(game, 1.0 / 49)
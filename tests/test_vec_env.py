@@ -0,0 +1,69 @@
+﻿"""
+向量化多环境：步长与基准刻度不一致时拒绝创建，单步结果与 game_update 一致。
+"""
+
+import numpy as np
+import pytest
+
+import config as cfg
+import main
+from ball_store import ball_store_spawn
+from policies import MOVES
+from vec_env import NUM_ACTIONS, venv_create, venv_step
+
+
+def test_create_rejects_mismatched_rates(monkeypatch):
+    monkeypatch.setattr(cfg, "SIM_HZ", cfg.MOTION_HZ * 2)
+    monkeypatch.setattr(cfg, "SIM_DT", 1.0 / cfg.SIM_HZ)
+    with pytest.raises(ValueError):
+        venv_create(4, seed=0)
+
+
+def test_step_runs_at_base_rate():
+    env = venv_create(8, seed=0, max_steps=50)
+    for _ in range(60):
+        obs, reward, done, info = venv_step(env, np.zeros(8, dtype=np.int64))
+    assert obs["player"].shape == (8, 4)
+    assert np.all(env["steps"] < 50)
+
+
+def test_step_matches_game_update():
+    # 同样的弹球、玩家与动作序列，单环境与 game_update 逐步结果一致（不跨越升级，升级补球的随机数不同）
+    rng = np.random.default_rng(4)
+    actions = rng.integers(0, NUM_ACTIONS, cfg.SIM_HZ * 10)
+    game = main.game_create(lambda game: MOVES[game["action"]], with_hud=False, seed=4)
+    main.game_start(game)
+    ball_store_spawn(game["balls"], 10, rng)
+    game["level"]["index"] = 2
+    game["level"]["timer"] = 1.0
+
+    env = venv_create(1, seed=0)
+    balls = game["balls"]
+    n = balls["count"]
+    env["alive"][0] = False
+    for name, field in (("bx", "x"), ("by", "y"), ("bvx", "vx"), ("bvy", "vy"), ("br", "r")):
+        env[name][0, :n] = balls[field][:n]
+    env["alive"][0, :n] = True
+    env["count"][0] = n
+    env["level"][0] = 2
+    env["timer"][0] = 1.0
+
+    player = game["player"]
+    hits = 0
+    for action in actions:
+        game["action"] = int(action)
+        main.game_update(game, cfg.SIM_DT)
+        _, _, done, info = venv_step(env, np.array([action]))
+        hits += int(info["hit"][0])
+        if done[0]:
+            # 环境已自动重置，只核对结束时的数据
+            assert game["state"] == "gameover" and player["hp"] == 0
+            assert info["final_score"][0] == pytest.approx(game["score"])
+            break
+        np.testing.assert_array_equal(env["bx"][0, :n], balls["x"][:n])
+        np.testing.assert_array_equal(env["by"][0, :n], balls["y"][:n])
+        assert (env["px"][0], env["py"][0]) == (player["x"], player["y"])
+        assert (env["hp"][0], env["hurt_cd"][0]) == (player["hp"], player["hurt_cd"])
+        assert env["score"][0] == pytest.approx(game["score"])
+        assert env["level"][0] == game["level"]["index"]
+    assert hits > 0
@@ -0,0 +1,187 @@
+﻿"""
+批量试玩：把大量带种子的无窗口对局分发到进程池，扫描 config.py 中的难度参数。
+
+每局用脚本策略控制玩家，记录存活时间、到达关卡与受击次数；
+结果逐局追加写入 JSONL，汇总只保留累加量，不在内存中保存每一局。
+
+用法（在项目根目录）：
+    python tools/batch_playtest.py --episodes 200 --policy flee \\
+        --grid LEVEL_INTERVAL=8,12,16 --grid SPEED_MAX=3,4,5 --grid DAMAGE_PER_HIT=10,20
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import config as cfg
+from main import game_create, game_start, game_update
+from policies import POLICIES, policy_create
+
+# config.py 中由其他参数算出的常量：(常量, 来源参数, 计算方式)。
+# 扫描来源参数时按同样的公式重新计算，否则它们还停留在导入时的值；网格里直接给出的常量不覆盖。
+DERIVED = (
+    ('SIM_DT', 'SIM_HZ', lambda: 1.0 / cfg.SIM_HZ),
+    ('GRID_CELL_SIZE', 'R_MAX', lambda: 2 * cfg.R_MAX),
+    ('LEVEL_INITIAL_BALLS', 'BALL_MIN', lambda: cfg.BALL_MIN),
+    ('LEVEL_MAX_BALLS', 'BALL_MAX', lambda: cfg.BALL_MAX),
+)
+
+
+def parse_grid(items):
+    """把 NAME=v1,v2 形式的参数解析为 [(name, [values...]), ...]。"""
+    grid = []
+    for item in items:
+        name, _, values = item.partition('=')
+        if not hasattr(cfg, name):
+            raise SystemExit(f'config.py 中没有 {name}')
+        grid.append((name, [json.loads(value) for value in values.split(',')]))
+    return grid
+
+
+def iter_tasks(grid, episodes, policy, max_seconds, base_seed, ticks_per_step=1.0):
+    """惰性生成 (参数组合, 种子, ...) 任务，不一次性建出完整列表。"""
+    names = [name for name, _ in grid]
+    for combo in itertools.product(*(values for _, values in grid)):
+        overrides = dict(zip(names, combo))
+        for episode in range(episodes):
+            yield overrides, base_seed + episode, policy, max_seconds, ticks_per_step
+
+
+def config_apply(overrides):
+    """把覆盖值写入 config 并重新计算受影响的派生常量，返回被改动项的原值。"""
+    saved = {name: getattr(cfg, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(cfg, name, value)
+    for name, source, compute in DERIVED:
+        if source in overrides and name not in overrides:
+            saved[name] = getattr(cfg, name)
+            setattr(cfg, name, compute())
+    return saved
+
+
+def run_episode(task):
+    """在工作进程中运行一局，返回本局统计。"""
+    overrides, seed, policy, max_seconds, ticks_per_step = task
+    saved = config_apply(overrides)
+    try:
+        game = game_create(policy_create(policy, seed), with_hud=False, seed=seed)
+        game_start(game)
+        # 每步覆盖 ticks_per_step 个基准刻度，大于 1 时 game_update 改用扫掠碰撞
+        dt = ticks_per_step / cfg.MOTION_HZ
+        max_steps = int(max_seconds / dt)
+        hits = 0
+        steps = 0
+        while steps < max_steps and game['state'] == 'playing':
+            hits += game_update(game, dt)
+            steps += 1
+        return {
+            'config': overrides,
+            'seed': seed,
+            'survival': steps * dt,
+            'level': game['level']['index'] + 1,
+            'hits': hits,
+            'died': game['state'] == 'gameover',
+            'score': int(game['score']),
+        }
+    finally:
+        for name, value in saved.items():
+            setattr(cfg, name, value)
+
+
+def summary_create():
+    return {'episodes': 0, 'deaths': 0, 'survival_sum': 0.0, 'survival_sq': 0.0,
+            'survival_min': math.inf, 'survival_max': 0.0, 'level_sum': 0, 'level_max': 0, 'hits_sum': 0}
+
+
+def summary_add(summary, result):
+    summary['episodes'] += 1
+    summary['deaths'] += int(result['died'])
+    survival = result['survival']
+    summary['survival_sum'] += survival
+    summary['survival_sq'] += survival * survival
+    summary['survival_min'] = min(summary['survival_min'], survival)
+    summary['survival_max'] = max(summary['survival_max'], survival)
+    summary['level_sum'] += result['level']
+    summary['level_max'] = max(summary['level_max'], result['level'])
+    summary['hits_sum'] += result['hits']
+
+
+def summary_report(summary):
+    count = summary['episodes']
+    mean = summary['survival_sum'] / count
+    variance = max(summary['survival_sq'] / count - mean * mean, 0.0)
+    return {
+        'episodes': count,
+        'death_rate': summary['deaths'] / count,
+        'survival_mean': mean,
+        'survival_std': math.sqrt(variance),
+        'survival_min': summary['survival_min'],
+        'survival_max': summary['survival_max'],
+        'level_mean': summary['level_sum'] / count,
+        'level_max': summary['level_max'],
+        'hits_mean': summary['hits_sum'] / count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多进程批量试玩')
+    parser.add_argument('--episodes', type=int, default=100, help='每组参数的对局数')
+    parser.add_argument('--grid', action='append', default=[], help='扫描参数，如 SPEED_MAX=3,4,5，可重复')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='flee', help='玩家策略')
+    parser.add_argument('--max-seconds', type=float, default=300.0, help='单局模拟时长上限（游戏内秒）')
+    parser.add_argument('--seed', type=int, default=0, help='起始种子')
+    parser.add_argument('--ticks-per-step', type=float, default=1.0, help='每步覆盖的基准刻度数，加大可减少模拟开销')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='进程数')
+    parser.add_argument('--out', default='playtest_results.jsonl', help='逐局结果（JSONL）')
+    parser.add_argument('--report', default='playtest_report.json', help='汇总报告（JSON）')
+    args = parser.parse_args()
+
+    grid = parse_grid(args.grid)
+    total = args.episodes * math.prod(len(values) for _, values in grid)
+    tasks = iter_tasks(grid, args.episodes, args.policy, args.max_seconds, args.seed, args.ticks_per_step)
+    summaries = {}
+    start = time.perf_counter()
+
+    with Pool(args.workers) as pool, open(args.out, 'w', encoding='utf-8') as out:
+        results = pool.imap_unordered(run_episode, tasks, chunksize=max(1, min(64, total // (args.workers * 8))))
+        for done, result in enumerate(results, 1):
+            out.write(json.dumps(result) + '\n')
+            key = json.dumps(result['config'], sort_keys=True)
+            summary = summaries.setdefault(key, summary_create())
+            summary_add(summary, result)
+            if done % 100 == 0 or done == total:
+                rate = done / (time.perf_counter() - start)
+                print(f'\r{done}/{total} episodes  {rate:.1f}/s', end='', flush=True)
+    print()
+
+    report = {
+        'policy': args.policy,
+        'episodes_per_config': args.episodes,
+        'max_seconds': args.max_seconds,
+        'ticks_per_step': args.ticks_per_step,
+        'elapsed': time.perf_counter() - start,
+        'configs': [
+            {'config': json.loads(key), **summary_report(summary)}
+            for key, summary in sorted(summaries.items())
+        ],
+    }
+    Path(args.report).write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    for row in report['configs']:
+        print(
+            f"{json.dumps(row['config']):50s} survival {row['survival_mean']:7.1f}s ±{row['survival_std']:5.1f}  "
+            f"level {row['level_mean']:5.2f} (max {row['level_max']})  hits {row['hits_mean']:5.2f}"
+        )
+    print('Wrote', args.out, 'and', args.report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+﻿"""
+性能基准：在无窗口（SDL dummy 视频驱动）下测量模拟、碰撞与渲染的热点函数。
+
+用法（在项目根目录）：
+    python tools/benchmark.py run --out bench_output.json
+    python tools/benchmark.py run --counts 5 30 1000 --out current.json
+    python tools/benchmark.py compare baseline.json current.json --threshold 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import numpy as np
+import pygame
+
+import config as cfg
+import main as game_main
+from ball_store import ball_store_clear, ball_store_spawn
+
+DEFAULT_COUNTS = [5, 30, 100, 1000, 10000, 100000]
+SEED = 12345
+MIN_SAMPLE_SECONDS = 0.2
+MIN_RUNS = 5
+MAX_RUNS = 1000
+
+
+def seed_all(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def measure(func, setup=None):
+    """重复调用 func 直到累计时间足够，返回每次调用耗时（毫秒）列表。"""
+    samples = []
+    total = 0.0
+    while len(samples) < MIN_RUNS or (total < MIN_SAMPLE_SECONDS and len(samples) < MAX_RUNS):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed * 1000.0)
+        total += elapsed
+    return samples
+
+
+def make_game(count):
+    """创建一局正在进行、场上正好有 count 个弹球的游戏。"""
+    seed_all(SEED)
+    game = game_main.game_create(input_source=lambda game: (1, 0), seed=SEED)
+    game_main.game_start(game)
+    ball_store_clear(game['balls'])
+    ball_store_spawn(game['balls'], count, game['rng'])
+    # 基准只关心耗时，让玩家不会死亡
+    game['player']['hp'] = game['player']['hp_max'] = 10 ** 9
+    return game
+
+
+def bench_balls_update(screen, count):
+    game = make_game(count)
+    return measure(lambda: game_main.balls_update_all(game['balls']))
+
+
+def bench_player_collision(screen, count):
+    game = make_game(count)
+    player = game['player']
+
+    def reset():
+        player['hurt_cd'] = 0
+
+    return measure(lambda: game_main.player_take_damage_if_hit(player, game['balls']), reset)
+
+
+def bench_balls_draw(screen, count):
+    game = make_game(count)
+    return measure(lambda: game_main.balls_draw_all(game['balls'], screen))
+
+
+def bench_hud_draw(screen, count):
+    game = make_game(count)
+    hud = game['hud']
+
+    def refresh():
+        # 每次让分数变化，测量的是需要重建图层的最坏情况
+        game['score'] += 1
+        game_main.hud_refresh(hud, game)
+
+    return measure(lambda: game_main.hud_draw(hud, screen), refresh)
+
+
+def bench_level_progression(screen, count):
+    game = make_game(0)
+    saved = (cfg.LEVEL_INITIAL_BALLS, cfg.LEVEL_MAX_BALLS)
+    cfg.LEVEL_INITIAL_BALLS = cfg.LEVEL_MAX_BALLS = count
+    try:
+        return measure(
+            lambda: game_main.level_apply_progression(game),
+            lambda: ball_store_clear(game['balls']),
+        )
+    finally:
+        cfg.LEVEL_INITIAL_BALLS, cfg.LEVEL_MAX_BALLS = saved
+
+
+def bench_full_frame(screen, count):
+    game = make_game(count)
+
+    def frame():
+        game_main.game_update(game, cfg.SIM_DT)
+        game_main.game_render(game, screen)
+
+    return measure(frame)
+
+
+CASES = {
+    'balls_update_all': bench_balls_update,
+    'player_take_damage_if_hit': bench_player_collision,
+    'balls_draw_all': bench_balls_draw,
+    'hud_draw': bench_hud_draw,
+    'level_apply_progression': bench_level_progression,
+    'frame': bench_full_frame,
+}
+
+
+def run(args):
+    pygame.init()
+    screen = pygame.display.set_mode((cfg.WIDTH, cfg.HEIGHT))
+    game_main.load_graphics()
+
+    cases = args.cases or list(CASES)
+    results = []
+    for name in cases:
+        for count in args.counts:
+            samples = CASES[name](screen, count)
+            row = {
+                'case': name,
+                'balls': count,
+                'runs': len(samples),
+                'median_ms': statistics.median(samples),
+                'min_ms': min(samples),
+                'p95_ms': float(np.percentile(samples, 95)),
+            }
+            results.append(row)
+            print(f"{name:28s} {count:>7d} balls  median {row['median_ms']:9.3f} ms  min {row['min_ms']:9.3f} ms")
+    pygame.quit()
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'seed': SEED,
+        },
+        'results': results,
+    }
+    Path(args.out).write_text(json.dumps(report, indent=2), encoding='utf-8')
+    print('Wrote', args.out)
+
+
+def compare(args):
+    baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+    current = json.loads(Path(args.current).read_text(encoding='utf-8'))
+    base_rows = {(row['case'], row['balls']): row for row in baseline['results']}
+
+    regressions = 0
+    for row in current['results']:
+        base = base_rows.get((row['case'], row['balls']))
+        if base is None:
+            continue
+        ratio = row['median_ms'] / base['median_ms'] if base['median_ms'] > 0 else 1.0
+        flag = ''
+        if ratio > 1.0 + args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif ratio < 1.0 - args.threshold:
+            flag = '  faster'
+        print(
+            f"{row['case']:28s} {row['balls']:>7d} balls  "
+            f"{base['median_ms']:9.3f} -> {row['median_ms']:9.3f} ms  x{ratio:5.2f}{flag}"
+        )
+    print(f'{regressions} regression(s) over {args.threshold:.0%}')
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='躲避球性能基准')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help='运行基准并写出 JSON')
+    run_parser.add_argument('--counts', type=int, nargs='+', default=DEFAULT_COUNTS, help='弹球数量')
+    run_parser.add_argument('--cases', nargs='+', choices=sorted(CASES), help='只运行指定用例')
+    run_parser.add_argument('--out', default='bench_output.json', help='结果文件')
+
+    cmp_parser = sub.add_parser('compare', help='与基线结果比较')
+    cmp_parser.add_argument('baseline')
+    cmp_parser.add_argument('current')
+    cmp_parser.add_argument('--threshold', type=float, default=0.15, help='中位数变慢超过该比例视为回归')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+        return 0
+    return compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
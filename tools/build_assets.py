@@ -0,0 +1,110 @@
+﻿"""
+资源构建流水线：统一调度 generate_visual_assets.py 与 generate_audio_assets.py 的全部生成任务。
+
+每个任务的内容哈希 = 生成脚本源码（含其 DEPENDENCIES 列出的文件）+ 任务参数；哈希与上次构建一致且输出文件都在时跳过。
+需要重建的任务彼此独立，分发到进程池并行执行。清单保存在 .cache/asset_manifest.json。
+
+用法（在任意目录）：
+    python tools/build_assets.py            # 只重建有变化的资源
+    python tools/build_assets.py --force    # 全部重建
+    python tools/build_assets.py --only bgm_loop.ogg --only background
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent
+ROOT = TOOLS_DIR.parent
+MANIFEST_PATH = ROOT / '.cache' / 'asset_manifest.json'
+
+sys.path.insert(0, str(TOOLS_DIR))
+
+# 生成脚本模块名 -> 该模块中的任务表名
+GENERATORS = {
+    'generate_visual_assets': 'IMAGES',
+    'generate_audio_assets': 'SOUNDS',
+}
+
+
+def load_manifest():
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest):
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+
+
+def collect_tasks():
+    """列出全部任务 (模块名, 任务名, 内容哈希)；缺少依赖的生成脚本整体跳过并给出提示。"""
+    tasks = []
+    for module_name, table in GENERATORS.items():
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as exc:
+            print(f'skip {module_name}: {exc}')
+            continue
+        source = (TOOLS_DIR / f'{module_name}.py').read_bytes()
+        for dependency in getattr(module, 'DEPENDENCIES', []):
+            source += Path(dependency).read_bytes()
+        for name, (func, params) in getattr(module, table).items():
+            digest = hashlib.sha1(source)
+            digest.update(func.__name__.encode())
+            digest.update(json.dumps(params, sort_keys=True).encode())
+            tasks.append((module_name, name, digest.hexdigest()))
+    return tasks
+
+
+def is_fresh(entry, digest):
+    """清单里的哈希一致且上次写出的文件都还在时视为最新。"""
+    if not entry or entry['hash'] != digest:
+        return False
+    return all((ROOT / path).is_file() for path in entry['outputs'])
+
+
+def run_task(task):
+    """在工作进程中执行一个生成任务，返回 (键, 哈希, 输出路径, 耗时)。"""
+    module_name, name, digest = task
+    start = time.perf_counter()
+    paths = importlib.import_module(module_name).build(name)
+    outputs = [Path(path).resolve().relative_to(ROOT).as_posix() for path in paths]
+    return f'{module_name}:{name}', digest, outputs, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='增量并行构建美术与音效资源')
+    parser.add_argument('--force', action='store_true', help='忽略清单，全部重建')
+    parser.add_argument('--only', action='append', default=[], help='只构建指定任务，可重复')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='进程数')
+    args = parser.parse_args()
+
+    manifest = {} if args.force else load_manifest()
+    tasks = collect_tasks()
+    if args.only:
+        tasks = [task for task in tasks if task[1] in args.only]
+    stale = [task for task in tasks if not is_fresh(manifest.get(f'{task[0]}:{task[1]}'), task[2])]
+    print(f'{len(tasks) - len(stale)} up to date, {len(stale)} to build')
+
+    start = time.perf_counter()
+    if stale:
+        with Pool(min(args.workers, len(stale))) as pool:
+            for key, digest, outputs, elapsed in pool.imap_unordered(run_task, stale):
+                manifest[key] = {'hash': digest, 'outputs': outputs}
+                # 每完成一个任务就落盘，中途失败时已完成的部分下次仍可跳过
+                save_manifest(manifest)
+                print(f'built {key} -> {", ".join(outputs)} ({elapsed:.2f}s)')
+    print(f'done in {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
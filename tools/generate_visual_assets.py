@@ -1,8 +1,8 @@
 ﻿from pathlib import Path
+import numpy as np
 from PIL import Image, ImageDraw, ImageFilter
 
-IMG_DIR = Path('assets/images')
-IMG_DIR.mkdir(parents=True, exist_ok=True)
+IMG_DIR = Path(__file__).resolve().parent.parent / 'assets' / 'images'
 
 COLORS = {
     'bg_top': (0x1E, 0x2A, 0x78),
@@ -20,22 +20,20 @@ COLORS = {
     'unmute_fill': (0x06, 0xD6, 0xA0, 255),
 }
 
-def lerp_color(start, end, t):
-    return tuple(int(s + (e - s) * t) for s, e in zip(start, end))
+def lerp_ramp(start, end, count):
+    # 与逐像素 int(s + (e - s) * t) 相同的取整方式，一次生成整条渐变
+    t = np.linspace(0.0, 1.0, count)[:, None]
+    start = np.array(start, dtype=np.float64)
+    end = np.array(end, dtype=np.float64)
+    return (start + (end - start) * t).astype(np.uint8)
 
-def make_background():
-    size = (800, 600)
-    vertical = Image.new('RGB', (1, size[1]))
-    for y in range(size[1]):
-        ratio = y / (size[1] - 1)
-        vertical.putpixel((0, y), lerp_color(COLORS['bg_top'], COLORS['bg_bottom'], ratio))
-    vertical = vertical.resize(size)
+def make_background(size=(800, 600)):
+    width, height = size
+    column = lerp_ramp(COLORS['bg_top'], COLORS['bg_bottom'], height)
+    vertical = Image.fromarray(np.ascontiguousarray(np.broadcast_to(column[:, None, :], (height, width, 3))), 'RGB')
 
-    horizontal = Image.new('RGB', (size[0], 1))
-    for x in range(size[0]):
-        t = x / (size[0] - 1)
-        horizontal.putpixel((x, 0), lerp_color((10, 12, 42), (24, 28, 88), t))
-    horizontal = horizontal.resize(size)
+    row = lerp_ramp((10, 12, 42), (24, 28, 88), width)
+    horizontal = Image.fromarray(np.ascontiguousarray(np.broadcast_to(row[None, :, :], (height, width, 3))), 'RGB')
 
     bg = Image.blend(vertical, horizontal, 0.3).convert('RGBA')
 
@@ -46,8 +44,7 @@ def make_background():
     draw.ellipse((500, 200, 1000, 700), fill=(255, 107, 107, 56))
     overlay = overlay.filter(ImageFilter.GaussianBlur(45))
 
-    final = Image.alpha_composite(bg, overlay)
-    final.save(IMG_DIR / 'bg_layer.png')
+    return {'bg_layer.png': Image.alpha_composite(bg, overlay)}
 
 
 def make_player():
@@ -65,57 +62,76 @@ def make_player():
     highlight = highlight.filter(ImageFilter.GaussianBlur(2))
     img = Image.alpha_composite(img, highlight)
 
-    img.save(IMG_DIR / 'player_base.png')
+    return {'player_base.png': img}
 
 
-def make_balls():
-    diameters = [24, 32, 40]
-    for (base_color, highlight_color), diameter in zip(COLORS['ball_colors'], diameters):
-        size = diameter + 8
-        img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
-        bbox = (4, 4, size - 4, size - 4)
-        draw.ellipse(bbox, fill=base_color)
+def make_ball(diameter, base_color, highlight_color):
+    size = diameter + 8
+    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    bbox = (4, 4, size - 4, size - 4)
+    draw.ellipse(bbox, fill=tuple(base_color))
 
-        hi = Image.new('RGBA', img.size, (0, 0, 0, 0))
-        hi_draw = ImageDraw.Draw(hi)
-        hi_draw.pieslice((6, 6, size // 2 + 8, size // 2 + 8), start=200, end=320, fill=highlight_color)
-        hi = hi.filter(ImageFilter.GaussianBlur(3))
-        img = Image.alpha_composite(img, hi)
+    hi = Image.new('RGBA', img.size, (0, 0, 0, 0))
+    hi_draw = ImageDraw.Draw(hi)
+    hi_draw.pieslice((6, 6, size // 2 + 8, size // 2 + 8), start=200, end=320, fill=tuple(highlight_color))
+    hi = hi.filter(ImageFilter.GaussianBlur(3))
+    img = Image.alpha_composite(img, hi)
 
-        shadow = Image.new('RGBA', img.size, (0, 0, 0, 0))
-        sh_draw = ImageDraw.Draw(shadow)
-        sh_draw.ellipse((4, 4, size - 4, size - 4), outline=(0, 0, 0, 70), width=2)
-        img = Image.alpha_composite(img, shadow)
+    shadow = Image.new('RGBA', img.size, (0, 0, 0, 0))
+    sh_draw = ImageDraw.Draw(shadow)
+    sh_draw.ellipse((4, 4, size - 4, size - 4), outline=(0, 0, 0, 70), width=2)
+    img = Image.alpha_composite(img, shadow)
 
-        name = {24: 'ball_small.png', 32: 'ball_medium.png', 40: 'ball_large.png'}[diameter]
-        img.save(IMG_DIR / name)
+    name = {24: 'ball_small.png', 32: 'ball_medium.png', 40: 'ball_large.png'}[diameter]
+    return {name: img}
 
 
-def make_icons():
+def make_icon(muted):
     size = 48
-    for muted in (True, False):
-        img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
-        fill = COLORS['mute_fill'] if muted else COLORS['unmute_fill']
-        body = [(12, 18), (22, 18), (32, 10), (32, 38), (22, 30), (12, 30)]
-        draw.polygon(body, fill=fill)
-        draw.line([(12, 18), (12, 30)], fill=(10, 10, 10, 120), width=3)
-        if muted:
-            draw.line([(10, 12), (38, 36)], fill=(255, 107, 107, 220), width=5)
-            draw.line([(38, 12), (10, 36)], fill=(255, 107, 107, 220), width=5)
-        else:
-            draw.arc((28, 12, 44, 36), start=315, end=45, fill=(255, 255, 255, 200), width=4)
-            draw.arc((24, 8, 48, 40), start=312, end=48, fill=(255, 255, 255, 120), width=3)
-        name = 'icon_mute.png' if muted else 'icon_unmute.png'
-        img.save(IMG_DIR / name)
+    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    fill = COLORS['mute_fill'] if muted else COLORS['unmute_fill']
+    body = [(12, 18), (22, 18), (32, 10), (32, 38), (22, 30), (12, 30)]
+    draw.polygon(body, fill=fill)
+    draw.line([(12, 18), (12, 30)], fill=(10, 10, 10, 120), width=3)
+    if muted:
+        draw.line([(10, 12), (38, 36)], fill=(255, 107, 107, 220), width=5)
+        draw.line([(38, 12), (10, 36)], fill=(255, 107, 107, 220), width=5)
+    else:
+        draw.arc((28, 12, 44, 36), start=315, end=45, fill=(255, 255, 255, 200), width=4)
+        draw.arc((24, 8, 48, 40), start=312, end=48, fill=(255, 255, 255, 120), width=3)
+    name = 'icon_mute.png' if muted else 'icon_unmute.png'
+    return {name: img}
+
+
+# 生成任务名 -> (生成函数, 参数)；每个函数返回 {文件名: Image}，参数参与 build_assets.py 的内容哈希
+IMAGES = {
+    'background': (make_background, {'size': (800, 600)}),
+    'player': (make_player, {}),
+    **{
+        f'ball_{diameter}': (make_ball, {'diameter': diameter, 'base_color': base, 'highlight_color': highlight})
+        for (base, highlight), diameter in zip(COLORS['ball_colors'], [24, 32, 40])
+    },
+    'icon_mute': (make_icon, {'muted': True}),
+    'icon_unmute': (make_icon, {'muted': False}),
+}
+
+
+def build(name, out_dir=IMG_DIR):
+    generate, params = IMAGES[name]
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for filename, img in generate(**params).items():
+        img.save(out_dir / filename)
+        paths.append(out_dir / filename)
+    return paths
 
 
 def main():
-    make_background()
-    make_player()
-    make_balls()
-    make_icons()
+    for name in IMAGES:
+        build(name)
     print('Generated visual assets in', IMG_DIR)
 
 if __name__ == '__main__':
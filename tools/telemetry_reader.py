@@ -0,0 +1,217 @@
+﻿"""
+遥测读取：跟随游戏写入的共享内存环形缓冲区（src/telemetry.py），汇总最近的数据并在本机提供 HTTP 查询。
+
+只读共享内存，不与游戏进程同步；读得慢或不运行都不会影响游戏，最多丢掉被覆盖的记录（计入 dropped）。
+
+用法（在项目根目录，游戏以 TELEMETRY_ENABLED = True 运行）：
+    python tools/telemetry_reader.py                 # 每秒打印一次汇总
+    python tools/telemetry_reader.py --serve 8765    # 同时提供 http://127.0.0.1:8765/metrics（JSON）
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import numpy as np
+
+import config as cfg
+from telemetry import (
+    HEADER_DTYPE,
+    RECORD_DTYPE,
+    TELEMETRY_MAGIC,
+    TELEMETRY_VERSION,
+    telemetry_attach,
+    telemetry_views,
+)
+
+# 汇总窗口（秒）
+WINDOWS = (1, 10, 60)
+# 超过这么久没有新记录时重新打开共享内存，检查游戏是否已重启（秒）
+IDLE_REOPEN = 2.0
+
+
+def reader_open(name):
+    """打开共享内存，不存在或格式不对时返回 None。"""
+    try:
+        shm = telemetry_attach(name)
+    except FileNotFoundError:
+        return None
+    if shm.size < HEADER_DTYPE.itemsize:
+        shm.close()
+        return None
+    header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+    if bytes(header['magic']) != TELEMETRY_MAGIC or int(header['version']) != TELEMETRY_VERSION:
+        del header
+        shm.close()
+        return None
+    capacity = int(header['capacity'])
+    header, records = telemetry_views(shm.buf, capacity)
+    return {
+        'shm': shm,
+        'header': header,
+        'records': records,
+        'capacity': capacity,
+        'pid': int(header['pid']),
+        'seq': 0,
+        'dropped': 0,
+    }
+
+
+def reader_close(reader):
+    reader['header'] = reader['records'] = None
+    reader['shm'].close()
+
+
+def telemetry_read(reader):
+    """复制自上次读取以来的新记录；被写入方追上的部分丢弃并计数。"""
+    capacity = reader['capacity']
+    head = int(reader['header']['write_seq'])
+    start = reader['seq']
+    if head < start:
+        # 写入方重新开始计数（游戏重启后复用了同名共享内存）
+        start = 0
+    if head - start > capacity:
+        reader['dropped'] += head - start - capacity
+        start = head - capacity
+    if head == start:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    numbers = np.arange(start, head, dtype=np.uint64)
+    batch = reader['records'][numbers % capacity]
+    # 复制期间写入方可能又前进了：第 n 条记录在写第 n + capacity 条时被覆盖
+    after = int(reader['header']['write_seq'])
+    valid = (batch['seq'] == numbers + 1) & (numbers + capacity > after)
+    reader['dropped'] += int((~valid).sum())
+    reader['seq'] = head
+    return batch[valid]
+
+
+def summarize(records, now, dropped, pid):
+    """按各时间窗口汇总帧耗时、FPS 与受击次数，并给出最新一帧的游戏状态。"""
+    if len(records) == 0:
+        return {'pid': pid, 'records': 0, 'dropped': dropped}
+    last = records[-1]
+    result = {
+        'pid': pid,
+        'records': len(records),
+        'dropped': dropped,
+        'age_s': round(now - float(last['time']), 3),
+        'state': cfg.GAME_STATES[int(last['state'])] if int(last['state']) < len(cfg.GAME_STATES) else 'unknown',
+        'score': round(float(last['score']), 1),
+        'level': int(last['level']) + 1,
+        'balls': int(last['balls']),
+        'hp': int(last['hp']),
+        'quality': int(last['quality']),
+        'hits_total': int(last['hits']),
+        'windows': {},
+    }
+    for seconds in WINDOWS:
+        recent = records[records['time'] >= now - seconds]
+        if len(recent) == 0:
+            continue
+        frame = recent['frame_ms'].astype(np.float64)
+        work = recent['work_ms'].astype(np.float64)
+        span = float(recent['time'][-1] - recent['time'][0])
+        result['windows'][f'{seconds}s'] = {
+            'frames': len(recent),
+            # 按记录实际覆盖的时间计算，刚启动时不会因窗口未填满而偏低
+            'fps': round((len(recent) - 1) / span, 1) if span > 0 else 0.0,
+            'frame_ms_mean': round(float(frame.mean()), 2),
+            'frame_ms_p95': round(float(np.percentile(frame, 95)), 2),
+            'frame_ms_max': round(float(frame.max()), 2),
+            'work_ms_mean': round(float(work.mean()), 2),
+            'hits': int(recent['hits'][-1]) - int(recent['hits'][0]),
+        }
+    return result
+
+
+def serve(port, state):
+    """在后台线程提供 /metrics；返回的 JSON 是最近一次汇总。"""
+
+    def handle(request):
+        if request.path.rstrip('/') not in ('', '/metrics'):
+            request.send_error(404)
+            return
+        body = json.dumps(state['summary'], ensure_ascii=False, indent=2).encode('utf-8')
+        request.send_response(200)
+        request.send_header('Content-Type', 'application/json; charset=utf-8')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    # http.server 只接受处理器类，这里用 type() 生成，把请求转给上面的函数
+    handler = type('MetricsHandler', (BaseHTTPRequestHandler,), {
+        'do_GET': handle,
+        'log_message': lambda request, *args: None,
+    })
+    httpd = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    print(f'serving http://127.0.0.1:{port}/metrics')
+    return httpd
+
+
+def main():
+    parser = argparse.ArgumentParser(description='读取躲避球的共享内存遥测')
+    parser.add_argument('--name', default=cfg.TELEMETRY_NAME, help='共享内存名称')
+    parser.add_argument('--interval', type=float, default=0.1, help='读取间隔（秒）')
+    parser.add_argument('--print-every', type=float, default=1.0, help='打印汇总的间隔（秒），0 表示不打印')
+    parser.add_argument('--serve', type=int, default=0, help='在本机该端口提供 HTTP /metrics，0 表示不提供')
+    parser.add_argument('--duration', type=float, default=0.0, help='运行秒数，0 表示一直运行')
+    args = parser.parse_args()
+
+    keep = max(WINDOWS) * 240
+    history = deque(maxlen=keep)
+    state = {'summary': {'records': 0}}
+    httpd = serve(args.serve, state) if args.serve else None
+    reader = None
+    start = time.time()
+    next_print = start
+    last_new = start
+    try:
+        while args.duration <= 0 or time.time() - start < args.duration:
+            if reader is None:
+                reader = reader_open(args.name)
+                if reader is None:
+                    state['summary'] = {'records': 0, 'waiting_for': args.name}
+                    time.sleep(1.0)
+                    continue
+                history.clear()
+            batch = telemetry_read(reader)
+            now = time.time()
+            if len(batch):
+                history.extend(batch)
+                last_new = now
+            elif now - last_new > IDLE_REOPEN:
+                # 游戏退出后旧映射仍然有效；重新打开，若已换成新进程的共享内存就切换过去
+                fresh = reader_open(args.name)
+                last_new = now
+                if fresh is not None and fresh['pid'] != reader['pid']:
+                    reader_close(reader)
+                    reader = fresh
+                    history.clear()
+                    continue
+                if fresh is not None:
+                    reader_close(fresh)
+            records = np.array(history, dtype=RECORD_DTYPE)
+            state['summary'] = summarize(records, now, reader['dropped'], reader['pid'])
+            if args.print_every > 0 and now >= next_print:
+                print(json.dumps(state['summary'], ensure_ascii=False))
+                next_print = now + args.print_every
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if httpd:
+            httpd.shutdown()
+        if reader:
+            reader_close(reader)
+
+
+if __name__ == '__main__':
+    main()